@@ -7,8 +7,13 @@ from flask_mail import Mail
 from flask_wtf.csrf import CSRFProtect
 
 from config import config
+from app.cache import cache
+from app.db_pool import engine_options, init_pool_stats
+from app.db_routing import RoutingSession, init_replica_routing
+from app.metrics import init_metrics
+from app.query_stats import init_query_stats
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 login_manager = LoginManager()
 mail = Mail()
@@ -22,12 +27,19 @@ def create_app(config_name=None):
     
     app = Flask(__name__, template_folder='templates', static_folder='static')
     app.config.from_object(config[config_name])
+    app.config['CONFIG_NAME'] = config_name
     
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    init_replica_routing(app)
+    init_metrics(app)
     db.init_app(app)
+    init_pool_stats(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     mail.init_app(app)
     csrf.init_app(app)
+    cache.init_app(app)
+    init_query_stats(app)
     
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
@@ -36,7 +48,7 @@ def create_app(config_name=None):
     from app.models import User
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(user_id)
+        return User.load_session_user(user_id)
     
     # Register blueprints
     from app.blueprints.auth import auth_bp
@@ -49,6 +61,7 @@ def create_app(config_name=None):
     from app.blueprints.reports import reports_bp
     from app.blueprints.users import users_bp
     from app.blueprints.settings import settings_bp
+    from app.blueprints.health import health_bp
     
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(dashboard_bp, url_prefix='/')
@@ -60,10 +73,15 @@ def create_app(config_name=None):
     app.register_blueprint(reports_bp, url_prefix='/reports')
     app.register_blueprint(users_bp, url_prefix='/users')
     app.register_blueprint(settings_bp, url_prefix='/settings')
+    app.register_blueprint(health_bp)
     
     # Error handlers
     from app.blueprints.errors import register_error_handlers
     register_error_handlers(app)
+
+    # CLI commands
+    from app.commands import register_commands
+    register_commands(app)
     
     # Context processors
     @app.context_processor
@@ -84,4 +102,7 @@ def create_app(config_name=None):
             else:
                 raise
 
+    from app.search import init_search
+    init_search(app)
+
     return app
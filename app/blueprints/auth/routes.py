@@ -64,13 +64,14 @@ def logout():
 def profile():
     form = ChangePasswordForm()
     if form.validate_on_submit():
-        if not current_user.check_password(form.current_password.data):
+        user = db.session.get(User, current_user.id)
+        if not user.check_password(form.current_password.data):
             flash('Current password is incorrect.', 'danger')
             return redirect(url_for('auth.profile'))
         if form.new_password.data != form.confirm_password.data:
             flash('New passwords do not match.', 'danger')
             return redirect(url_for('auth.profile'))
-        current_user.set_password(form.new_password.data)
+        user.set_password(form.new_password.data)
         db.session.commit()
         flash('Password updated.', 'success')
         return redirect(url_for('auth.profile'))
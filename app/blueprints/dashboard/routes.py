@@ -3,59 +3,55 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from sqlalchemy import func
 
-from flask import render_template
+from flask import render_template, current_app
 from flask_login import login_required
 
 from app import db
 from app.blueprints.dashboard import dashboard_bp
-from app.models import Product, Order, Delivery
+from app.cache import cache, invalidate_on_commit
+from app.decorators import read_replica
+from app.models import Product, Order, OrderItem, Delivery, DailySalesSummary, DailyProductSales
 from app.services import ProductService
 
 
-@dashboard_bp.route('/')
-@login_required
-def index():
-    today = datetime.utcnow().date()
+DASHBOARD_CACHE_KEY = 'dashboard:snapshot'
+# The rollups are refreshed in their own commit after the order's; that commit drops the snapshot
+# again so a dashboard load in between cannot keep the old trend cached.
+invalidate_on_commit(DASHBOARD_CACHE_KEY, Order, OrderItem, Delivery, Product, DailySalesSummary, DailyProductSales)
+
+
+def _build_snapshot(today):
+    """All dashboard figures as plain, picklable values (safe for a shared cache)."""
     total_products = Product.query.filter_by(is_active=True).count()
-    today_orders = Order.query.filter(Order.order_date == today, Order.order_status != 'cancelled').count()
+    today_summary = db.session.get(DailySalesSummary, today)
+    today_orders = today_summary.order_count if today_summary else 0
     pending_deliveries = Delivery.query.filter(Delivery.status.in_(['pending', 'assigned', 'in_transit'])).count()
     low_stock = ProductService.get_low_stock_products()
     low_stock_count = len(low_stock)
-    today_revenue = db.session.query(func.coalesce(func.sum(Order.grand_total), 0)).filter(
-        Order.order_date == today,
-        Order.order_status != 'cancelled',
-        Order.payment_status == 'paid',
-    ).scalar() or Decimal('0')
+    today_revenue = today_summary.paid_revenue if today_summary else Decimal('0')
 
-    # Last 30 days sales trend
+    # Last 30 days sales trend (from the daily rollup)
     start_date = today - timedelta(days=30)
     sales_trend = (
-        db.session.query(Order.order_date, func.sum(Order.grand_total).label('total'))
-        .filter(
-            Order.order_date >= start_date,
-            Order.order_date <= today,
-            Order.order_status != 'cancelled',
-        )
-        .group_by(Order.order_date)
-        .order_by(Order.order_date)
+        db.session.query(DailySalesSummary.day, DailySalesSummary.revenue)
+        .filter(DailySalesSummary.day >= start_date, DailySalesSummary.day <= today)
+        .order_by(DailySalesSummary.day)
         .all()
     )
     trend_labels = [d.strftime('%Y-%m-%d') for d, _ in sales_trend]
     trend_data = [float(t) for _, t in sales_trend]
 
-    # Top selling products (from order items)
-    from app.models import OrderItem
+    # Top selling products (from the per-product daily rollup)
     top_products = (
-        db.session.query(OrderItem.product_name, func.sum(OrderItem.quantity).label('qty'))
-        .join(Order)
-        .filter(Order.order_status != 'cancelled', Order.order_date >= start_date)
-        .group_by(OrderItem.product_name)
-        .order_by(func.sum(OrderItem.quantity).desc())
+        db.session.query(DailyProductSales.product_name, func.sum(DailyProductSales.quantity).label('qty'))
+        .filter(DailyProductSales.day >= start_date)
+        .group_by(DailyProductSales.product_name)
+        .order_by(func.sum(DailyProductSales.quantity).desc())
         .limit(10)
         .all()
     )
     top_product_names = [p[0] for p in top_products]
-    top_product_qty = [p[1] for p in top_products]
+    top_product_qty = [int(p[1] or 0) for p in top_products]
 
     # Payment status distribution
     payment_counts = (
@@ -68,25 +64,41 @@ def index():
     payment_data = [p[1] for p in payment_counts]
 
     recent_orders = (
-        Order.query.filter(Order.order_status != 'cancelled')
+        db.session.query(Order.id, Order.order_number, Order.customer_name, Order.grand_total)
+        .filter(Order.order_status != 'cancelled')
         .order_by(Order.created_at.desc())
         .limit(10)
         .all()
     )
 
-    return render_template(
-        'dashboard/index.html',
-        total_products=total_products,
-        today_orders=today_orders,
-        pending_deliveries=pending_deliveries,
-        low_stock_count=low_stock_count,
-        low_stock_products=low_stock[:5],
-        today_revenue=today_revenue,
-        trend_labels=trend_labels,
-        trend_data=trend_data,
-        top_product_names=top_product_names,
-        top_product_qty=top_product_qty,
-        payment_labels=payment_labels,
-        payment_data=payment_data,
-        recent_orders=recent_orders,
+    return {
+        'total_products': total_products,
+        'today_orders': today_orders,
+        'pending_deliveries': pending_deliveries,
+        'low_stock_count': low_stock_count,
+        'low_stock_products': [
+            {'id': p.id, 'name': p.name, 'stock_quantity': p.stock_quantity, 'min_stock_level': p.min_stock_level}
+            for p in low_stock[:5]
+        ],
+        'today_revenue': today_revenue,
+        'trend_labels': trend_labels,
+        'trend_data': trend_data,
+        'top_product_names': top_product_names,
+        'top_product_qty': top_product_qty,
+        'payment_labels': payment_labels,
+        'payment_data': payment_data,
+        'recent_orders': [dict(o._mapping) for o in recent_orders],
+    }
+
+
+@dashboard_bp.route('/')
+@login_required
+@read_replica
+def index():
+    today = datetime.utcnow().date()
+    snapshot = cache.get_or_set(
+        DASHBOARD_CACHE_KEY,
+        current_app.config.get('DASHBOARD_CACHE_TTL', 30),
+        lambda: _build_snapshot(today),
     )
+    return render_template('dashboard/index.html', **snapshot)
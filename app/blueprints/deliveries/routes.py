@@ -1,66 +1,108 @@
 """Delivery routes."""
-import os
 import json
+from datetime import datetime, time
 from io import BytesIO
 
 from flask import render_template, redirect, url_for, flash, request, send_file, current_app
 from flask_login import login_required, current_user
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.lib.utils import ImageReader
-from reportlab.platypus import (
-    BaseDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageTemplate, Frame, Flowable,
-)
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+from sqlalchemy import func
 
 from app import db
 from app.blueprints.deliveries import deliveries_bp
-from app.decorators import role_required
-from app.pdf_fonts import register_pdf_fonts, get_pdf_fonts
+from app.decorators import role_required, read_replica
+from app.exports import stream_csv
+from app.pagination import keyset_paginate
+from app.pdf_bulk import stream_bulk_pdf
+from app.pdf_cache import cached_pdf
+from app.pdf_fonts import get_pdf_fonts
+from app.pdf_toolkit import document_header, get_styles, hline, page_template, ref_row
 from app.forms import DeliveryForm
 from app.models import Delivery, DeliveryItem, Order, User
+from app.models.delivery import SCHEDULE_SORT_KEY
 from app.services import DeliveryService
 
 
-class _LineFlowable(Flowable):
-    """Draws a horizontal line at full width; aligns with frame left edge."""
-    def __init__(self, width_pt, height_pt=2):
-        self.width_pt = width_pt
-        self.height_pt = height_pt
-
-    def wrap(self, aW, aH):
-        return (self.width_pt, self.height_pt)
-
-    def drawOn(self, canv, x, y, _sW=0):
-        canv.setStrokeColor(colors.HexColor('#cccccc'))
-        canv.setLineWidth(0.5)
-        canv.line(x, y - self.height_pt, x + self.width_pt, y - self.height_pt)
+@deliveries_bp.route('/')
+@login_required
+@read_replica
+def list():
+    query, filters = _filtered_deliveries()
+    if request.args.get('format') == 'csv':
+        rows = query.outerjoin(User, User.id == Delivery.assigned_to_id).order_by(
+            Delivery.scheduled_date.desc().nullslast(), Delivery.created_at.desc(), Delivery.id,
+        ).with_entities(
+            Delivery.delivery_number, Delivery.customer_name, Delivery.phone, Delivery.delivery_address,
+            Delivery.scheduled_date, Delivery.delivery_date, Delivery.status,
+            func.coalesce(User.full_name, User.username), Delivery.created_at,
+        ).yield_per(1000)
+        header = ['Delivery #', 'Customer', 'Phone', 'Address', 'Scheduled', 'Delivered', 'Status',
+                  'Assigned To', 'Created']
+        return stream_csv('deliveries.csv', header, rows)
+    deliveries = keyset_paginate(
+        query, [SCHEDULE_SORT_KEY, Delivery.created_at, Delivery.id], request.args.get('cursor'), descending=True,
+    )
+    return render_template('deliveries/list.html', deliveries=deliveries, **filters)
 
 
-def _hline(width_pt):
-    """Thin horizontal line (grey), full frame width."""
-    t = Table([['']], colWidths=[width_pt], rowHeights=[2])
-    t.setStyle(TableStyle([
-        ('LINEBELOW', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-    ]))
-    return t
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
 
 
-@deliveries_bp.route('/')
-@login_required
-def list():
-    page = request.args.get('page', 1, type=int)
-    status = request.args.get('status', '')
+def _visible_deliveries():
     query = Delivery.query
     if current_user.role == 'delivery':
         query = query.filter(Delivery.assigned_to_id == current_user.id)
-    if status:
-        query = query.filter(Delivery.status == status)
-    deliveries = query.order_by(Delivery.scheduled_date.desc().nullslast(), Delivery.created_at.desc()).paginate(page=page, per_page=20)
-    return render_template('deliveries/list.html', deliveries=deliveries, status=status)
+    return query
+
+
+def _filtered_deliveries():
+    """Delivery query for the list filters in request.args (status, date_from, date_to on created date)."""
+    filters = {key: request.args.get(key, '') for key in ('status', 'date_from', 'date_to')}
+    query = _visible_deliveries()
+    if filters['status']:
+        query = query.filter(Delivery.status == filters['status'])
+    date_from, date_to = _parse_date(filters['date_from']), _parse_date(filters['date_to'])
+    if date_from:
+        query = query.filter(Delivery.created_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        query = query.filter(Delivery.created_at <= datetime.combine(date_to, time.max))
+    return query, filters
+
+
+@deliveries_bp.route('/bulk-pdf')
+@login_required
+def bulk_pdf():
+    """Delivery notes for the filtered deliveries (or ?ids=a,b,c) as one merged PDF, or a zip with format=zip."""
+    ids = [i for i in request.args.get('ids', '').split(',') if i]
+    if ids:
+        query = _visible_deliveries().filter(Delivery.id.in_(ids))
+    else:
+        query, _ = _filtered_deliveries()
+    ids = [row.id for row in query.order_by(Delivery.created_at, Delivery.delivery_number).with_entities(Delivery.id)]
+    if not ids:
+        flash('No deliveries match the filter.', 'warning')
+        return redirect(url_for('deliveries.list'))
+    limit = current_app.config['BULK_PDF_MAX_DOCUMENTS']
+    if len(ids) > limit:
+        flash(f'{len(ids)} deliveries match; narrow the filter to at most {limit}.', 'warning')
+        return redirect(url_for('deliveries.list'))
+    fmt = 'zip' if request.args.get('format') == 'zip' else 'pdf'
+    return stream_bulk_pdf(f'delivery_notes_{datetime.utcnow():%Y%m%d}', render_delivery_pdf, ids, fmt)
+
+
+def render_delivery_pdf(delivery_id):
+    """(filename, delivery note PDF bytes); runs in a PDF job worker for bulk downloads."""
+    delivery = db.session.get(Delivery, delivery_id)
+    pdf_bytes = cached_pdf('delivery', delivery, lambda: _build_delivery_report_pdf(delivery))
+    safe_number = "".join(c for c in delivery.delivery_number if c.isalnum() or c in '-_')
+    return f'Delivery_Report_{safe_number}.pdf', pdf_bytes
 
 
 @deliveries_bp.route('/add', methods=['GET', 'POST'])
@@ -120,7 +162,7 @@ def add():
 @deliveries_bp.route('/<delivery_id>')
 @login_required
 def detail(delivery_id):
-    delivery = Delivery.query.get_or_404(delivery_id)
+    delivery = DeliveryService.get_delivery_with_items(delivery_id)
     if current_user.role == 'delivery' and delivery.assigned_to_id != current_user.id:
         from flask import abort
         abort(403)
@@ -131,7 +173,7 @@ def detail(delivery_id):
 @login_required
 @role_required('admin', 'manager', 'sales')
 def edit(delivery_id):
-    delivery = Delivery.query.get_or_404(delivery_id)
+    delivery = DeliveryService.get_delivery_with_items(delivery_id)
     if current_user.role == 'delivery' and delivery.assigned_to_id != current_user.id:
         from flask import abort
         abort(403)
@@ -147,20 +189,20 @@ def edit(delivery_id):
         delivery.assigned_to_id = form.assigned_to_id.data or None
         delivery.status = form.status.data
         delivery.delivery_notes = form.delivery_notes.data
+        # Items live in another table; bump updated_at so cached PDFs are re-rendered.
+        delivery.updated_at = datetime.utcnow()
         items_json = request.form.get('items_json', '[]')
         try:
             items_data = json.loads(items_json) if items_json else []
         except Exception:
             items_data = []
-        for di in delivery.items.all():
-            db.session.delete(di)
+        delivery.items.clear()
         for row in items_data:
             product_name = (row.get('product_name') or '').strip() or '—'
             quantity = int(row.get('quantity', 0) or 0)
             unit_price = float(row.get('unit_price', 0) or 0)
             if product_name and quantity > 0:
-                db.session.add(DeliveryItem(
-                    delivery_id=delivery.id,
+                delivery.items.append(DeliveryItem(
                     product_name=product_name,
                     quantity=quantity,
                     unit_price=unit_price,
@@ -175,88 +217,21 @@ def edit(delivery_id):
 def _build_delivery_report_pdf(delivery):
     """Build delivery note PDF with same header as quotation; layout matches delivery note template."""
     buffer = BytesIO()
-    margin = 50
-    pw_pt, ph_pt = letter[0], letter[1]
-    frame_width = pw_pt - 2 * margin
-    frame_height = ph_pt - 2 * margin
-    frame = Frame(
-        margin, margin, frame_width, frame_height,
-        id='normal',
-        leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0,
-    )
-    doc = BaseDocTemplate(
-        buffer, pagesize=letter,
-        leftMargin=margin, rightMargin=margin, topMargin=margin, bottomMargin=margin,
-    )
-    doc.addPageTemplates([PageTemplate(id='First', frames=[frame]), PageTemplate(id='Later', frames=[frame])])
-    register_pdf_fonts(current_app.static_folder)
+    doc, frame_width = page_template(buffer, letter)
+    static_dir = current_app.static_folder
+    styles = get_styles(static_dir)
     fonts = get_pdf_fonts()
-    styles = getSampleStyleSheet()
-    black = colors.black
-    grey = colors.HexColor('#555555')
     border_light = colors.HexColor('#e2e8f0')
-
-    title_style = ParagraphStyle(
-        'DocTitle', parent=styles['Heading1'],
-        fontSize=20, spaceAfter=2, textColor=black, fontName=fonts['bold'],
-        leftIndent=0, firstLineIndent=0,
-    )
-    small_style = ParagraphStyle(
-        'Small', parent=styles['Normal'], fontSize=10, textColor=grey, spaceAfter=0,
-        leftIndent=0, firstLineIndent=0, rightIndent=0, bulletIndent=0, fontName=fonts['regular'],
-    )
-    body_style = ParagraphStyle(
-        'Body', parent=styles['Normal'], fontSize=11, textColor=black, spaceAfter=2,
-        leftIndent=0, firstLineIndent=0, fontName=fonts['regular'],
-    )
-    story = []
-
-    # ----- Header: same as quotation (logo.png at half size + address) -----
-    static_dir = current_app.static_folder
-    logo_path = os.path.join(static_dir, 'logo.png')
-    if os.path.isfile(logo_path):
-        try:
-            ir = ImageReader(logo_path)
-            pw, ph = ir.getSize()
-            if pw and ph:
-                max_w_pt = frame_width
-                max_h_pt = 1.4 * inch
-                scale = min(max_w_pt / pw, max_h_pt / ph, 1.0)
-                logo_img = Image(logo_path, width=pw * scale * 0.5, height=ph * scale * 0.5)
-            else:
-                logo_img = Image(logo_path, width=frame_width * 0.5, height=0.7 * inch)
-            logo_img.hAlign = 'LEFT'
-            story.append(logo_img)
-        except Exception:
-            pass
-    story.append(Spacer(1, 0.15 * inch))
-    addr_style = ParagraphStyle(
-        'Addr', parent=styles['Normal'], fontSize=10, textColor=colors.HexColor('#555555'),
-        leftIndent=0, spaceAfter=0, spaceBefore=2, fontName=fonts['regular'],
-    )
-    story.append(Paragraph('Tel: 0725799182 | Gikomba, Kombo Munyiri Rd.', addr_style))
-    story.append(Spacer(1, 0.2 * inch))
-    story.append(_hline(frame_width))
-    story.append(Spacer(1, 0.15 * inch))
-
-    # ----- DELIVERY NOTE (left) -----
-    story.append(Paragraph('DELIVERY NOTE', title_style))
-    story.append(_hline(frame_width))
-    story.append(Spacer(1, 0.12 * inch))
+    small_style = styles['small']
+    body_style = styles['body']
+    story = document_header(static_dir, frame_width, 'DELIVERY NOTE')
 
     # ----- Delivery Note No (left) Date (right) -----
     date_str = delivery.scheduled_date.strftime('%d/%m/%Y') if delivery.scheduled_date else (delivery.created_at.strftime('%d/%m/%Y') if delivery.created_at else '—')
-    ref_table = Table([
-        [Paragraph('Delivery Note No: <b>{}</b>'.format(delivery.delivery_number), small_style),
-         Paragraph('Date: <b>{}</b>'.format(date_str), ParagraphStyle('SmallRight', parent=small_style, alignment=2))]
-    ], colWidths=[frame_width - 2.5 * inch, 2.5 * inch])
-    ref_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-        ('LEFTPADDING', (0, 0), (0, 0), 0),
-        ('RIGHTPADDING', (0, 0), (0, 0), 0),
-    ]))
-    story.append(ref_table)
+    story.append(ref_row(
+        'Delivery Note No: <b>{}</b>'.format(delivery.delivery_number), 'Date: <b>{}</b>'.format(date_str),
+        frame_width, styles,
+    ))
     story.append(Spacer(1, 0.25 * inch))
 
     # ----- Customer -----
@@ -270,7 +245,7 @@ def _build_delivery_report_pdf(delivery):
     story.append(Paragraph('Delivery Address:', body_style))
     story.append(Paragraph((delivery.delivery_address or '—').replace('\n', '<br/>'), body_style))
     story.append(Spacer(1, 0.2 * inch))
-    story.append(_hline(frame_width))
+    story.append(hline(frame_width))
     story.append(Spacer(1, 0.2 * inch))
 
     # ----- Items table: Item/Description | Qty Delivered | Remarks -----
@@ -319,17 +294,11 @@ def _build_delivery_report_pdf(delivery):
     story.append(Spacer(1, 0.25 * inch))
 
     # ----- Goods received disclaimer (centered) -----
-    disclaimer_style = ParagraphStyle(
-        'Disclaimer', parent=styles['Normal'], fontSize=11, textColor=black, alignment=1, spaceAfter=0, fontName=fonts['regular'],
-    )
-    story.append(Paragraph('Goods received in good condition', disclaimer_style))
+    story.append(Paragraph('Goods received in good condition', styles['disclaimer']))
     story.append(Spacer(1, 0.3 * inch))
 
     # ----- Footer: Tel centered -----
-    footer_style = ParagraphStyle(
-        'Footer', parent=styles['Normal'], fontSize=10, textColor=grey, alignment=1, spaceAfter=0, fontName=fonts['regular'],
-    )
-    story.append(Paragraph('Tel: 0725 799182', footer_style))
+    story.append(Paragraph('Tel: 0725 799182', styles['footer']))
 
     doc.build(story)
     buffer.seek(0)
@@ -343,7 +312,7 @@ def pdf(delivery_id):
     if current_user.role == 'delivery' and delivery.assigned_to_id != current_user.id:
         from flask import abort
         abort(403)
-    pdf_bytes = _build_delivery_report_pdf(delivery)
+    pdf_bytes = cached_pdf('delivery', delivery, lambda: _build_delivery_report_pdf(delivery))
     safe_number = "".join(c for c in delivery.delivery_number if c.isalnum() or c in '-_')
     view_inline = request.args.get('view') == '1'
     return send_file(
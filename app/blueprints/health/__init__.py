@@ -0,0 +1,6 @@
+"""Health blueprint (liveness and readiness probes)."""
+from flask import Blueprint
+
+health_bp = Blueprint('health', __name__)
+
+from app.blueprints.health import routes
@@ -0,0 +1,25 @@
+"""Liveness and readiness probes for load balancers and container orchestrators."""
+import os
+
+from flask import jsonify
+from sqlalchemy import text
+
+from app import db
+from app.blueprints.health import health_bp
+
+
+@health_bp.route('/healthz')
+def healthz():
+    """The worker is up and serving requests; does not touch the database."""
+    return jsonify({'status': 'ok', 'pid': os.getpid()})
+
+
+@health_bp.route('/readyz')
+def readyz():
+    """Ready for traffic: the database answers."""
+    try:
+        db.session.execute(text('SELECT 1'))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'status': 'unavailable', 'database': type(e).__name__}), 503
+    return jsonify({'status': 'ready', 'database': 'ok'})
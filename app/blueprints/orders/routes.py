@@ -1,42 +1,111 @@
 """Order routes."""
 import json
-import os
+from datetime import datetime
 from io import BytesIO
 
 from flask import render_template, redirect, url_for, flash, request, send_file, current_app
 from flask_login import login_required, current_user
-from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, mm
-from reportlab.lib.utils import ImageReader
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image,
-    BaseDocTemplate, PageTemplate, Frame, Flowable,
-)
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 
 from app import db
 from app.blueprints.orders import orders_bp
-from app.decorators import role_required
-from app.pdf_fonts import register_pdf_fonts, get_pdf_fonts
+from app.decorators import role_required, read_replica
+from app.exports import stream_csv
+from app.pagination import keyset_paginate
+from app.pdf_bulk import stream_bulk_pdf
+from app.pdf_cache import cached_pdf
+from app.pdf_fonts import get_pdf_fonts
+from app.pdf_toolkit import document_header, get_styles, hline, page_template, ref_row, thermal_header
 from app.forms import OrderForm
-from app.models import Order, Product
-from app.services import OrderService, AuditService
+from app.models import Order, OrderItem, Product
+from app.services import OrderService, AuditService, RollupService
 
 
 @orders_bp.route('/')
 @login_required
+@read_replica
 def list():
-    page = request.args.get('page', 1, type=int)
-    status = request.args.get('status', '')
-    payment = request.args.get('payment', '')
+    query, filters = _filtered_orders()
+    if request.args.get('format') == 'csv':
+        return _export_csv(query, items=request.args.get('items') == '1')
+    orders = keyset_paginate(query, [Order.created_at, Order.id], request.args.get('cursor'), descending=True)
+    return render_template('orders/list.html', orders=orders, **filters)
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _filtered_orders():
+    """Order query for the list filters in request.args (status, payment, date_from, date_to)."""
+    filters = {key: request.args.get(key, '') for key in ('status', 'payment', 'date_from', 'date_to')}
     query = Order.query
-    if status:
-        query = query.filter(Order.order_status == status)
-    if payment:
-        query = query.filter(Order.payment_status == payment)
-    orders = query.order_by(Order.created_at.desc()).paginate(page=page, per_page=20)
-    return render_template('orders/list.html', orders=orders, status=status, payment=payment)
+    if filters['status']:
+        query = query.filter(Order.order_status == filters['status'])
+    if filters['payment']:
+        query = query.filter(Order.payment_status == filters['payment'])
+    date_from, date_to = _parse_date(filters['date_from']), _parse_date(filters['date_to'])
+    if date_from:
+        query = query.filter(Order.order_date >= date_from)
+    if date_to:
+        query = query.filter(Order.order_date <= date_to)
+    return query, filters
+
+
+@orders_bp.route('/bulk-pdf')
+@login_required
+def bulk_pdf():
+    """Invoices for the filtered orders (or ?ids=a,b,c) as one merged PDF, or a zip with format=zip."""
+    ids = [i for i in request.args.get('ids', '').split(',') if i]
+    if ids:
+        query = Order.query.filter(Order.id.in_(ids))
+    else:
+        query, _ = _filtered_orders()
+    ids = [row.id for row in query.order_by(Order.order_date, Order.order_number).with_entities(Order.id)]
+    if not ids:
+        flash('No orders match the filter.', 'warning')
+        return redirect(url_for('orders.list'))
+    limit = current_app.config['BULK_PDF_MAX_DOCUMENTS']
+    if len(ids) > limit:
+        flash(f'{len(ids)} orders match; narrow the filter to at most {limit}.', 'warning')
+        return redirect(url_for('orders.list'))
+    fmt = 'zip' if request.args.get('format') == 'zip' else 'pdf'
+    return stream_bulk_pdf(f'invoices_{datetime.utcnow():%Y%m%d}', render_invoice_pdf, ids, fmt)
+
+
+def render_invoice_pdf(order_id):
+    """(filename, invoice PDF bytes); runs in a PDF job worker for bulk downloads."""
+    order = db.session.get(Order, order_id)
+    pdf_bytes = cached_pdf('invoice', order, lambda: _build_order_invoice_pdf(order))
+    safe_number = "".join(c for c in order.order_number if c.isalnum() or c in '-_')
+    return f'Invoice_{safe_number}.pdf', pdf_bytes
+
+
+def _export_csv(query, items=False):
+    """Stream the filtered orders (or, with items, one row per order line) as CSV."""
+    query = query.order_by(Order.created_at.desc(), Order.id)
+    if items:
+        rows = query.join(OrderItem, OrderItem.order_id == Order.id).with_entities(
+            Order.order_number, Order.order_date, Order.customer_name, Order.order_status,
+            OrderItem.product_name, OrderItem.quantity, OrderItem.selling_price, OrderItem.buying_price,
+            OrderItem.subtotal, OrderItem.is_manual_entry,
+        ).yield_per(1000)
+        header = ['Order #', 'Date', 'Customer', 'Order Status', 'Product', 'Qty', 'Unit Price',
+                  'Buying Price', 'Subtotal', 'Manual']
+        return stream_csv('order_items.csv', header, rows)
+    rows = query.with_entities(
+        Order.order_number, Order.order_date, Order.customer_name, Order.phone, Order.email,
+        Order.total_amount, Order.discount, Order.tax, Order.grand_total, Order.payment_method,
+        Order.payment_status, Order.order_status, Order.delivery_status, Order.created_at,
+    ).yield_per(1000)
+    header = ['Order #', 'Date', 'Customer', 'Phone', 'Email', 'Subtotal', 'Discount', 'Tax', 'Total',
+              'Payment Method', 'Payment Status', 'Order Status', 'Delivery Status', 'Created']
+    return stream_csv('orders.csv', header, rows)
 
 
 @orders_bp.route('/add', methods=['GET', 'POST'])
@@ -80,130 +149,34 @@ def add():
 @orders_bp.route('/<order_id>')
 @login_required
 def detail(order_id):
-    order = Order.query.get_or_404(order_id)
+    order = OrderService.get_order_with_items(order_id)
     return render_template('orders/detail.html', order=order)
 
 
 @orders_bp.route('/<order_id>/invoice')
 @login_required
 def invoice(order_id):
-    order = Order.query.get_or_404(order_id)
+    order = OrderService.get_order_with_items(order_id)
     return render_template('orders/invoice.html', order=order)
 
 
-class _LineFlowable(Flowable):
-    """Draws a horizontal line at full width; aligns with frame left edge."""
-    def __init__(self, width_pt, height_pt=2):
-        self.width_pt = width_pt
-        self.height_pt = height_pt
-
-    def wrap(self, aW, aH):
-        return (self.width_pt, self.height_pt)
-
-    def drawOn(self, canv, x, y, _sW=0):
-        canv.setStrokeColor(colors.HexColor('#cccccc'))
-        canv.setLineWidth(0.5)
-        canv.line(x, y - self.height_pt, x + self.width_pt, y - self.height_pt)
-
-
-def _hline(width_pt):
-    """Thin horizontal line (grey), full frame width."""
-    t = Table([['']], colWidths=[width_pt], rowHeights=[2])
-    t.setStyle(TableStyle([
-        ('LINEBELOW', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-    ]))
-    return t
-
-
 def _build_order_invoice_pdf(order):
     """Build invoice PDF in same format as quotation (header, layout, full-width tables); returns bytes."""
     buffer = BytesIO()
-    margin = 50
-    pw_pt, ph_pt = letter[0], letter[1]
-    frame_width = pw_pt - 2 * margin
-    frame_height = ph_pt - 2 * margin
-    frame = Frame(
-        margin, margin, frame_width, frame_height,
-        id='normal',
-        leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0,
-    )
-    doc = BaseDocTemplate(
-        buffer, pagesize=letter,
-        leftMargin=margin, rightMargin=margin, topMargin=margin, bottomMargin=margin,
-    )
-    doc.addPageTemplates([PageTemplate(id='First', frames=[frame]), PageTemplate(id='Later', frames=[frame])])
-    register_pdf_fonts(current_app.static_folder)
-    fonts = get_pdf_fonts()
-    styles = getSampleStyleSheet()
-    black = colors.black
-    grey = colors.HexColor('#555555')
-
-    title_style = ParagraphStyle(
-        'DocTitle', parent=styles['Heading1'],
-        fontSize=20, spaceAfter=2, textColor=black, fontName=fonts['bold'], leftIndent=0, firstLineIndent=0,
-    )
-    small_style = ParagraphStyle(
-        'Small', parent=styles['Normal'], fontSize=10, textColor=grey, spaceAfter=0, leftIndent=0, firstLineIndent=0,
-        rightIndent=0, bulletIndent=0, fontName=fonts['regular'],
-    )
-    body_style = ParagraphStyle(
-        'Body', parent=styles['Normal'], fontSize=11, textColor=black, spaceAfter=2, leftIndent=0, firstLineIndent=0,
-        fontName=fonts['regular'],
-    )
-    terms_style = ParagraphStyle(
-        'Terms', parent=styles['Normal'], fontSize=10, textColor=black, spaceAfter=2, leftIndent=0, firstLineIndent=0,
-        fontName=fonts['regular'],
-    )
-    story = []
-
-    # ----- Header: same as quotation (logo.png at half size + address) -----
+    doc, frame_width = page_template(buffer, letter)
     static_dir = current_app.static_folder
-    logo_path = os.path.join(static_dir, 'logo.png')
-    if os.path.isfile(logo_path):
-        try:
-            ir = ImageReader(logo_path)
-            pw, ph = ir.getSize()
-            if pw and ph:
-                max_w_pt = frame_width
-                max_h_pt = 1.4 * inch
-                scale = min(max_w_pt / pw, max_h_pt / ph, 1.0)
-                logo_img = Image(logo_path, width=pw * scale * 0.5, height=ph * scale * 0.5)
-            else:
-                logo_img = Image(logo_path, width=frame_width * 0.5, height=0.7 * inch)
-            logo_img.hAlign = 'LEFT'
-            story.append(logo_img)
-        except Exception:
-            pass
-    story.append(Spacer(1, 0.15 * inch))
-    addr_style = ParagraphStyle(
-        'Addr', parent=styles['Normal'], fontSize=10, textColor=colors.HexColor('#555555'),
-        leftIndent=0, spaceAfter=0, spaceBefore=2, fontName=fonts['regular'],
-    )
-    story.append(Paragraph('Tel: 0725799182 | Gikomba, Kombo Munyiri Rd.', addr_style))
-    story.append(Spacer(1, 0.2 * inch))
-    story.append(_hline(frame_width))
-    story.append(Spacer(1, 0.15 * inch))
-
-    # ----- INVOICE title -----
-    story.append(Paragraph('INVOICE', title_style))
-    story.append(_hline(frame_width))
-    story.append(Spacer(1, 0.12 * inch))
+    styles = get_styles(static_dir)
+    fonts = get_pdf_fonts()
+    small_style = styles['small']
+    body_style = styles['body']
+    terms_style = styles['terms']
+    story = document_header(static_dir, frame_width, 'INVOICE')
 
     # ----- Invoice No (left) Date (right) -----
     order_date = order.order_date.strftime('%d/%m/%Y') if order.order_date else '—'
-    ref_table = Table([
-        [Paragraph('Invoice No: <b>{}</b>'.format(order.order_number), small_style),
-         Paragraph('Date: <b>{}</b>'.format(order_date), ParagraphStyle('SmallRight', parent=small_style, alignment=2))]
-    ], colWidths=[frame_width - 2.5 * inch, 2.5 * inch])
-    ref_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-        ('LEFTPADDING', (0, 0), (0, 0), 0),
-        ('RIGHTPADDING', (0, 0), (0, 0), 0),
-    ]))
-    story.append(ref_table)
+    story.append(ref_row(
+        'Invoice No: <b>{}</b>'.format(order.order_number), 'Date: <b>{}</b>'.format(order_date), frame_width, styles,
+    ))
     story.append(Spacer(1, 0.25 * inch))
 
     # ----- Customer -----
@@ -214,7 +187,7 @@ def _build_order_invoice_pdf(order):
     if order.email:
         story.append(Paragraph('Email: {}'.format(order.email), small_style))
     story.append(Spacer(1, 0.15 * inch))
-    story.append(_hline(frame_width))
+    story.append(hline(frame_width))
     story.append(Spacer(1, 0.2 * inch))
 
     # ----- Items table: Item/Description | Qty | Unit Price | Amount (full frame width, same as quotation) -----
@@ -247,7 +220,7 @@ def _build_order_invoice_pdf(order):
     ]))
     story.append(t)
     story.append(Spacer(1, 0.08 * inch))
-    story.append(_hline(frame_width))
+    story.append(hline(frame_width))
 
     total = float(order.total_amount or 0)
     discount = float(order.discount or 0)
@@ -302,7 +275,7 @@ def _build_order_invoice_pdf(order):
     if order.notes:
         story.append(Paragraph('<b>Notes:</b> ' + order.notes.replace('\n', ', '), terms_style))
     story.append(Spacer(1, 0.2 * inch))
-    story.append(_hline(frame_width))
+    story.append(hline(frame_width))
     story.append(Spacer(1, 0.25 * inch))
 
     # ----- Authorised Signature -----
@@ -338,94 +311,22 @@ def _build_order_invoice_pdf(order):
 def _build_receipt_pdf_a4(order):
     """Build payment receipt PDF in A4 format; same layout as invoice (header, table, styles) with receipt features."""
     from datetime import datetime
-    register_pdf_fonts(current_app.static_folder)
-    fonts = get_pdf_fonts()
     buffer = BytesIO()
-    margin = 50
-    pw_pt, ph_pt = A4[0], A4[1]
-    frame_width = pw_pt - 2 * margin
-    frame_height = ph_pt - 2 * margin
-    frame = Frame(
-        margin, margin, frame_width, frame_height,
-        id='normal',
-        leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0,
-    )
-    doc = BaseDocTemplate(
-        buffer, pagesize=A4,
-        leftMargin=margin, rightMargin=margin, topMargin=margin, bottomMargin=margin,
-    )
-    doc.addPageTemplates([PageTemplate(id='First', frames=[frame]), PageTemplate(id='Later', frames=[frame])])
-    styles = getSampleStyleSheet()
-    black = colors.black
-    grey = colors.HexColor('#555555')
-
-    title_style = ParagraphStyle(
-        'DocTitle', parent=styles['Heading1'],
-        fontSize=20, spaceAfter=2, textColor=black, fontName=fonts['bold'], leftIndent=0, firstLineIndent=0,
-    )
-    small_style = ParagraphStyle(
-        'Small', parent=styles['Normal'], fontSize=10, textColor=grey, spaceAfter=0, leftIndent=0, firstLineIndent=0,
-        rightIndent=0, bulletIndent=0, fontName=fonts['regular'],
-    )
-    body_style = ParagraphStyle(
-        'Body', parent=styles['Normal'], fontSize=11, textColor=black, spaceAfter=2, leftIndent=0, firstLineIndent=0,
-        fontName=fonts['regular'],
-    )
-    center_style = ParagraphStyle(
-        'Center', parent=styles['Normal'], fontSize=11, alignment=1, spaceAfter=4, textColor=black,
-        fontName=fonts['regular'],
-    )
-    center_bold = ParagraphStyle(
-        'CenterBold', parent=styles['Normal'], fontSize=12, alignment=1, fontName=fonts['bold'], spaceAfter=4, textColor=black,
-    )
-    story = []
-
-    # ----- Header: same as invoice (logo.png at half size + address) -----
+    doc, frame_width = page_template(buffer, A4)
     static_dir = current_app.static_folder
-    logo_path = os.path.join(static_dir, 'logo.png')
-    if os.path.isfile(logo_path):
-        try:
-            ir = ImageReader(logo_path)
-            pw, ph = ir.getSize()
-            if pw and ph:
-                max_w_pt = frame_width
-                max_h_pt = 1.4 * inch
-                scale = min(max_w_pt / pw, max_h_pt / ph, 1.0)
-                logo_img = Image(logo_path, width=pw * scale * 0.5, height=ph * scale * 0.5)
-            else:
-                logo_img = Image(logo_path, width=frame_width * 0.5, height=0.7 * inch)
-            logo_img.hAlign = 'LEFT'
-            story.append(logo_img)
-        except Exception:
-            pass
-    story.append(Spacer(1, 0.15 * inch))
-    addr_style = ParagraphStyle(
-        'Addr', parent=styles['Normal'], fontSize=10, textColor=colors.HexColor('#555555'),
-        leftIndent=0, spaceAfter=0, spaceBefore=2, fontName=fonts['regular'],
-    )
-    story.append(Paragraph('Tel: 0725799182 | Gikomba, Kombo Munyiri Rd.', addr_style))
-    story.append(Spacer(1, 0.2 * inch))
-    story.append(_hline(frame_width))
-    story.append(Spacer(1, 0.15 * inch))
-
-    # ----- RECEIPT title -----
-    story.append(Paragraph('RECEIPT', title_style))
-    story.append(_hline(frame_width))
-    story.append(Spacer(1, 0.12 * inch))
+    styles = get_styles(static_dir)
+    fonts = get_pdf_fonts()
+    small_style = styles['small']
+    body_style = styles['body']
+    center_style = styles['center']
+    center_bold = styles['center_bold']
+    story = document_header(static_dir, frame_width, 'RECEIPT')
 
     # ----- Receipt No (left) Date (right) -----
     receipt_date = datetime.utcnow().strftime('%d/%m/%Y')
-    ref_table = Table([
-        [Paragraph('Receipt No: <b>{}</b>'.format(order.order_number), small_style),
-         Paragraph('Date: <b>{}</b>'.format(receipt_date), ParagraphStyle('SmallRight', parent=small_style, alignment=2))]
-    ], colWidths=[frame_width - 2.5 * inch, 2.5 * inch])
-    ref_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-        ('LEFTPADDING', (0, 0), (0, 0), 0),
-        ('RIGHTPADDING', (0, 0), (0, 0), 0),
-    ]))
-    story.append(ref_table)
+    story.append(ref_row(
+        'Receipt No: <b>{}</b>'.format(order.order_number), 'Date: <b>{}</b>'.format(receipt_date), frame_width, styles,
+    ))
     story.append(Spacer(1, 0.25 * inch))
 
     # ----- Customer (same as invoice) -----
@@ -436,7 +337,7 @@ def _build_receipt_pdf_a4(order):
     if order.email:
         story.append(Paragraph('Email: {}'.format(order.email), small_style))
     story.append(Spacer(1, 0.15 * inch))
-    story.append(_hline(frame_width))
+    story.append(hline(frame_width))
     story.append(Spacer(1, 0.2 * inch))
 
     # ----- Items table: same columns as invoice -----
@@ -472,7 +373,7 @@ def _build_receipt_pdf_a4(order):
     ]))
     story.append(t)
     story.append(Spacer(1, 0.08 * inch))
-    story.append(_hline(frame_width))
+    story.append(hline(frame_width))
 
     # ----- Total row (same column alignment as invoice Subtotal/Total Amount) -----
     grand = float(order.grand_total or 0)
@@ -486,7 +387,7 @@ def _build_receipt_pdf_a4(order):
     ]))
     story.append(total_row)
     story.append(Spacer(1, 0.25 * inch))
-    story.append(_hline(frame_width))
+    story.append(hline(frame_width))
     story.append(Spacer(1, 0.15 * inch))
 
     # ----- Receipt features: Payment, thank you, disclaimer, signature -----
@@ -495,7 +396,7 @@ def _build_receipt_pdf_a4(order):
     story.append(Paragraph('Thank you for your business', center_bold))
     story.append(Paragraph('Goods once sold are not refundable', center_style))
     story.append(Spacer(1, 0.2 * inch))
-    story.append(_hline(frame_width))
+    story.append(hline(frame_width))
     story.append(Spacer(1, 0.12 * inch))
     story.append(Paragraph('Authorised Signature / Stamp', center_style))
 
@@ -507,7 +408,7 @@ def _build_receipt_pdf_a4(order):
 def _build_receipt_pdf_thermal(order):
     """Build payment receipt PDF for thermal printer (80mm width); format matches receipt template."""
     from datetime import datetime
-    register_pdf_fonts(current_app.static_folder)
+    styles = get_styles(current_app.static_folder)
     fonts = get_pdf_fonts()
     thermal_width = 80 * mm
     thermal_height = 842
@@ -517,53 +418,15 @@ def _build_receipt_pdf_thermal(order):
         buffer, pagesize=(thermal_width, thermal_height),
         rightMargin=12, leftMargin=12, topMargin=14, bottomMargin=14,
     )
-    styles = getSampleStyleSheet()
-    center_style = ParagraphStyle(
-        'Center', parent=styles['Normal'], fontSize=10, alignment=1, spaceAfter=2, fontName=fonts['regular'],
-    )
-    center_bold = ParagraphStyle(
-        'CenterBold', parent=styles['Normal'], fontSize=11, alignment=1, fontName=fonts['bold'], spaceAfter=2,
-    )
-    left_style = ParagraphStyle(
-        'Left', parent=styles['Normal'], fontSize=9, alignment=0, spaceAfter=1,
-        leftIndent=0, firstLineIndent=0, fontName=fonts['regular'],
-    )
-    left_bold = ParagraphStyle(
-        'LeftBold', parent=styles['Normal'], fontSize=9, alignment=0, fontName=fonts['bold'], spaceAfter=1,
-        leftIndent=0, firstLineIndent=0,
-    )
-    right_bold = ParagraphStyle(
-        'RightBold', parent=styles['Normal'], fontSize=9, alignment=2, fontName=fonts['bold'], spaceAfter=1,
-    )
-    line_style = ParagraphStyle(
-        'Line', parent=styles['Normal'], fontSize=9, alignment=1, spaceAfter=2, fontName=fonts['regular'],
-    )
-    story = []
+    center_style = styles['thermal_center']
+    center_bold = styles['thermal_center_bold']
+    left_style = styles['thermal_left']
+    left_bold = styles['thermal_left_bold']
+    right_bold = styles['thermal_right_bold']
+    line_style = styles['thermal_line']
 
     # Logo (logo.png – same as invoice) + address below
-    logo_path = os.path.join(current_app.static_folder, 'logo.png')
-    if os.path.isfile(logo_path):
-        try:
-            ir = ImageReader(logo_path)
-            pw, ph = ir.getSize()
-            if pw and ph:
-                max_w_pt = content_width
-                max_h_pt = 0.5 * inch
-                scale = min(max_w_pt / pw, max_h_pt / ph, 1.0)
-                img = Image(logo_path, width=pw * scale, height=ph * scale)
-            else:
-                img = Image(logo_path, width=content_width, height=0.5 * inch)
-            story.append(img)
-        except Exception:
-            pass
-    story.append(Spacer(1, 0.06 * inch))
-    addr_style = ParagraphStyle(
-        'AddrThermal', parent=styles['Normal'], fontSize=7, textColor=colors.HexColor('#555555'),
-        alignment=1, leftIndent=0, spaceAfter=0, spaceBefore=0, fontName=fonts['regular'],
-    )
-    story.append(Paragraph('Tel: 0725799182 | Gikomba, Kombo Munyiri Rd.', addr_style))
-    story.append(Spacer(1, 0.06 * inch))
-
+    story = thermal_header(current_app.static_folder, content_width)
     story.append(Paragraph('—' * 20, line_style))
 
     # Receipt No (left) and Date (right) on one line
@@ -639,7 +502,7 @@ def _build_receipt_pdf_thermal(order):
 @login_required
 def pdf(order_id):
     order = Order.query.get_or_404(order_id)
-    pdf_bytes = _build_order_invoice_pdf(order)
+    pdf_bytes = cached_pdf('invoice', order, lambda: _build_order_invoice_pdf(order))
     safe_number = "".join(c for c in order.order_number if c.isalnum() or c in '-_')
     view_inline = request.args.get('view') == '1'
     return send_file(
@@ -658,10 +521,12 @@ def receipt(order_id):
         flash('Payment receipt is only available for paid or partially paid orders.', 'warning')
         return redirect(url_for('orders.detail', order_id=order.id))
     fmt = request.args.get('format', 'a4').lower()
+    # Receipts print today's date, so it is part of the cache variant.
+    variant = '{}:{}'.format('thermal' if fmt == 'thermal' else 'a4', datetime.utcnow().date().isoformat())
     if fmt == 'thermal':
-        pdf_bytes = _build_receipt_pdf_thermal(order)
+        pdf_bytes = cached_pdf('receipt', order, lambda: _build_receipt_pdf_thermal(order), variant)
     else:
-        pdf_bytes = _build_receipt_pdf_a4(order)
+        pdf_bytes = cached_pdf('receipt', order, lambda: _build_receipt_pdf_a4(order), variant)
     safe_number = "".join(c for c in order.order_number if c.isalnum() or c in '-_')
     download_name = f'Receipt_{safe_number}_thermal.pdf' if fmt == 'thermal' else f'Receipt_{safe_number}.pdf'
     view_inline = request.args.get('view') == '1'
@@ -677,7 +542,7 @@ def receipt(order_id):
 @login_required
 @role_required('admin', 'manager', 'sales')
 def edit(order_id):
-    order = Order.query.get_or_404(order_id)
+    order = OrderService.get_order_with_items(order_id)
     # Only admin and manager may edit completed orders; sales cannot
     role = (current_user.role or '').strip().lower()
     if (order.order_status or '').strip().lower() == 'completed' and role not in ('admin', 'manager'):
@@ -696,6 +561,7 @@ def edit(order_id):
         order.order_status = form.order_status.data
         order.notes = form.notes.data
         db.session.commit()
+        RollupService.refresh_day(order.order_date)
         details = 'Order {} updated'.format(order.order_number)
         if was_completed:
             details += ' (completed order edited by {})'.format(current_user.role)
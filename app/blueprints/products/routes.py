@@ -1,12 +1,19 @@
 """Product routes."""
-from flask import render_template, redirect, url_for, flash, request, jsonify
+import gzip
+import json
+
+from flask import current_app, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 
 from app import db
 from app.blueprints.products import products_bp
-from app.decorators import role_required
+from app.decorators import role_required, read_replica
+from app.cache import cache
+from app.exports import stream_csv
+from app.pagination import keyset_paginate
 from app.forms import ProductForm, ProductStockForm
 from app.models import Product, Category
+from app.search import LIST_LIMIT, RESULT_FIELDS, get_search, search_results
 from app.services import ProductService
 from app.services.audit_service import AuditService
 
@@ -17,26 +24,33 @@ def _category_choices():
 
 @products_bp.route('/')
 @login_required
+@read_replica
 def list():
-    page = request.args.get('page', 1, type=int)
     search = request.args.get('q', '').strip()
     category_id = request.args.get('category', '').strip()
     stock_filter = request.args.get('stock', '')
     query = Product.query.filter_by(is_active=True)
-    if search:
-        query = query.filter(
-            db.or_(
-                Product.name.ilike(f'%{search}%'),
-                Product.sku.ilike(f'%{search}%'),
-            )
-        )
+    order = Product.name
     if category_id:
         query = query.filter(Product.category_id == category_id)
     if stock_filter == 'low':
         query = query.filter(Product.min_stock_level > 0, Product.stock_quantity <= Product.min_stock_level)
     elif stock_filter == 'out':
         query = query.filter(Product.stock_quantity <= 0)
-    products = query.order_by(Product.name).paginate(page=page, per_page=20)
+    if search:
+        # The filters go into the search, so LIST_LIMIT counts only matches that pass them.
+        ids = get_search().search(search, limit=LIST_LIMIT, query=query)
+        query = query.filter(Product.id.in_(ids))
+        if ids:
+            order = db.case({product_id: rank for rank, product_id in enumerate(ids)}, value=Product.id)
+    if request.args.get('format') == 'csv':
+        rows = query.outerjoin(Category, Category.id == Product.category_id).order_by(Product.name, Product.id).with_entities(
+            Product.name, Product.sku, Category.name, Product.buying_price, Product.selling_price,
+            Product.stock_quantity, Product.min_stock_level,
+        ).yield_per(1000)
+        header = ['Product', 'SKU', 'Category', 'Buying Price', 'Selling Price', 'Stock', 'Min Level']
+        return stream_csv('products.csv', header, rows)
+    products = keyset_paginate(query, [order, Product.id], request.args.get('cursor'))
     categories = Category.query.order_by(Category.name).all()
     return render_template(
         'products/list.html',
@@ -134,24 +148,56 @@ def delete(product_id):
 @login_required
 def api_search():
     q = request.args.get('q', '')
-    if len(q) < 2:
+    if len(q.strip()) < 2:
         return jsonify([])
-    products = Product.query.filter(
-        Product.is_active == True,
-        db.or_(
-            Product.name.ilike(f'%{q}%'),
-            Product.sku.ilike(f'%{q}%'),
-        ),
-    ).limit(15).all()
-    return jsonify([
-        {
-            'id': p.id,
-            'name': p.name,
-            'sku': p.sku or '',
-            'selling_price': str(p.selling_price) if p.selling_price is not None else '0',
-            'stock_quantity': p.stock_quantity,
-        }
-    for p in products])
+    fields = [f for f in request.args.get('fields', '').split(',') if f in RESULT_FIELDS] or RESULT_FIELDS
+    body, etag = search_results(q, fields=tuple(fields))
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config.get('SEARCH_CACHE_TTL', 10)
+    return response.make_conditional(request)
+
+
+def _catalogue_response(body, etag):
+    """JSON response, gzipped when the client accepts it; revalidated on every use (ETag)."""
+    response = current_app.response_class(mimetype='application/json')
+    if 'gzip' in request.accept_encodings:
+        response.set_data(gzip.compress(body, 6))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response.set_data(body)
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@products_bp.route('/api/catalogue')
+@login_required
+def api_catalogue():
+    """All active products as compact rows (see ProductService.catalogue_snapshot), for searching in the browser."""
+    generation = ProductService.catalogue_generation()
+    etag = f'catalogue-{generation}'
+    if request.if_none_match.contains_weak(etag):
+        return _catalogue_response(b'', etag)
+    body = cache.get_or_set(
+        f'catalogue:{generation}', 300,
+        lambda: json.dumps(ProductService.catalogue_snapshot(), separators=(',', ':')).encode('utf-8'),
+    )
+    return _catalogue_response(body, etag)
+
+
+@products_bp.route('/api/catalogue/changes')
+@login_required
+def api_catalogue_changes():
+    """Products changed since ?since=<version> (upsert products, drop removed ids)."""
+    since = request.args.get('since', 0, type=int)
+    generation = ProductService.catalogue_generation()
+    changes = ProductService.catalogue_changes(since)
+    body = json.dumps(changes, separators=(',', ':')).encode('utf-8')
+    return _catalogue_response(body, f'catalogue-{since}-{generation}')
 
 
 @products_bp.route('/<product_id>/sales-history')
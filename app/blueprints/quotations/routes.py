@@ -1,35 +1,47 @@
 """Quotation routes."""
-import os
+from datetime import datetime
 from io import BytesIO
 
 from flask import render_template, redirect, url_for, flash, request, send_file, current_app
 from flask_login import login_required, current_user
-from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.lib.utils import ImageReader
-from reportlab.platypus import BaseDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageTemplate, Frame, Flowable
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
 import json
 
 from app import db
 from app.blueprints.quotations import quotations_bp
-from app.decorators import role_required
-from app.pdf_fonts import register_pdf_fonts, get_pdf_fonts
+from app.decorators import role_required, read_replica
+from app.exports import stream_csv
+from app.pagination import keyset_paginate
+from app.pdf_cache import cached_pdf
+from app.pdf_fonts import get_pdf_fonts
+from app.pdf_toolkit import document_header, get_styles, hline, page_template, ref_row
 from app.forms import QuotationForm
-from app.models import Quotation, Setting
+from app.models import Quotation
 from app.services import QuotationService
 
 
 @quotations_bp.route('/')
 @login_required
+@read_replica
 def list():
-    page = request.args.get('page', 1, type=int)
     status = request.args.get('status', '')
     query = Quotation.query
     if status:
         query = query.filter(Quotation.status == status)
-    quotations = query.order_by(Quotation.created_at.desc()).paginate(page=page, per_page=20)
+    if request.args.get('format') == 'csv':
+        rows = query.order_by(Quotation.created_at.desc(), Quotation.id).with_entities(
+            Quotation.quotation_number, Quotation.customer_name, Quotation.phone, Quotation.email,
+            Quotation.valid_until, Quotation.total_amount, Quotation.discount, Quotation.tax,
+            Quotation.grand_total, Quotation.status, Quotation.created_at,
+        ).yield_per(1000)
+        header = ['Quotation #', 'Customer', 'Phone', 'Email', 'Valid Until', 'Subtotal', 'Discount', 'Tax',
+                  'Total', 'Status', 'Created']
+        return stream_csv('quotations.csv', header, rows)
+    quotations = keyset_paginate(
+        query, [Quotation.created_at, Quotation.id], request.args.get('cursor'), descending=True,
+    )
     return render_template('quotations/list.html', quotations=quotations, status=status)
 
 
@@ -80,138 +92,29 @@ def add():
 @quotations_bp.route('/<quotation_id>')
 @login_required
 def detail(quotation_id):
-    quotation = Quotation.query.get_or_404(quotation_id)
+    quotation = QuotationService.get_quotation_with_items(quotation_id)
     return render_template('quotations/detail.html', quotation=quotation)
 
 
-class _LineFlowable(Flowable):
-    """Draws a horizontal line at full width; no table so it aligns with frame left edge."""
-    def __init__(self, width_pt, height_pt=2):
-        self.width_pt = width_pt
-        self.height_pt = height_pt
-
-    def wrap(self, aW, aH):
-        return (self.width_pt, self.height_pt)
-
-    def drawOn(self, canv, x, y, _sW=0):
-        canv.setStrokeColor(colors.HexColor('#cccccc'))
-        canv.setLineWidth(0.5)
-        # draw at bottom of flowable box so it sits under the content above
-        canv.line(x, y - self.height_pt, x + self.width_pt, y - self.height_pt)
-
-
-def _hline(width_pt=512):
-    """Thin horizontal line (grey). Use _LineFlowable for header block so it aligns; Table elsewhere."""
-    t = Table([['']], colWidths=[width_pt], rowHeights=[2])
-    t.setStyle(TableStyle([
-        ('LINEBELOW', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-    ]))
-    return t
-
-
 def _build_quotation_pdf(quotation):
     """Build quotation PDF in clean document format (logo, company header, customer, table, terms, acceptance)."""
     buffer = BytesIO()
-    margin = 50
-    pw_pt, ph_pt = letter[0], letter[1]
-    frame_width = pw_pt - 2 * margin
-    frame_height = ph_pt - 2 * margin
-    frame = Frame(
-        margin, margin, frame_width, frame_height,
-        id='normal',
-        leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0,
-    )
-    doc = BaseDocTemplate(
-        buffer, pagesize=letter,
-        leftMargin=margin, rightMargin=margin, topMargin=margin, bottomMargin=margin,
-    )
-    doc.addPageTemplates([PageTemplate(id='First', frames=[frame]), PageTemplate(id='Later', frames=[frame])])
-    register_pdf_fonts(current_app.static_folder)
-    fonts = get_pdf_fonts()
-    styles = getSampleStyleSheet()
-    black = colors.black
-    grey = colors.HexColor('#555555')
-    grey_light = colors.HexColor('#888888')
-
-    company_name = Setting.get('company_name', '') or 'Company Name'
-    company_phone = Setting.get('company_phone', '') or ''
-    company_address = Setting.get('company_address', '') or ''
-    contact_parts = []
-    if company_phone:
-        contact_parts.append('Tel: {}'.format(company_phone))
-    if company_address:
-        contact_parts.append(company_address.strip().replace('\n', ', '))
-    contact_line = ' | '.join(contact_parts) if contact_parts else ''
-
-    title_style = ParagraphStyle(
-        'DocTitle', parent=styles['Heading1'],
-        fontSize=20, spaceAfter=2, textColor=black, fontName=fonts['bold'], leftIndent=0, firstLineIndent=0,
-    )
-    small_style = ParagraphStyle(
-        'Small', parent=styles['Normal'], fontSize=10, textColor=grey, spaceAfter=0, leftIndent=0, firstLineIndent=0,
-        rightIndent=0, bulletIndent=0, fontName=fonts['regular'],
-    )
-    body_style = ParagraphStyle(
-        'Body', parent=styles['Normal'], fontSize=11, textColor=black, spaceAfter=2, leftIndent=0, firstLineIndent=0,
-        fontName=fonts['regular'],
-    )
-    terms_style = ParagraphStyle(
-        'Terms', parent=styles['Normal'], fontSize=10, textColor=black, spaceAfter=2, leftIndent=0, firstLineIndent=0,
-        fontName=fonts['regular'],
-    )
-    story = []
-
-    # ----- Header: logo.png (complete logo image) -----
+    doc, frame_width = page_template(buffer, letter)
     static_dir = current_app.static_folder
-    logo_path = os.path.join(static_dir, 'logo.png')
-    if os.path.isfile(logo_path):
-        try:
-            ir = ImageReader(logo_path)
-            pw, ph = ir.getSize()
-            if pw and ph:
-                max_w_pt = frame_width
-                max_h_pt = 1.4 * inch
-                scale = min(max_w_pt / pw, max_h_pt / ph, 1.0)
-                # Logo at half size (reduce by 2x)
-                logo_img = Image(logo_path, width=pw * scale * 0.5, height=ph * scale * 0.5)
-            else:
-                logo_img = Image(logo_path, width=frame_width * 0.5, height=0.7 * inch)
-            logo_img.hAlign = 'LEFT'
-            story.append(logo_img)
-        except Exception:
-            pass
-    # Address below logo (space between logo and address)
-    story.append(Spacer(1, 0.15 * inch))
-    addr_style = ParagraphStyle(
-        'Addr', parent=styles['Normal'], fontSize=10, textColor=colors.HexColor('#555555'),
-        leftIndent=0, spaceAfter=0, spaceBefore=2, fontName=fonts['regular'],
-    )
-    story.append(Paragraph('Tel: 0725799182 | Gikomba, Kombo Munyiri Rd.', addr_style))
-    story.append(Spacer(1, 0.2 * inch))
-    story.append(_hline(frame_width))
-    story.append(Spacer(1, 0.15 * inch))
-
-    # ----- QUOTATION title -----
-    story.append(Paragraph('QUOTATION', title_style))
-    story.append(_hline())
-    story.append(Spacer(1, 0.12 * inch))
+    styles = get_styles(static_dir)
+    fonts = get_pdf_fonts()
+    small_style = styles['small']
+    body_style = styles['body']
+    terms_style = styles['terms']
+    story = document_header(static_dir, frame_width, 'QUOTATION')
 
     # ----- Quotation No (left) Date (right) -----
     created = quotation.created_at.strftime('%d/%m/%Y') if quotation.created_at else '—'
-    # Full frame width (like header _hline) so table starts at document left margin
-    ref_table = Table([
-        [Paragraph('Quotation No: <b>{}</b>'.format(quotation.quotation_number), small_style),
-         Paragraph('Date: <b>{}</b>'.format(created), ParagraphStyle('SmallRight', parent=small_style, alignment=2))]
-    ], colWidths=[frame_width - 2.5 * inch, 2.5 * inch])
-    ref_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-        ('LEFTPADDING', (0, 0), (0, 0), 0),
-        ('RIGHTPADDING', (0, 0), (0, 0), 0),
-    ]))
-    story.append(ref_table)
+    # Full frame width (like header hline) so table starts at document left margin
+    story.append(ref_row(
+        'Quotation No: <b>{}</b>'.format(quotation.quotation_number), 'Date: <b>{}</b>'.format(created),
+        frame_width, styles,
+    ))
     story.append(Spacer(1, 0.25 * inch))
 
     # ----- Customer -----
@@ -220,7 +123,7 @@ def _build_quotation_pdf(quotation):
     if quotation.phone:
         story.append(Paragraph('Tel: {}'.format(quotation.phone), small_style))
     story.append(Spacer(1, 0.15 * inch))
-    story.append(_hline())
+    story.append(hline(frame_width))
     story.append(Spacer(1, 0.2 * inch))
 
     # ----- Items table: Item/Description | Qty | Unit Price | Amount (full frame width like header) -----
@@ -252,7 +155,7 @@ def _build_quotation_pdf(quotation):
     ]))
     story.append(t)
     story.append(Spacer(1, 0.08 * inch))
-    story.append(_hline())
+    story.append(hline(frame_width))
 
     total = float(quotation.total_amount or 0)
     discount = float(quotation.discount or 0)
@@ -311,7 +214,7 @@ def _build_quotation_pdf(quotation):
     for term in terms_list:
         story.append(Paragraph('• ' + term, terms_style))
     story.append(Spacer(1, 0.2 * inch))
-    story.append(_hline())
+    story.append(hline(frame_width))
     story.append(Spacer(1, 0.25 * inch))
 
     # ----- Accepted by: Name, Signature, Date -----
@@ -348,7 +251,7 @@ def _build_quotation_pdf(quotation):
 @login_required
 def pdf(quotation_id):
     quotation = Quotation.query.get_or_404(quotation_id)
-    pdf_bytes = _build_quotation_pdf(quotation)
+    pdf_bytes = cached_pdf('quotation', quotation, lambda: _build_quotation_pdf(quotation))
     safe_number = "".join(c for c in quotation.quotation_number if c.isalnum() or c in '-_')
     view_inline = request.args.get('view') == '1'
     return send_file(
@@ -363,7 +266,7 @@ def pdf(quotation_id):
 @login_required
 @role_required('admin', 'manager', 'sales')
 def edit(quotation_id):
-    quotation = Quotation.query.get_or_404(quotation_id)
+    quotation = QuotationService.get_quotation_with_items(quotation_id)
     form = QuotationForm(obj=quotation)
     if form.validate_on_submit():
         items_json = request.form.get('items_json', '[]')
@@ -385,6 +288,8 @@ def edit(quotation_id):
             QuotationService.update_quotation_items(
                 quotation, items_data, discount=float(discount_val), tax_percent=float(tax_val)
             )
+            # Items live in another table; bump updated_at so cached PDFs are re-rendered.
+            quotation.updated_at = datetime.utcnow()
             db.session.commit()
             flash('Quotation updated.', 'success')
             return redirect(url_for('quotations.detail', quotation_id=quotation.id))
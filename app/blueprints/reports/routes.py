@@ -1,127 +1,47 @@
 """Report routes."""
-import os
 from datetime import datetime, timedelta
 from decimal import Decimal
 from io import BytesIO
 
-from flask import render_template, request, send_file, flash, redirect, url_for, current_app
+from flask import render_template, request, send_file, flash, redirect, url_for, current_app, jsonify, abort
 from flask_login import login_required
-from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.lib.utils import ImageReader
-from reportlab.platypus import (
-    BaseDocTemplate, Paragraph, Spacer, Table, TableStyle, Image,
-    PageTemplate, Frame,
-)
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
 from sqlalchemy import func
 
 from app import db
 from app.blueprints.reports import reports_bp
-from app.decorators import reports_required
+from app.decorators import reports_required, read_replica
+from app.exports import stream_csv, stream_xlsx
 from app.forms import ReportFilterForm
-from app.models import Order, OrderItem, Product, Delivery
-from app.pdf_fonts import register_pdf_fonts, get_pdf_fonts
+from app.metrics import PDF_RENDER_DURATION
+from app.models import Order, Product, Delivery, DailyProductSales
+from app.pdf_fonts import get_pdf_fonts
+from app.pdf_jobs import get_pdf_jobs
+from app.pdf_toolkit import document_header, get_styles, hline, page_template, ref_row
 
 
-def _hline(width_pt):
-    """Thin horizontal line (grey), full width."""
-    t = Table([['']], colWidths=[width_pt], rowHeights=[2])
-    t.setStyle(TableStyle([
-        ('LINEBELOW', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-    ]))
-    return t
+REPORT_TITLES = {
+    'sales': 'SALES REPORT',
+    'product_performance': 'PRODUCT PERFORMANCE REPORT',
+    'delivery_performance': 'DELIVERY PERFORMANCE REPORT',
+    'stock': 'STOCK REPORT',
+}
 
 
 def _build_report_pdf(report_type, data, date_from, date_to):
     """Build report PDF with same format as invoice (logo, address, title, tables). Returns bytes."""
     buffer = BytesIO()
-    margin = 50
-    pw_pt, ph_pt = letter[0], letter[1]
-    frame_width = pw_pt - 2 * margin
-    frame_height = ph_pt - 2 * margin
-    frame = Frame(
-        margin, margin, frame_width, frame_height,
-        id='normal',
-        leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0,
-    )
-    doc = BaseDocTemplate(
-        buffer, pagesize=letter,
-        leftMargin=margin, rightMargin=margin, topMargin=margin, bottomMargin=margin,
-    )
-    doc.addPageTemplates([PageTemplate(id='First', frames=[frame]), PageTemplate(id='Later', frames=[frame])])
-    register_pdf_fonts(current_app.static_folder)
-    fonts = get_pdf_fonts()
-    styles = getSampleStyleSheet()
-    black = colors.black
-    grey = colors.HexColor('#555555')
-
-    title_style = ParagraphStyle(
-        'DocTitle', parent=styles['Heading1'],
-        fontSize=20, spaceAfter=2, textColor=black, fontName=fonts['bold'], leftIndent=0, firstLineIndent=0,
-    )
-    small_style = ParagraphStyle(
-        'Small', parent=styles['Normal'], fontSize=10, textColor=grey, spaceAfter=0, leftIndent=0, firstLineIndent=0,
-        rightIndent=0, bulletIndent=0, fontName=fonts['regular'],
-    )
-    body_style = ParagraphStyle(
-        'Body', parent=styles['Normal'], fontSize=11, textColor=black, spaceAfter=2, leftIndent=0, firstLineIndent=0,
-        fontName=fonts['regular'],
-    )
-    story = []
-
-    # ----- Header: same as invoice (logo.png at half size + address) -----
+    doc, frame_width = page_template(buffer, letter)
     static_dir = current_app.static_folder
-    logo_path = os.path.join(static_dir, 'logo.png')
-    if os.path.isfile(logo_path):
-        try:
-            ir = ImageReader(logo_path)
-            pw, ph = ir.getSize()
-            if pw and ph:
-                max_w_pt = frame_width
-                max_h_pt = 1.4 * inch
-                scale = min(max_w_pt / pw, max_h_pt / ph, 1.0)
-                logo_img = Image(logo_path, width=pw * scale * 0.5, height=ph * scale * 0.5)
-            else:
-                logo_img = Image(logo_path, width=frame_width * 0.5, height=0.7 * inch)
-            logo_img.hAlign = 'LEFT'
-            story.append(logo_img)
-        except Exception:
-            pass
-    story.append(Spacer(1, 0.15 * inch))
-    addr_style = ParagraphStyle(
-        'Addr', parent=styles['Normal'], fontSize=10, textColor=colors.HexColor('#555555'),
-        leftIndent=0, spaceAfter=0, spaceBefore=2, fontName=fonts['regular'],
-    )
-    story.append(Paragraph('Tel: 0725799182 | Gikomba, Kombo Munyiri Rd.', addr_style))
-    story.append(Spacer(1, 0.2 * inch))
-    story.append(_hline(frame_width))
-    story.append(Spacer(1, 0.15 * inch))
-
-    # ----- Report title and date range -----
-    titles = {
-        'sales': 'SALES REPORT',
-        'product_performance': 'PRODUCT PERFORMANCE REPORT',
-        'delivery_performance': 'DELIVERY PERFORMANCE REPORT',
-        'stock': 'STOCK REPORT',
-    }
-    story.append(Paragraph(titles.get(report_type, 'REPORT').upper(), title_style))
-    story.append(_hline(frame_width))
-    story.append(Spacer(1, 0.12 * inch))
-    ref_table = Table([
-        [Paragraph('Date From: <b>{}</b>'.format(date_from), small_style),
-         Paragraph('Date To: <b>{}</b>'.format(date_to), ParagraphStyle('SmallRight', parent=small_style, alignment=2))]
-    ], colWidths=[frame_width - 2.5 * inch, 2.5 * inch])
-    ref_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-        ('LEFTPADDING', (0, 0), (0, 0), 0),
-        ('RIGHTPADDING', (0, 0), (0, 0), 0),
-    ]))
-    story.append(ref_table)
+    styles = get_styles(static_dir)
+    fonts = get_pdf_fonts()
+    body_style = styles['body']
+    story = document_header(static_dir, frame_width, REPORT_TITLES.get(report_type, 'REPORT'))
+    story.append(ref_row(
+        'Date From: <b>{}</b>'.format(date_from), 'Date To: <b>{}</b>'.format(date_to), frame_width, styles,
+    ))
     story.append(Spacer(1, 0.2 * inch))
 
     # ----- Report-specific content -----
@@ -129,7 +49,7 @@ def _build_report_pdf(report_type, data, date_from, date_to):
         story.append(Paragraph('Total Revenue: <b>{:,.2f}</b>  |  Orders: <b>{}</b>'.format(
             float(data.get('total_revenue') or 0), data.get('count', 0)), body_style))
         story.append(Spacer(1, 0.1 * inch))
-        story.append(_hline(frame_width))
+        story.append(hline(frame_width))
         story.append(Spacer(1, 0.12 * inch))
         tdata = [['Order #', 'Date', 'Customer', 'Total']]
         for o in data.get('orders') or []:
@@ -183,7 +103,7 @@ def _build_report_pdf(report_type, data, date_from, date_to):
         story.append(Paragraph('Total: <b>{}</b>  |  Delivered: <b>{}</b>  |  Success Rate: <b>{:.1f}%</b>'.format(
             total, delivered, rate), body_style))
         story.append(Spacer(1, 0.1 * inch))
-        story.append(_hline(frame_width))
+        story.append(hline(frame_width))
         story.append(Spacer(1, 0.12 * inch))
         tdata = [['Delivery #', 'Customer', 'Status', 'Date']]
         for d in data.get('deliveries') or []:
@@ -212,7 +132,7 @@ def _build_report_pdf(report_type, data, date_from, date_to):
         out_n = len(data.get('out_of_stock') or [])
         story.append(Paragraph('Low stock: <b>{}</b>  |  Out of stock: <b>{}</b>'.format(low_n, out_n), body_style))
         story.append(Spacer(1, 0.1 * inch))
-        story.append(_hline(frame_width))
+        story.append(hline(frame_width))
         story.append(Spacer(1, 0.12 * inch))
         tdata = [['Product', 'SKU', 'Stock', 'Min Level', 'Status']]
         for p in data.get('products') or []:
@@ -247,6 +167,7 @@ def _build_report_pdf(report_type, data, date_from, date_to):
 @reports_bp.route('/', methods=['GET', 'POST'])
 @login_required
 @reports_required
+@read_replica
 def index():
     form = ReportFilterForm()
     date_from = request.args.get('date_from') or (datetime.utcnow() - timedelta(days=30)).strftime('%Y-%m-%d')
@@ -271,54 +192,160 @@ def index():
         dt = datetime.utcnow().date()
         form.date_from.data = df
         form.date_to.data = dt
-    if report_type == 'sales':
-        data = _sales_report(df, dt)
-        template = 'reports/sales.html'
-    elif report_type == 'product_performance':
-        data = _product_performance_report(df, dt)
-        template = 'reports/product_performance.html'
-    elif report_type == 'delivery_performance':
-        data = _delivery_performance_report(df, dt)
-        template = 'reports/delivery_performance.html'
-    else:
-        data = _stock_report()
-        template = 'reports/stock.html'
+    if export == 'excel':
+        return _export_excel(report_type, df, dt, date_from, date_to)
+    if export == 'csv':
+        header, rows = _report_rows(report_type, df, dt)
+        return stream_csv(f'report_{report_type}_{date_from}_{date_to}.csv', header, rows)
+    if export == 'pdf' and get_pdf_jobs().workers > 0:
+        job_id = get_pdf_jobs().submit(
+            render_report_pdf, (report_type, df, dt), f'report_{report_type}_{date_from}_{date_to}.pdf',
+        )
+        return render_template('reports/job.html', job_id=job_id)
+    data, template = _report_data(report_type, df, dt, page=request.args.get('page', 1, type=int) if export == 'html' else None)
     if export == 'pdf':
         return _export_pdf(template, data, date_from, date_to, report_type)
-    if export == 'excel':
-        return _export_excel(report_type, data, date_from, date_to)
     return render_template(template, form=form, data=data, date_from=date_from, date_to=date_to)
 
 
-def _sales_report(date_from, date_to):
-    orders = Order.query.filter(
+def _report_data(report_type, df, dt, page=None):
+    """Return (data, template) for the report."""
+    if report_type == 'sales':
+        return _sales_report(df, dt, page=page), 'reports/sales.html'
+    if report_type == 'product_performance':
+        return _product_performance_report(df, dt), 'reports/product_performance.html'
+    if report_type == 'delivery_performance':
+        return _delivery_performance_report(df, dt), 'reports/delivery_performance.html'
+    return _stock_report(), 'reports/stock.html'
+
+
+def render_report_pdf(report_type, df, dt):
+    """Report PDF bytes; runs in a PDF job worker process (see app.pdf_jobs)."""
+    data, _ = _report_data(report_type, df, dt)
+    with PDF_RENDER_DURATION.time(doc_type='report'):
+        return _build_report_pdf(report_type, data, df.strftime('%Y-%m-%d'), dt.strftime('%Y-%m-%d'))
+
+
+@reports_bp.route('/jobs', methods=['POST'])
+@login_required
+@reports_required
+def submit_job():
+    """Queue a report PDF; poll job_status until it is done, then fetch job_download."""
+    params = request.get_json(silent=True) or request.form
+    report_type = params.get('report_type', 'sales')
+    if report_type not in REPORT_TITLES:
+        return jsonify({'error': 'unknown report_type'}), 400
+    try:
+        df = datetime.strptime(params['date_from'], '%Y-%m-%d').date()
+        dt = datetime.strptime(params['date_to'], '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        return jsonify({'error': 'date_from and date_to must be YYYY-MM-DD'}), 400
+    filename = f'report_{report_type}_{df:%Y-%m-%d}_{dt:%Y-%m-%d}.pdf'
+    job_id = get_pdf_jobs().submit(render_report_pdf, (report_type, df, dt), filename)
+    return jsonify(_job_payload(job_id, get_pdf_jobs().meta(job_id))), 202
+
+
+def _job_payload(job_id, meta):
+    payload = {
+        'job_id': job_id,
+        'status': meta['status'],
+        'status_url': url_for('reports.job_status', job_id=job_id),
+    }
+    if meta['status'] == 'done':
+        payload['download_url'] = url_for('reports.job_download', job_id=job_id)
+    return payload
+
+
+@reports_bp.route('/jobs/<job_id>')
+@login_required
+@reports_required
+def job_status(job_id):
+    meta = get_pdf_jobs().meta(job_id)
+    if meta is None:
+        abort(404)
+    return jsonify(_job_payload(job_id, meta))
+
+
+@reports_bp.route('/jobs/<job_id>/download')
+@login_required
+@reports_required
+def job_download(job_id):
+    meta = get_pdf_jobs().meta(job_id)
+    if meta is None:
+        abort(404)
+    if meta['status'] != 'done':
+        return jsonify(_job_payload(job_id, meta)), 409
+    return send_file(
+        get_pdf_jobs().result_path(job_id),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=meta['filename'],
+    )
+
+
+def _sales_report(date_from, date_to, page=None, per_page=50):
+    """Totals and breakdowns are aggregated in SQL. With page set, orders is one page of
+    the order list (plus a pagination object); otherwise a lazily streamed query for exports."""
+    filters = (
         Order.order_date >= date_from,
         Order.order_date <= date_to,
         Order.order_status != 'cancelled',
-    ).order_by(Order.order_date).all()
-    total_revenue = sum(o.grand_total for o in orders)
-    return {'orders': orders, 'total_revenue': total_revenue, 'count': len(orders)}
-
-
-def _product_performance_report(date_from, date_to):
-    rows = (
+    )
+    count, total_revenue = db.session.query(
+        func.count(Order.id), func.coalesce(func.sum(Order.grand_total), 0),
+    ).filter(*filters).one()
+    by_day = (
         db.session.query(
-            OrderItem.product_name,
-            func.sum(OrderItem.quantity).label('qty'),
-            func.sum(OrderItem.subtotal).label('revenue'),
-            func.sum((OrderItem.selling_price - OrderItem.buying_price) * OrderItem.quantity).label('profit'),
+            Order.order_date.label('day'),
+            func.count(Order.id).label('count'),
+            func.sum(Order.grand_total).label('revenue'),
         )
-        .join(Order)
-        .filter(
-            Order.order_date >= date_from,
-            Order.order_date <= date_to,
-            Order.order_status != 'cancelled',
+        .filter(*filters)
+        .group_by(Order.order_date)
+        .order_by(Order.order_date)
+        .all()
+    )
+    by_payment = (
+        db.session.query(
+            Order.payment_method.label('method'),
+            func.count(Order.id).label('count'),
+            func.sum(Order.grand_total).label('revenue'),
         )
-        .group_by(OrderItem.product_name)
-        .order_by(func.sum(OrderItem.subtotal).desc())
+        .filter(*filters)
+        .group_by(Order.payment_method)
+        .order_by(func.sum(Order.grand_total).desc())
         .all()
     )
-    return {'rows': rows}
+    orders_query = Order.query.filter(*filters).order_by(Order.order_date, Order.order_number)
+    data = {'total_revenue': total_revenue, 'count': count, 'by_day': by_day, 'by_payment': by_payment}
+    if page is None:
+        data['orders'] = orders_query.yield_per(500)
+        return data
+    # The total is already known from the summary query, so skip paginate's COUNT(*).
+    pagination = orders_query.paginate(page=page, per_page=per_page, count=False)
+    pagination.total = count
+    data['orders'] = pagination.items
+    data['pagination'] = pagination
+    return data
+
+
+def _product_performance_query(date_from, date_to):
+    """Per-product totals for the range, read from the daily_product_sales rollup."""
+    return (
+        db.session.query(
+            DailyProductSales.product_name,
+            func.sum(DailyProductSales.quantity).label('qty'),
+            func.sum(DailyProductSales.revenue).label('revenue'),
+            func.sum(DailyProductSales.profit).label('profit'),
+        )
+        .filter(DailyProductSales.day >= date_from, DailyProductSales.day <= date_to)
+        .group_by(DailyProductSales.product_name)
+        .order_by(func.sum(DailyProductSales.revenue).desc())
+    )
+
+
+def _product_performance_report(date_from, date_to):
+    return {'rows': _product_performance_query(date_from, date_to).all()}
 
 
 def _delivery_performance_report(date_from, date_to):
@@ -342,7 +369,8 @@ def _stock_report():
 
 
 def _export_pdf(template, data, date_from, date_to, report_type):
-    pdf_bytes = _build_report_pdf(report_type, data, date_from, date_to)
+    with PDF_RENDER_DURATION.time(doc_type='report'):
+        pdf_bytes = _build_report_pdf(report_type, data, date_from, date_to)
     return send_file(
         BytesIO(pdf_bytes),
         mimetype='application/pdf',
@@ -351,25 +379,60 @@ def _export_pdf(template, data, date_from, date_to, report_type):
     )
 
 
-def _export_excel(report_type, data, date_from, date_to):
+def _stock_status(stock_quantity, min_stock_level):
+    if (stock_quantity or 0) <= 0:
+        return 'Out'
+    if (min_stock_level or 0) > 0 and stock_quantity <= min_stock_level:
+        return 'Low'
+    return 'OK'
+
+
+def _report_rows(report_type, date_from, date_to):
+    """Header and a lazily fetched row iterator for a report (Excel/CSV); column-only queries via yield_per."""
+    from datetime import time
+    if report_type == 'sales':
+        query = (
+            db.session.query(Order.order_number, Order.order_date, Order.customer_name,
+                             Order.payment_method, Order.payment_status, Order.grand_total)
+            .filter(Order.order_date >= date_from, Order.order_date <= date_to, Order.order_status != 'cancelled')
+            .order_by(Order.order_date, Order.order_number)
+        )
+        header = ['Order', 'Date', 'Customer', 'Payment Method', 'Payment Status', 'Total']
+        rows = ((r.order_number, r.order_date, r.customer_name, r.payment_method, r.payment_status,
+                 float(r.grand_total or 0)) for r in query.yield_per(1000))
+    elif report_type == 'product_performance':
+        query = _product_performance_query(date_from, date_to)
+        header = ['Product', 'Qty Sold', 'Revenue', 'Profit']
+        rows = ((r.product_name, int(r.qty or 0), float(r.revenue or 0),
+                 float(r.profit) if r.profit is not None else None) for r in query.yield_per(1000))
+    elif report_type == 'delivery_performance':
+        query = (
+            db.session.query(Delivery.delivery_number, Delivery.customer_name, Delivery.status,
+                             Delivery.scheduled_date, Delivery.delivery_date, Delivery.created_at)
+            .filter(Delivery.created_at >= datetime.combine(date_from, time.min),
+                    Delivery.created_at <= datetime.combine(date_to, time.max))
+            .order_by(Delivery.created_at)
+        )
+        header = ['Delivery', 'Customer', 'Status', 'Scheduled', 'Delivered', 'Created']
+        rows = ((r.delivery_number, r.customer_name, (r.status or '').replace('_', ' ').title(),
+                 r.scheduled_date, r.delivery_date, r.created_at) for r in query.yield_per(1000))
+    else:
+        query = (
+            db.session.query(Product.name, Product.sku, Product.stock_quantity, Product.min_stock_level)
+            .filter(Product.is_active == True)
+            .order_by(Product.stock_quantity.asc())
+        )
+        header = ['Product', 'SKU', 'Stock', 'Min Level', 'Status']
+        rows = ((r.name, r.sku or '', r.stock_quantity, r.min_stock_level,
+                 _stock_status(r.stock_quantity, r.min_stock_level)) for r in query.yield_per(1000))
+    return header, rows
+
+
+def _export_excel(report_type, df, dt, date_from, date_to):
     try:
-        import openpyxl
-        from openpyxl.styles import Font
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = 'Report'
-        if report_type == 'sales' and 'orders' in data:
-            ws.append(['Order', 'Date', 'Customer', 'Total'])
-            for o in data['orders']:
-                ws.append([o.order_number, str(o.order_date), o.customer_name, float(o.grand_total)])
-        elif report_type == 'stock' and 'products' in data:
-            ws.append(['Product', 'SKU', 'Stock', 'Min Level'])
-            for p in data['products']:
-                ws.append([p.name, p.sku or '', p.stock_quantity, p.min_stock_level])
-        buf = BytesIO()
-        wb.save(buf)
-        buf.seek(0)
-        return send_file(buf, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name=f'report_{report_type}_{date_from}_{date_to}.xlsx')
+        import openpyxl  # noqa: F401
     except ImportError:
         flash('Excel export requires openpyxl.', 'warning')
         return redirect(url_for('reports.index', date_from=date_from, date_to=date_to, report_type=report_type))
+    header, rows = _report_rows(report_type, df, dt)
+    return stream_xlsx(f'report_{report_type}_{date_from}_{date_to}.xlsx', header, rows)
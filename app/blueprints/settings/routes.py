@@ -1,11 +1,15 @@
-"""Settings routes (company info, tax, audit log)."""
-from flask import render_template, redirect, url_for, flash, request
+"""Settings routes (company info, tax, audit log, query stats)."""
+from flask import current_app, render_template, redirect, url_for, flash, request
 from flask_login import login_required
 
 from app import db
 from app.blueprints.settings import settings_bp
-from app.decorators import settings_required, admin_required
+from app.decorators import settings_required, admin_required, read_replica
 from app.models import Setting, AuditLog
+from app.pagination import keyset_paginate
+from app.db_pool import pool_stats
+from app.query_stats import BUCKETS_MS, get_query_stats
+from app.services import AuditService
 
 
 @settings_bp.route('/')
@@ -31,11 +35,13 @@ def index():
 @login_required
 @settings_required
 def save():
-    Setting.set('company_name', request.form.get('company_name'), 'company')
-    Setting.set('company_phone', request.form.get('company_phone'), 'company')
-    Setting.set('company_address', request.form.get('company_address'), 'company')
-    Setting.set('tax_rate', request.form.get('tax_rate'), 'general')
-    Setting.set('currency', request.form.get('currency'), 'general')
+    Setting.set_many([
+        ('company_name', request.form.get('company_name'), 'company'),
+        ('company_phone', request.form.get('company_phone'), 'company'),
+        ('company_address', request.form.get('company_address'), 'company'),
+        ('tax_rate', request.form.get('tax_rate'), 'general'),
+        ('currency', request.form.get('currency'), 'general'),
+    ])
     flash('Settings saved.', 'success')
     return redirect(url_for('settings.index'))
 
@@ -43,7 +49,23 @@ def save():
 @settings_bp.route('/audit-log')
 @login_required
 @admin_required
+@read_replica
 def audit_log():
-    page = request.args.get('page', 1, type=int)
-    logs = AuditLog.query.order_by(AuditLog.created_at.desc()).paginate(page=page, per_page=50)
-    return render_template('settings/audit_log.html', logs=logs)
+    logs = keyset_paginate(
+        AuditLog.query, [AuditLog.created_at, AuditLog.id], request.args.get('cursor'), per_page=50, descending=True,
+    )
+    return render_template('settings/audit_log.html', logs=logs, writer_stats=AuditService.stats())
+
+
+@settings_bp.route('/query-stats', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def query_stats():
+    stats = get_query_stats()
+    if request.method == 'POST':
+        stats.clear()
+        flash('Query stats reset.', 'success')
+        return redirect(url_for('settings.query_stats'))
+    return render_template('settings/query_stats.html', rows=stats.snapshot(), buckets=BUCKETS_MS,
+                           window=stats.window, slow_ms=current_app.config['SLOW_QUERY_MS'],
+                           pools=pool_stats(current_app.extensions['db_engines']))
@@ -0,0 +1,241 @@
+"""Small pluggable cache with commit-driven invalidation; hits and misses are counted in /metrics.
+
+Backends (``CACHE_BACKEND``):
+- ``simple``: per-process dict (default).
+- ``filesystem``: pickles under ``CACHE_DIR``; shared by all workers on one host.
+- ``redis``: ``CACHE_REDIS_URL``; shared across hosts (needs the ``redis`` package).
+"""
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+class SimpleBackend:
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class FileSystemBackend:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.PickleError):
+            return None
+        if expires < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((time.time() + ttl, value), f)
+        os.replace(tmp, self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class RedisBackend:
+    def __init__(self, url, prefix='sales:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=max(1, int(ttl)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+def _make_backend(app):
+    name = app.config.get('CACHE_BACKEND', 'simple')
+    if name == 'filesystem':
+        return FileSystemBackend(app.config.get('CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'sales-cache'))
+    if name == 'redis':
+        try:
+            return RedisBackend(app.config['CACHE_REDIS_URL'])
+        except ImportError:
+            logger.warning('CACHE_BACKEND=redis needs the redis package; using the in-process cache.')
+    return SimpleBackend()
+
+
+def _gunicorn_workers():
+    """Worker processes when running under gunicorn (see gunicorn.conf.py), else 0."""
+    if not os.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+        return 0
+    return int(os.environ.get('WEB_CONCURRENCY', 1))
+
+
+class Cache:
+    """App-bound cache; use ``cache.get_or_set(key, ttl, factory)``."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = _make_backend(app)
+        if isinstance(backend, SimpleBackend) and _gunicorn_workers() > 1:
+            # Commit invalidations (user roles and active flags, settings) would reach only one worker.
+            raise RuntimeError(
+                'CACHE_BACKEND=simple is per process; with several gunicorn workers set '
+                'CACHE_BACKEND=filesystem (and CACHE_DIR) or redis.'
+            )
+        app.extensions['cache'] = backend
+
+    @property
+    def backend(self):
+        return current_app.extensions['cache']
+
+    def get(self, key):
+        value = self.backend.get(key)
+        CACHE_LOOKUPS.inc(result='miss' if value is None else 'hit')
+        return value
+
+    def set(self, key, value, ttl):
+        self.backend.set(key, value, ttl)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_or_set(self, key, ttl, factory):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def version(self, key, ttl=24 * 3600):
+        """Token stored at key, created if missing; pair with invalidate_on_commit(key, ...) to change it
+        on commits, and build dependent cache keys from it. Not counted in cache_lookups_total."""
+        token = self.backend.get(key)
+        if token is None:
+            token = uuid.uuid4().hex
+            self.backend.set(key, token, ttl)
+        return token
+
+
+cache = Cache()
+
+# model class -> cache keys to drop when a commit touches a row of that model
+_invalidation_keys = {}
+
+
+def invalidate_on_commit(key, *models):
+    """Delete key after any commit that inserted, updated or deleted a row of one of models.
+
+    key may be a callable taking the row, for per-row keys.
+    """
+    for model in models:
+        _invalidation_keys.setdefault(model, set()).add(key)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_invalidations(session, flush_context, instances):
+    if not _invalidation_keys:
+        return
+    pending = session.info.setdefault('cache_invalidate', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        for key in _invalidation_keys.get(type(obj), ()):
+            pending.add(key(obj) if callable(key) else key)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_invalidations(orm_execute_state):
+    """session.execute(update(Model)...) / delete(): no objects are flushed, so go by the target model.
+
+    Statements on a model's Table (update(Model.__table__)) have no mapper and are matched by table.
+    """
+    if not _invalidation_keys or not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        model = mapper.class_
+    else:
+        table = orm_execute_state.statement.table
+        model = next((m for m in _invalidation_keys if getattr(m, '__table__', None) is table), None)
+    # Per-row (callable) keys cannot be resolved for a bulk statement.
+    keys = [key for key in _invalidation_keys.get(model, ()) if not callable(key)]
+    if keys:
+        orm_execute_state.session.info.setdefault('cache_invalidate', set()).update(keys)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_invalidations(session):
+    keys = session.info.pop('cache_invalidate', None)
+    if keys and has_app_context() and 'cache' in current_app.extensions:
+        for key in keys:
+            cache.delete(key)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop('cache_invalidate', None)
@@ -0,0 +1,21 @@
+"""Flask CLI commands."""
+from datetime import datetime
+
+import click
+
+
+def register_commands(app):
+    @app.cli.group()
+    def rollups():
+        """Daily sales rollup maintenance."""
+
+    @rollups.command('rebuild')
+    @click.option('--from', 'date_from', help='First day to rebuild (YYYY-MM-DD). Default: all history.')
+    @click.option('--to', 'date_to', help='Last day to rebuild (YYYY-MM-DD). Default: all history.')
+    def rebuild(date_from, date_to):
+        """Recompute daily_sales_summary and daily_product_sales from orders."""
+        from app.services import RollupService
+        df = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+        dt = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+        RollupService.rebuild(df, dt)
+        click.echo('Rollups rebuilt.')
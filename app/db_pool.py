@@ -0,0 +1,72 @@
+"""Connection pool settings from config (DB_POOL_*, DB_STATEMENT_TIMEOUT_MS) and pool usage stats."""
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from app.metrics import REGISTRY
+
+POOL_CONNECTIONS = REGISTRY.gauge(
+    'db_pool_connections', 'Connections in this process\'s pool by state.', ('bind', 'state'),
+)
+
+
+def engine_options(config, uri=None):
+    """Engine options for uri (default: the primary database); SQLALCHEMY_ENGINE_OPTIONS entries take precedence."""
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    uri = uri or config.get('SQLALCHEMY_DATABASE_URI')
+    if not uri:
+        return options
+    url = make_url(uri)
+    options.setdefault('pool_pre_ping', config['DB_POOL_PRE_PING'])
+    options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+    # In-memory SQLite runs on a single shared connection (StaticPool), which takes no sizing.
+    if not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')):
+        options.setdefault('pool_size', config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+    timeout_ms = config.get('DB_STATEMENT_TIMEOUT_MS')
+    if timeout_ms and url.get_backend_name() == 'postgresql':
+        connect_args = dict(options.get('connect_args') or {})
+        connect_args['options'] = '{} -c statement_timeout={}'.format(
+            connect_args.get('options', ''), int(timeout_ms),
+        ).strip()
+        options['connect_args'] = connect_args
+    return options
+
+
+def pool_stats(engines):
+    """One row per bind: pool class, size, checked out / idle / overflow connections."""
+    rows = []
+    for bind, engine in engines.items():
+        pool = engine.pool
+        row = {'bind': bind or 'default', 'pool': type(pool).__name__, 'status': pool.status()}
+        if isinstance(pool, QueuePool):
+            row.update(
+                size=pool.size(), checked_out=pool.checkedout(), idle=pool.checkedin(),
+                overflow=max(pool.overflow(), 0), timeout=pool.timeout(),
+            )
+        rows.append(row)
+    return rows
+
+
+# Engines of the app this process serves, for the /metrics collector.
+_engines = {}
+
+
+def _collect():
+    for row in pool_stats(_engines):
+        for state in ('checked_out', 'idle', 'overflow'):
+            if state in row:
+                POOL_CONNECTIONS.set(row[state], bind=row['bind'], state=state)
+
+
+REGISTRY.add_collector(_collect)
+
+
+def init_pool_stats(app):
+    """Report pool usage of app's engines on /metrics. Call after db.init_app."""
+    from app import db
+    with app.app_context():
+        engines = dict(db.engines)
+    app.extensions['db_engines'] = engines
+    _engines.clear()
+    _engines.update(engines)
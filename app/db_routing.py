@@ -0,0 +1,73 @@
+"""Read-replica routing.
+
+Each URL in DATABASE_REPLICA_URLS becomes a bind (replica_0, replica_1, ...) with the primary's
+pool settings. Views marked @read_replica (app.decorators) pick one replica per request and run
+their SELECTs there. Flushes and INSERT/UPDATE/DELETE statements always go to the primary, and
+once a request has written, the rest of it reads from the primary too. A request that writes
+pins its browser session to the primary for REPLICA_STICKY_SECONDS, so users see their own changes
+on list pages despite replication lag. Pages shown right after a write (order detail and the
+like) are simply not marked and always read from the primary.
+"""
+import random
+import time
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Insert, Update, Delete
+from sqlalchemy.sql.selectable import GenerativeSelect
+
+from app.db_pool import engine_options
+
+REPLICA_BIND_PREFIX = 'replica_'
+STICKY_SESSION_KEY = 'db_primary_until'
+
+
+class RoutingSession(Session):
+    """db.session class: sends reads in @read_replica views to the request's replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_request_context():
+            return engine
+        engines = self._db.engines
+        if engine is not engines.get(None):
+            return engine
+        # session.connection() (clause None) is used for raw counter updates; treat it as a write.
+        if self._flushing or clause is None or isinstance(clause, (Insert, Update, Delete)):
+            g.db_wrote = True
+            return engine
+        replica = g.get('db_replica')
+        if (replica and not g.get('db_wrote') and isinstance(clause, GenerativeSelect)
+                and clause._for_update_arg is None):
+            return engines[replica]
+        return engine
+
+
+def use_replica():
+    """Read from a replica for the rest of this request, unless this session recently wrote."""
+    replicas = current_app.extensions.get('db_replicas')
+    if replicas and session.get(STICKY_SESSION_KEY, 0) <= time.time():
+        g.db_replica = random.choice(replicas)
+
+
+def init_replica_routing(app):
+    """Add a bind per DATABASE_REPLICA_URLS entry. Call before init_metrics and db.init_app."""
+    urls = app.config.get('DATABASE_REPLICA_URLS') or []
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for i, url in enumerate(urls):
+        binds[f'{REPLICA_BIND_PREFIX}{i}'] = dict(engine_options(app.config, url), url=url)
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.extensions['db_replicas'] = [key for key in binds if key.startswith(REPLICA_BIND_PREFIX)]
+    if not urls:
+        return
+
+    @app.before_request
+    def _reset_replica():
+        g.db_replica = None
+        g.db_wrote = False
+
+    @app.after_request
+    def _pin_to_primary(response):
+        if g.get('db_wrote'):
+            session[STICKY_SESSION_KEY] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+        return response
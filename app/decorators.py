@@ -1,8 +1,10 @@
-"""Role-based access control decorators."""
+"""View decorators: role-based access control and read-replica routing."""
 from functools import wraps
 from flask import abort
 from flask_login import current_user
 
+from app.db_routing import use_replica
+
 
 def role_required(*roles):
     """Require user to have one of the given roles."""
@@ -60,3 +62,12 @@ def settings_required(f):
             abort(403)
         return f(*args, **kwargs)
     return wrapped
+
+
+def read_replica(f):
+    """Serve the view's reads from a read replica when one is configured (see app.db_routing)."""
+    @wraps(f)
+    def wrapped(*args, **kwargs):
+        use_replica()
+        return f(*args, **kwargs)
+    return wrapped
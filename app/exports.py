@@ -0,0 +1,90 @@
+"""Streaming spreadsheet exports. Rows are consumed lazily so memory stays flat on large exports."""
+import csv
+import io
+import tempfile
+
+from flask import Response, stream_with_context
+
+CSV_FLUSH_ROWS = 500
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CHUNK_SIZE = 64 * 1024
+
+
+def _read_chunks(fileobj, chunk_size=CHUNK_SIZE):
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def stream_xlsx(filename, header, rows, sheet_title='Report'):
+    """Write rows with openpyxl's write-only mode and stream the .xlsx back in chunks.
+
+    Write-only worksheets are spooled to disk row by row with inline strings, and the
+    zip container is assembled in a temporary file (its directory is only known at the
+    end), so neither the rows nor the finished workbook are held in memory.
+    """
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title)
+    bold = Font(bold=True)
+    header_cells = []
+    for title in header:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = bold
+        header_cells.append(cell)
+    ws.append(header_cells)
+    for row in rows:
+        ws.append(row)
+    tmp = tempfile.TemporaryFile()
+    wb.save(tmp)
+    size = tmp.tell()
+    tmp.seek(0)
+    return Response(
+        _read_chunks(tmp),
+        mimetype=XLSX_MIMETYPE,
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Content-Length': str(size),
+        },
+    )
+
+
+def _csv_chunks(header, rows, flush_rows=CSV_FLUSH_ROWS):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    # BOM so Excel opens UTF-8 CSVs with the right encoding.
+    buf.write('\ufeff')
+    writer.writerow(header)
+    # Send the header straight away so the download starts before the first DB batch.
+    yield buf.getvalue().encode('utf-8')
+    buf.seek(0)
+    buf.truncate()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= flush_rows:
+            yield buf.getvalue().encode('utf-8')
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    if pending:
+        yield buf.getvalue().encode('utf-8')
+
+
+def stream_csv(filename, header, rows):
+    """Stream rows as a CSV download. rows should be a lazy iterator (e.g. a yield_per query);
+    it is consumed inside the request context while the response is being sent."""
+    return Response(
+        stream_with_context(_csv_chunks(header, rows)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
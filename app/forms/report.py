@@ -17,4 +17,5 @@ class ReportFilterForm(FlaskForm):
         ('html', 'View'),
         ('pdf', 'PDF'),
         ('excel', 'Excel'),
+        ('csv', 'CSV'),
     ], default='html', validators=[Optional()])
@@ -0,0 +1,347 @@
+"""Prometheus text-format metrics from a small in-process registry.
+
+Counters, gauges and histograms live in memory in each process. With METRICS_DIR set (needed
+whenever more than one process serves the app, e.g. several Gunicorn workers or the PDF job
+pool), each process also writes its values to METRICS_DIR/<pid>.json at most every
+METRICS_FLUSH_INTERVAL seconds and when it exits, and /metrics sums every process's file. Files
+of processes that are gone are folded into archive.json, so counters keep their totals across
+worker restarts. Empty METRICS_DIR when the server (re)starts, as Prometheus expects counters
+to start from zero.
+"""
+import json
+import logging
+import multiprocessing.util
+import os
+import tempfile
+import threading
+import time
+
+from flask import Response, abort, current_app, g, request
+from sqlalchemy.pool import QueuePool
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, files are summed but never compacted
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class _Metric:
+    def __init__(self, registry, name, help, labels):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.changed()
+
+    def zero(self):
+        return 0
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+
+class Gauge(_Metric):
+    """Current value per process; summed over live processes only."""
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = value
+
+    def zero(self):
+        return 0
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, registry, name, help, labels, buckets):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            # [count per bucket..., count above the last bucket, sum]
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = self.zero()
+            state[next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))] += 1
+            state[-1] += value
+        self.registry.changed()
+
+    def zero(self):
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    @staticmethod
+    def merge(a, b):
+        return [x + y for x, y in zip(a, b)]
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.directory = None
+        self.flush_interval = 1.0
+        self._last_flush = 0.0
+        self._finalizer = None
+        self.collectors = []
+
+    def counter(self, name, help, labels=()):
+        return self.metrics.setdefault(name, Counter(self, name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.metrics.setdefault(name, Histogram(self, name, help, labels, buckets))
+
+    def gauge(self, name, help, labels=()):
+        return self.metrics.setdefault(name, Gauge(self, name, help, labels))
+
+    def add_collector(self, collect):
+        """Call collect() to refresh gauges before every snapshot."""
+        self.collectors.append(collect)
+
+    def configure(self, directory, flush_interval):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            if self._finalizer is None:
+                # Finalize (unlike atexit) also runs in multiprocessing children such as PDF job workers.
+                self._finalizer = multiprocessing.util.Finalize(self, self.flush, exitpriority=10)
+
+    def snapshot(self):
+        """{metric name: [[label values, value], ...]}; JSON-serialisable."""
+        for collect in self.collectors:
+            collect()
+        with self.lock:
+            return {
+                name: [[list(key), list(value) if isinstance(value, list) else value]
+                       for key, value in metric.values.items()]
+                for name, metric in self.metrics.items()
+            }
+
+    def changed(self):
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        _write_json(os.path.join(self.directory, f'{os.getpid()}.json'), self.snapshot())
+
+    def collect(self):
+        """Values summed over this process and every other process that wrote to the directory."""
+        totals = {}
+        self._merge(totals, self.snapshot())
+        if self.directory:
+            own = f'{os.getpid()}.json'
+            for name in _fold_dead_processes(self, self.directory):
+                if name != own:
+                    self._merge(totals, _read_json(os.path.join(self.directory, name)))
+        return totals
+
+    def _merge(self, totals, snapshot):
+        for name, samples in snapshot.items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                continue
+            values = totals.setdefault(name, {})
+            for key, value in samples:
+                key = tuple(key)
+                values[key] = metric.merge(values[key], value) if key in values else value
+
+    def render(self):
+        lines = []
+        totals = self.collect()
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            # Unlabelled metrics are reported from the start, as zero until first updated.
+            values = totals.get(name) or ({} if metric.labels else {(): metric.zero()})
+            for key, value in sorted(values.items()):
+                labels = list(zip(metric.labels, key))
+                if metric.type != 'histogram':
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + ('+Inf',), value[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(labels + [("le", _number(bound))])} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(value[-1])}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value):
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _write_json(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _fold_dead_processes(registry, directory):
+    """Merge files of exited processes into archive.json; returns the data file names left."""
+    names = [n for n in os.listdir(directory) if n.endswith('.json')]
+    if fcntl is None:
+        return names
+    dead = [n for n in names if n[:-5].isdigit() and not _pid_alive(int(n[:-5]))]
+    if not dead:
+        return names
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive_path = os.path.join(directory, 'archive.json')
+        totals = {}
+        for name in ['archive.json'] + dead:
+            registry._merge(totals, _read_json(os.path.join(directory, name)))
+        # Gauges describe live processes only; an exited process's gauges are dropped.
+        _write_json(archive_path, {
+            name: [[list(key), value] for key, value in values.items()]
+            for name, values in totals.items() if registry.metrics[name].type != 'gauge'
+        })
+        for name in dead:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+    return [n for n in os.listdir(directory) if n.endswith('.json')]
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time spent handling a request.', ('endpoint', 'method'),
+)
+POOL_CHECKOUT_WAIT = REGISTRY.histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a database connection from the pool.',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+PDF_RENDER_DURATION = REGISTRY.histogram(
+    'pdf_render_duration_seconds', 'Time spent rendering a PDF (cache misses only).', ('doc_type',),
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    'cache_lookups_total', 'Application cache lookups (app.cache), by result: hit or miss.', ('result',),
+)
+ORDERS_CREATED = REGISTRY.counter('orders_created_total', 'Orders created.')
+QUOTATIONS_CREATED = REGISTRY.counter('quotations_created_total', 'Quotations created.')
+DELIVERIES_CREATED = REGISTRY.counter('deliveries_created_total', 'Deliveries created.')
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits (including pre-ping and new connects)."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def init_metrics(app):
+    """Wire request timing, pool checkout timing and GET /metrics (see METRICS_REQUIRE_TOKEN). Call before db.init_app."""
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('poolclass', TimedQueuePool)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    # Binds do not inherit SQLALCHEMY_ENGINE_OPTIONS
+    for bind_options in (app.config.get('SQLALCHEMY_BINDS') or {}).values():
+        if isinstance(bind_options, dict):
+            bind_options.setdefault('poolclass', TimedQueuePool)
+    REGISTRY.configure(app.config.get('METRICS_DIR'), app.config.get('METRICS_FLUSH_INTERVAL', 1.0))
+
+    @app.before_request
+    def _start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.teardown_request
+    def _observe_request(exc):
+        start = g.pop('request_start', None)
+        if start is not None:
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start, endpoint=request.endpoint or 'unmatched', method=request.method,
+            )
+
+    def metrics():
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(401)
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    if app.config.get('METRICS_REQUIRE_TOKEN') and not app.config.get('METRICS_TOKEN'):
+        logger.warning('METRICS_TOKEN is not set; GET /metrics is disabled.')
+        return
+    app.add_url_rule('/metrics', 'metrics', metrics)
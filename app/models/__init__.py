@@ -7,6 +7,8 @@ from app.models.quotation import Quotation, QuotationItem
 from app.models.delivery import Delivery, DeliveryItem
 from app.models.audit import AuditLog
 from app.models.settings import Setting
+from app.models.counter import DocumentCounter
+from app.models.rollup import DailySalesSummary, DailyProductSales
 
 __all__ = [
     'User',
@@ -20,4 +22,7 @@ __all__ = [
     'DeliveryItem',
     'AuditLog',
     'Setting',
+    'DocumentCounter',
+    'DailySalesSummary',
+    'DailyProductSales',
 ]
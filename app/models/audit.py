@@ -7,6 +7,8 @@ from app import db
 
 class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
+    # Keyset pagination of the list page (app.pagination)
+    __table_args__ = (db.Index('ix_audit_logs_created_at_id', 'created_at', 'id'),)
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
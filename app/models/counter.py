@@ -0,0 +1,14 @@
+"""Document number counter model."""
+from app import db
+
+
+class DocumentCounter(db.Model):
+    """Last number handed out per document prefix and period (e.g. ORD / 202610)."""
+    __tablename__ = 'document_counters'
+
+    prefix = db.Column(db.String(20), primary_key=True)
+    period = db.Column(db.String(10), primary_key=True)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DocumentCounter {self.prefix}-{self.period} {self.last_value}>'
@@ -8,6 +8,11 @@ from app import db
 
 class Delivery(db.Model):
     __tablename__ = 'deliveries'
+    __table_args__ = (
+        db.Index('ix_deliveries_status_created_at', 'status', 'created_at'),
+        db.Index('ix_deliveries_assigned_to_id', 'assigned_to_id'),
+        db.Index('ix_deliveries_created_at', 'created_at'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     delivery_number = db.Column(db.String(30), unique=True, nullable=False, index=True)
@@ -24,7 +29,7 @@ class Delivery(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    items = db.relationship('DeliveryItem', backref='delivery', lazy='dynamic', cascade='all, delete-orphan')
+    items = db.relationship('DeliveryItem', backref='delivery', lazy='select', cascade='all, delete-orphan')
 
     STATUSES = ['pending', 'assigned', 'in_transit', 'delivered', 'failed', 'cancelled']
 
@@ -32,6 +37,12 @@ class Delivery(db.Model):
         return f'<Delivery {self.delivery_number}>'
 
 
+# Sort key of the deliveries list: newest scheduled date first, unscheduled (NULL) last. The
+# fallback date is a literal rather than a bound parameter so the database matches it to the index.
+SCHEDULE_SORT_KEY = db.func.coalesce(Delivery.scheduled_date, db.literal_column("'0001-01-01'"))
+db.Index('ix_deliveries_schedule', SCHEDULE_SORT_KEY, Delivery.created_at, Delivery.id)
+
+
 class DeliveryItem(db.Model):
     __tablename__ = 'delivery_items'
 
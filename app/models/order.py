@@ -8,6 +8,20 @@ from app import db
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # List page (keyset pagination on created_at, id), unfiltered and per status filter
+        db.Index('ix_orders_created_at_id', 'created_at', 'id'),
+        db.Index('ix_orders_status_created_at', 'order_status', 'created_at', 'id'),
+        db.Index('ix_orders_payment_created_at', 'payment_status', 'created_at', 'id'),
+        # Date-range reports, rollups and the dashboard, ordered by date then number
+        db.Index('ix_orders_order_date_number', 'order_date', 'order_number'),
+        # Most recent orders that are not cancelled (dashboard, delivery form)
+        db.Index(
+            'ix_orders_active_created_at', 'created_at',
+            postgresql_where=db.text("order_status <> 'cancelled'"),
+            sqlite_where=db.text("order_status <> 'cancelled'"),
+        ),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     order_number = db.Column(db.String(30), unique=True, nullable=False, index=True)
@@ -28,7 +42,7 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    items = db.relationship('OrderItem', backref='order', lazy='dynamic', cascade='all, delete-orphan')
+    items = db.relationship('OrderItem', backref='order', lazy='select', cascade='all, delete-orphan')
     deliveries = db.relationship('Delivery', backref='order', lazy='dynamic', foreign_keys='Delivery.order_id')
 
     PAYMENT_STATUSES = ['pending', 'paid', 'partial', 'cancelled']
@@ -41,6 +55,10 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+        db.Index('ix_order_items_product_id', 'product_id'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     order_id = db.Column(db.String(36), db.ForeignKey('orders.id'), nullable=False)
@@ -20,7 +20,8 @@ class Product(db.Model):
     min_stock_level = db.Column(db.Integer, default=0, nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Catalogue deltas and search index syncs read rows changed since a timestamp.
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     order_items = db.relationship('OrderItem', backref='product', lazy='dynamic', foreign_keys='OrderItem.product_id')
 
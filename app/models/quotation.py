@@ -8,6 +8,8 @@ from app import db
 
 class Quotation(db.Model):
     __tablename__ = 'quotations'
+    # Keyset pagination of the list page (app.pagination)
+    __table_args__ = (db.Index('ix_quotations_created_at_id', 'created_at', 'id'),)
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     quotation_number = db.Column(db.String(30), unique=True, nullable=False, index=True)
@@ -25,7 +27,7 @@ class Quotation(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    items = db.relationship('QuotationItem', backref='quotation', lazy='dynamic', cascade='all, delete-orphan')
+    items = db.relationship('QuotationItem', backref='quotation', lazy='select', cascade='all, delete-orphan')
 
     STATUSES = ['draft', 'sent', 'accepted', 'expired', 'cancelled']
 
@@ -0,0 +1,29 @@
+"""Daily sales rollup models (maintained by RollupService)."""
+from app import db
+
+
+class DailySalesSummary(db.Model):
+    """Per-day totals over non-cancelled orders."""
+    __tablename__ = 'daily_sales_summary'
+
+    day = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Numeric(14, 2), default=0, nullable=False)
+    paid_revenue = db.Column(db.Numeric(14, 2), default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<DailySalesSummary {self.day} {self.revenue}>'
+
+
+class DailyProductSales(db.Model):
+    """Per-day, per-product line totals over non-cancelled orders."""
+    __tablename__ = 'daily_product_sales'
+
+    day = db.Column(db.Date, primary_key=True)
+    product_name = db.Column(db.String(200), primary_key=True)
+    quantity = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Numeric(14, 2), default=0, nullable=False)
+    profit = db.Column(db.Numeric(14, 2), default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<DailyProductSales {self.day} {self.product_name}>'
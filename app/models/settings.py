@@ -1,8 +1,15 @@
 """Application settings model."""
+import time
 import uuid
 from datetime import datetime
 
+from flask import current_app
+
 from app import db
+from app.cache import cache, invalidate_on_commit
+
+# Shared (app.cache) token naming the current settings; dropped by any commit touching a Setting.
+SETTINGS_VERSION_KEY = 'settings:version'
 
 
 class Setting(db.Model):
@@ -15,22 +22,61 @@ class Setting(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    @staticmethod
+    def all():
+        """{key: value} of every setting, from this process's copy (see _SettingsSnapshot)."""
+        snapshot = current_app.extensions.get('settings_snapshot')
+        if snapshot is None or not snapshot.is_current(current_app.config.get('SETTINGS_CACHE_TTL', 60)):
+            snapshot = current_app.extensions['settings_snapshot'] = _SettingsSnapshot.load()
+        return snapshot.values
+
     @staticmethod
     def get(key, default=None):
-        s = Setting.query.filter_by(key=key).first()
-        return s.value if s else default
+        return Setting.all().get(key, default)
 
     @staticmethod
     def set(key, value, category=None):
-        s = Setting.query.filter_by(key=key).first()
-        if s:
-            s.value = str(value) if value is not None else None
-            s.category = category
-        else:
-            s = Setting(key=key, value=str(value) if value is not None else None, category=category)
-            db.session.add(s)
+        return Setting.set_many([(key, value, category)])[0]
+
+    @staticmethod
+    def set_many(items):
+        """Write (key, value, category) tuples in one transaction; returns the Setting rows."""
+        items = list(items)
+        existing = {s.key: s for s in Setting.query.filter(Setting.key.in_([key for key, _, _ in items]))}
+        rows = []
+        for key, value, category in items:
+            value = str(value) if value is not None else None
+            s = existing.get(key)
+            if s:
+                s.value = value
+                s.category = category
+            else:
+                s = existing[key] = Setting(key=key, value=value, category=category)
+                db.session.add(s)
+            rows.append(s)
         db.session.commit()
-        return s
+        return rows
 
     def __repr__(self):
         return f'<Setting {self.key}>'
+
+
+invalidate_on_commit(SETTINGS_VERSION_KEY, Setting)
+
+
+class _SettingsSnapshot:
+    """All settings rows, loaded in one query. Reloaded after SETTINGS_CACHE_TTL seconds, or sooner when
+    the shared version token changes (a commit in any process sharing the cache backend drops it)."""
+
+    def __init__(self, values, version):
+        self.values = values
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls):
+        version = cache.version(SETTINGS_VERSION_KEY)
+        return cls(dict(db.session.query(Setting.key, Setting.value)), version)
+
+    def is_current(self, ttl):
+        return time.monotonic() - self.loaded_at < ttl and cache.version(SETTINGS_VERSION_KEY) == self.version
@@ -1,13 +1,40 @@
 """User model."""
 import uuid
 from datetime import datetime
+from flask import current_app
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from app import db
+from app.cache import cache, invalidate_on_commit
 
 
-class User(UserMixin, db.Model):
+class RolesMixin:
+    """Role checks shared by User and SessionUser."""
+
+    def has_role(self, *roles):
+        return self.role in roles
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def can_manage_users(self):
+        return self.role == 'admin'
+
+    def can_manage_orders(self):
+        return self.role in ('admin', 'manager', 'sales')
+
+    def can_manage_deliveries(self):
+        return self.role in ('admin', 'manager', 'delivery', 'sales')
+
+    def can_view_reports(self):
+        return self.role in ('admin', 'manager', 'sales')
+
+    def can_manage_settings(self):
+        return self.role in ('admin', 'manager')
+
+
+class User(RolesMixin, UserMixin, db.Model):
     __tablename__ = 'users'
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -32,26 +59,50 @@ class User(UserMixin, db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
-    def has_role(self, *roles):
-        return self.role in roles
+    @staticmethod
+    def load_session_user(user_id):
+        """current_user for user_id, from the auth cache for up to USER_CACHE_TTL seconds; None if unknown or disabled."""
+        key = _session_user_key(user_id)
+        data = cache.get(key)
+        if data is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            data = {
+                'id': user.id, 'username': user.username, 'full_name': user.full_name,
+                'role': user.role, 'is_active': user.is_active,
+            }
+            cache.set(key, data, current_app.config.get('USER_CACHE_TTL', 300))
+        return SessionUser(data) if data['is_active'] else None
 
-    def is_admin(self):
-        return self.role == 'admin'
+    def __repr__(self):
+        return f'<User {self.username}>'
 
-    def can_manage_users(self):
-        return self.role == 'admin'
 
-    def can_manage_orders(self):
-        return self.role in ('admin', 'manager', 'sales')
+class SessionUser(RolesMixin, UserMixin):
+    """The User columns that auth, role checks and templates read, without the ORM row.
 
-    def can_manage_deliveries(self):
-        return self.role in ('admin', 'manager', 'delivery', 'sales')
+    Load the User itself (db.session.get(User, current_user.id)) to change it.
+    """
 
-    def can_view_reports(self):
-        return self.role in ('admin', 'manager', 'sales')
+    def __init__(self, data):
+        self.id = data['id']
+        self.username = data['username']
+        self.full_name = data['full_name']
+        self.role = data['role']
+        self._active = data['is_active']
 
-    def can_manage_settings(self):
-        return self.role in ('admin', 'manager')
+    @property
+    def is_active(self):
+        return self._active
 
     def __repr__(self):
-        return f'<User {self.username}>'
+        return f'<SessionUser {self.username}>'
+
+
+def _session_user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+# Any committed change to a user (role, active flag, name, password) drops their cached entry.
+invalidate_on_commit(lambda user: _session_user_key(user.id), User)
@@ -0,0 +1,166 @@
+"""Keyset (cursor) pagination for list pages.
+
+A page is fetched with ``WHERE (sort key) < (last row's key) ORDER BY sort key LIMIT n`` rather
+than OFFSET, so page 500 costs the same as page 1 given an index on the sort key, and rows
+inserted meanwhile do not shift later pages. The sort key must end in a unique column (the id).
+Cursors are opaque URL-safe tokens holding the boundary row's key; a malformed or stale one (for
+example from a different sort order) just yields the first page.
+
+Instead of an exact COUNT(*) over the filtered table, pages carry an estimate: the planner's row
+estimate on PostgreSQL, elsewhere a count capped at COUNT_CAP rows.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+
+COUNT_CAP = 1000
+KEY_TYPES = (str, int, float, Decimal, date, datetime, type(None))
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None, total_exact=False):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_exact = total_exact
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    @property
+    def total_label(self):
+        """'57', '1,000+' (capped count) or '~12,400' (planner estimate); '' when not counted."""
+        if self.total is None:
+            return ''
+        if self.total_exact:
+            return f'{self.total:,}'
+        return f'{self.total:,}+' if self.total >= COUNT_CAP else f'~{self.total:,}'
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return ['dt', value.isoformat()]
+    if isinstance(value, date):
+        return ['d', value.isoformat()]
+    if isinstance(value, Decimal):
+        return ['n', str(value)]
+    return value
+
+
+def _decode_value(value):
+    if not isinstance(value, list):
+        return value
+    tag, raw = value
+    return {'dt': datetime.fromisoformat, 'd': date.fromisoformat, 'n': Decimal}[tag](raw)
+
+
+def encode_cursor(direction, key):
+    raw = json.dumps([direction] + [_encode_value(v) for v in key], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, key_length):
+    """(direction, key) or (None, None) when the token is missing or unusable."""
+    if not token:
+        return None, None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        direction, key = data[0], [_decode_value(v) for v in data[1:]]
+    except (binascii.Error, ValueError, TypeError, KeyError, IndexError, ArithmeticError):
+        return None, None
+    if direction not in ('next', 'prev') or len(key) != key_length:
+        return None, None
+    if not all(isinstance(v, KEY_TYPES) and not isinstance(v, bool) for v in key):
+        return None, None
+    return direction, key
+
+
+def _fits(key, columns):
+    """Whether each key value has its column's Python type, so a tampered cursor never reaches the query."""
+    for value, column in zip(key, columns):
+        try:
+            expected = column.type.python_type
+        except NotImplementedError:
+            continue
+        if value is not None and not isinstance(value, expected):
+            return False
+    return True
+
+
+def _fetch(query, columns, descending, per_page, after=None, reverse=False):
+    """Up to per_page + 1 (item, key) pairs following `after` in sort order (preceding it if reverse)."""
+    backwards = descending != reverse
+    if after is not None:
+        boundary = tuple_(*columns)
+        query = query.filter(boundary < tuple_(*after) if backwards else boundary > tuple_(*after))
+    order = [c.desc() if backwards else c.asc() for c in columns]
+    labels = [c.label(f'_key{i}') for i, c in enumerate(columns)]
+    rows = query.add_columns(*labels).order_by(None).order_by(*order).limit(per_page + 1).all()
+    return [(row[0], tuple(row[1:])) for row in rows]
+
+
+def estimate_count(query):
+    """(count, exact) for the query's rows without a full COUNT(*); see the module docstring."""
+    query = query.order_by(None)
+    bind = db.session.get_bind(clause=query.statement)
+    if bind.dialect.name == 'postgresql':
+        try:
+            sql = query.statement.compile(bind, compile_kwargs={'literal_binds': True})
+            plan = db.session.execute(text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows']), False
+        except (SQLAlchemyError, NotImplementedError, LookupError, TypeError):
+            pass
+    capped = query.limit(COUNT_CAP).subquery()
+    total = db.session.execute(select(func.count()).select_from(capped)).scalar()
+    return total, total < COUNT_CAP
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=20, descending=False, count=True):
+    """One page of query ordered by columns (all ascending or all descending; last one unique).
+
+    columns may be SQL expressions as well as model columns. With count, the page carries an
+    estimated total (KeysetPage.total_label).
+    """
+    columns = list(columns)
+    direction, key = decode_cursor(cursor, len(columns))
+    if key is not None and not _fits(key, columns):
+        direction = key = None
+    if direction == 'prev':
+        rows = _fetch(query, columns, descending, per_page, after=key, reverse=True)
+        has_prev = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        if len(rows) < per_page:
+            # Fewer rows than a page before the cursor: show the (full) first page instead.
+            direction = key = None
+        else:
+            has_next = True
+    if direction != 'prev':
+        rows = _fetch(query, columns, descending, per_page, after=key)
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_prev = key is not None and bool(rows)
+    total = total_exact = None
+    if count:
+        total, total_exact = estimate_count(query)
+    return KeysetPage(
+        [item for item, _ in rows],
+        next_cursor=encode_cursor('next', rows[-1][1]) if has_next else None,
+        prev_cursor=encode_cursor('prev', rows[0][1]) if has_prev else None,
+        total=total,
+        total_exact=bool(total_exact),
+    )
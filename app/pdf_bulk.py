@@ -0,0 +1,153 @@
+"""Bulk PDF downloads: many rendered documents streamed as one merged PDF or as a zip.
+
+Documents are rendered on the PDF job pool (see app.pdf_jobs) a few at a time and written
+to the response as each one arrives, so memory holds only the documents in flight plus
+the merged file's cross-reference offsets, however many documents are exported.
+"""
+import zipfile
+from io import BytesIO
+
+from flask import Response, stream_with_context
+
+from app.pdf_jobs import get_pdf_jobs
+
+
+class PdfConcatenator:
+    """Writes one PDF from many, emitting each input's objects (renumbered) as soon as it is added.
+
+    Objects 1 and 2 are reserved for the catalog and page tree, written by finish() together
+    with the cross-reference table once every page is known.
+    """
+
+    def __init__(self):
+        self._pos = 0
+        self._next_id = 3
+        self._offsets = {}
+        self._page_ids = []
+
+    def _emit(self, data):
+        self._pos += len(data)
+        return data
+
+    def header(self):
+        return self._emit(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def add(self, pdf_bytes):
+        from pypdf import PdfReader
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+        reader = PdfReader(BytesIO(pdf_bytes))
+        mapping = {}
+        queue = []
+        pages = IndirectObject(2, 0, None)
+
+        def ref(indirect):
+            new_id = mapping.get(indirect.idnum)
+            if new_id is None:
+                new_id = mapping[indirect.idnum] = self._next_id
+                self._next_id += 1
+                queue.append(indirect)
+            return IndirectObject(new_id, 0, None)
+
+        def remap(obj):
+            if isinstance(obj, IndirectObject):
+                return ref(obj)
+            if isinstance(obj, DictionaryObject):
+                for key, value in dict.items(obj):
+                    dict.__setitem__(obj, key, remap(value))
+            elif isinstance(obj, ArrayObject):
+                for i, value in enumerate(obj):
+                    list.__setitem__(obj, i, remap(value))
+            return obj
+
+        for page in reader.pages:
+            self._page_ids.append(ref(page.indirect_reference).idnum)
+        out = BytesIO()
+        while queue:
+            indirect = queue.pop()
+            obj = indirect.get_object()
+            if isinstance(obj, DictionaryObject) and obj.get('/Type') == '/Page':
+                # Drop the parent before remapping so the source page tree is not copied.
+                dict.pop(obj, NameObject('/Parent'), None)
+                obj = remap(obj)
+                dict.__setitem__(obj, NameObject('/Parent'), pages)
+            else:
+                obj = remap(obj)
+            new_id = mapping[indirect.idnum]
+            self._offsets[new_id] = self._pos + out.tell()
+            out.write(b'%d 0 obj\n' % new_id)
+            obj.write_to_stream(out)
+            out.write(b'\nendobj\n')
+        return self._emit(out.getvalue())
+
+    def finish(self):
+        out = BytesIO()
+        kids = b' '.join(b'%d 0 R' % page_id for page_id in self._page_ids)
+        for obj_id, body in (
+            (1, b'<< /Type /Catalog /Pages 2 0 R >>'),
+            (2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self._page_ids))),
+        ):
+            self._offsets[obj_id] = self._pos + out.tell()
+            out.write(b'%d 0 obj\n%s\nendobj\n' % (obj_id, body))
+        xref_pos = self._pos + out.tell()
+        size = self._next_id
+        out.write(b'xref\n0 %d\n0000000000 65535 f \n' % size)
+        for obj_id in range(1, size):
+            out.write(b'%010d 00000 n \n' % self._offsets[obj_id])
+        out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (size, xref_pos))
+        return self._emit(out.getvalue())
+
+
+def merged_pdf_chunks(documents):
+    """Yield one merged PDF from an iterable of (name, pdf_bytes)."""
+    merger = PdfConcatenator()
+    yield merger.header()
+    for _, data in documents:
+        yield merger.add(data)
+    yield merger.finish()
+
+
+class _ZipSink:
+    """Write-only, unseekable file for ZipFile; collects output until drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def zip_chunks(documents):
+    """Yield a zip archive of an iterable of (name, pdf_bytes), one member at a time."""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in documents:
+            zf.writestr(name, data)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_bulk_pdf(basename, task, ids, fmt='pdf'):
+    """Render task(id) -> (name, pdf_bytes) for every id on the job pool and stream the result.
+
+    fmt is 'pdf' for one merged document or 'zip' for one file per document.
+    """
+    documents = get_pdf_jobs().render_many(task, [(i,) for i in ids])
+    if fmt == 'zip':
+        body, mimetype, filename = zip_chunks(documents), 'application/zip', basename + '.zip'
+    else:
+        body, mimetype, filename = merged_pdf_chunks(documents), 'application/pdf', basename + '.pdf'
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,128 @@
+"""On-disk cache of rendered PDFs, keyed by document type, entity id, updated_at and settings.
+
+Entries are plain files named by a content key; reads refresh the file mtime and the
+least recently used files are evicted once the directory exceeds PDF_CACHE_MAX_BYTES.
+The directory can be shared by all workers on a host.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+
+from flask import current_app
+
+from app.metrics import PDF_RENDER_DURATION
+from app.models import Setting
+
+# Bump when PDF layouts change so previously cached documents are not served.
+RENDER_VERSION = '1'
+
+
+class PdfCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pdf')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.pdf'):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def get_pdf_cache(app=None):
+    app = app or current_app
+    pdf_cache = app.extensions.get('pdf_cache')
+    if pdf_cache is None:
+        directory = app.config.get('PDF_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'sales-pdf-cache')
+        pdf_cache = PdfCache(directory, app.config.get('PDF_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+        app.extensions['pdf_cache'] = pdf_cache
+    return pdf_cache
+
+
+def _settings_fingerprint():
+    """Hash of all settings rows plus the logo file, both of which appear in rendered documents."""
+    h = hashlib.sha256()
+    for key, value in sorted(Setting.all().items()):
+        h.update(f'{key}={value}\n'.encode('utf-8'))
+    logo_path = os.path.join(current_app.static_folder, 'logo.png')
+    if os.path.isfile(logo_path):
+        h.update(str(os.path.getmtime(logo_path)).encode('utf-8'))
+    return h.hexdigest()
+
+
+def pdf_cache_key(doc_type, entity, variant=''):
+    updated = entity.updated_at.isoformat() if entity.updated_at else ''
+    raw = '|'.join([RENDER_VERSION, doc_type, variant, str(entity.id), updated, _settings_fingerprint()])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def cached_pdf(doc_type, entity, build, variant=''):
+    """Return PDF bytes for entity, calling build() only when no current copy is cached.
+
+    variant distinguishes renderings of the same entity (e.g. receipt format and date).
+    """
+    if not current_app.config.get('PDF_CACHE_ENABLED', True):
+        with PDF_RENDER_DURATION.time(doc_type=doc_type):
+            return build()
+    pdf_cache = get_pdf_cache()
+    key = pdf_cache_key(doc_type, entity, variant)
+    data = pdf_cache.get(key)
+    if data is None:
+        with PDF_RENDER_DURATION.time(doc_type=doc_type):
+            data = build()
+        pdf_cache.put(key, data)
+    return data
@@ -0,0 +1,199 @@
+"""Background PDF rendering on a process pool.
+
+Large report PDFs are rendered by PDF_JOB_WORKERS spawned processes, each with its own app
+and database connections, so they neither hold a web worker nor share its GIL. Job state
+lives in files under PDF_JOB_DIR (<id>.job while pending, <id>.pdf when done, <id>.err on
+failure), so any web worker on the host can answer status and download requests.
+render_many() uses the same pool for bulk exports that stream results back directly.
+With PDF_JOB_WORKERS = 0 jobs are rendered inline, before submit() returns.
+"""
+import atexit
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+# Set in pool processes by _init_worker.
+_worker_app = None
+
+
+def _init_worker(config_name, database_uri):
+    global _worker_app
+    from config import config
+    config[config_name].SQLALCHEMY_DATABASE_URI = database_uri
+    from app import create_app
+    _worker_app = create_app(config_name)
+    # Job rendering never writes audit rows; keep the worker free of the writer thread.
+    _worker_app.config['AUDIT_ASYNC'] = False
+
+
+def _execute(directory, job_id, task, args):
+    base = os.path.join(directory, job_id)
+    try:
+        data = task(*args)
+    except Exception:
+        logger.exception('PDF job %s failed', job_id)
+        with open(base + '.err', 'w') as f:
+            f.write(traceback.format_exc(limit=5))
+        return
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, base + '.pdf')
+
+
+def _run_in_worker(directory, job_id, task, args):
+    with _worker_app.app_context():
+        _execute(directory, job_id, task, args)
+
+
+def _call_in_worker(task, args):
+    with _worker_app.app_context():
+        return task(*args)
+
+
+class PdfJobQueue:
+    def __init__(self, app, directory, workers, ttl, max_tasks_per_child=50):
+        self.app = app
+        self.directory = directory
+        self.workers = workers
+        self.ttl = ttl
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _get_executor(self):
+        with self._lock:
+            # A forked web worker must not reuse its parent's pool.
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.app.config['CONFIG_NAME'], self.app.config['SQLALCHEMY_DATABASE_URI']),
+                    max_tasks_per_child=self.max_tasks_per_child,
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _path(self, job_id, ext):
+        return os.path.join(self.directory, job_id + ext)
+
+    def submit(self, task, args, filename):
+        """Queue task(*args) -> PDF bytes; task must be a module-level function. Returns the job id."""
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        with open(self._path(job_id, '.job'), 'w') as f:
+            json.dump({'filename': filename, 'created': time.time()}, f)
+        if self.workers <= 0:
+            _execute(self.directory, job_id, task, args)
+        else:
+            future = self._get_executor().submit(_run_in_worker, self.directory, job_id, task, args)
+            future.add_done_callback(lambda f: self._on_done(job_id, f))
+        return job_id
+
+    def render_many(self, task, arg_list, window=None):
+        """Yield task(*args) for each args in order, keeping up to window calls in flight on the pool.
+
+        Unlike submit(), results come straight back to the caller instead of through PDF_JOB_DIR.
+        """
+        if self.workers <= 0:
+            for args in arg_list:
+                yield task(*args)
+            return
+        executor = self._get_executor()
+        window = window or self.workers * 2
+        args_iter = iter(arg_list)
+        in_flight = deque(
+            executor.submit(_call_in_worker, task, args) for args in itertools.islice(args_iter, window)
+        )
+        try:
+            while in_flight:
+                result = in_flight.popleft().result()
+                for args in itertools.islice(args_iter, 1):
+                    in_flight.append(executor.submit(_call_in_worker, task, args))
+                yield result
+        finally:
+            # Client went away or a document failed: drop whatever has not started yet.
+            for future in in_flight:
+                future.cancel()
+
+    def _on_done(self, job_id, future):
+        # _execute records task errors itself; this catches a crashed or cancelled worker.
+        error = 'cancelled' if future.cancelled() else future.exception()
+        if error is None:
+            return
+        if isinstance(error, BrokenProcessPool):
+            with self._lock:
+                self._executor = None
+        with open(self._path(job_id, '.err'), 'w') as f:
+            f.write(str(error))
+
+    def meta(self, job_id):
+        """Job metadata with its status ('pending', 'done' or 'failed'), or None for unknown ids."""
+        if not _JOB_ID.match(job_id or ''):
+            return None
+        try:
+            with open(self._path(job_id, '.job')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if os.path.exists(self._path(job_id, '.pdf')):
+            meta['status'] = 'done'
+        elif os.path.exists(self._path(job_id, '.err')):
+            meta['status'] = 'failed'
+        else:
+            meta['status'] = 'pending'
+        return meta
+
+    def result_path(self, job_id):
+        return self._path(job_id, '.pdf')
+
+    def cleanup(self):
+        """Remove job files older than ttl seconds."""
+        cutoff = time.time() - self.ttl
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+
+def get_pdf_jobs(app=None):
+    app = app or current_app._get_current_object()
+    queue = app.extensions.get('pdf_jobs')
+    if queue is None:
+        directory = app.config.get('PDF_JOB_DIR') or os.path.join(tempfile.gettempdir(), 'sales-pdf-jobs')
+        queue = PdfJobQueue(
+            app, directory,
+            workers=app.config.get('PDF_JOB_WORKERS', 0),
+            ttl=app.config.get('PDF_JOB_TTL', 3600),
+        )
+        app.extensions['pdf_jobs'] = queue
+        atexit.register(queue.shutdown)
+    return queue
@@ -0,0 +1,314 @@
+"""Shared ReportLab building blocks for invoices, receipts, quotations, delivery notes and reports.
+
+Paragraph styles, the logo and the page header used by every document are built once per
+process instead of on each render. The logo is decoded once. On the ReportLab versions in
+SHARED_XOBJECT_VERSIONS it is also PDF-encoded once and each document only references that
+image stream, which saves about 10 ms per document. This uses the Canvas internals that
+drawImage itself uses. Other versions draw the cached image with the public drawImage, which
+encodes it again for every document.
+"""
+import copy
+import hashlib
+import os
+import threading
+
+import reportlab
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfdoc
+from reportlab.platypus import BaseDocTemplate, Flowable, Frame, PageTemplate, Paragraph, Spacer, Table, TableStyle
+
+from app.pdf_fonts import register_pdf_fonts, get_pdf_fonts
+
+MARGIN = 50
+# ReportLab releases whose Canvas.drawImage internals LogoFlowable reproduces (checked by
+# tests/test_pdf_toolkit.py); anything else takes the public drawImage path.
+SHARED_XOBJECT_VERSIONS = ('4.4.',)
+ADDRESS_LINE = 'Tel: 0725799182 | Gikomba, Kombo Munyiri Rd.'
+GREY = colors.HexColor('#555555')
+
+HLINE_STYLE = TableStyle([
+    ('LINEBELOW', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+])
+REF_ROW_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+    ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+    ('LEFTPADDING', (0, 0), (0, 0), 0),
+    ('RIGHTPADDING', (0, 0), (0, 0), 0),
+])
+
+_lock = threading.Lock()
+_styles = {}   # (regular font, bold font) -> {name: ParagraphStyle}
+_logos = {}    # (path, mtime) -> _Logo, or None when the file cannot be read
+_local = threading.local()
+_generation = 0
+
+
+def reset():
+    """Drop every cached style, logo and header (e.g. after replacing logo.png or fonts)."""
+    global _generation
+    with _lock:
+        _styles.clear()
+        _logos.clear()
+        _generation += 1
+
+
+def _build_styles(fonts):
+    base = getSampleStyleSheet()
+    normal = base['Normal']
+    black = colors.black
+    regular, bold = fonts['regular'], fonts['bold']
+    s = {}
+    s['title'] = ParagraphStyle(
+        'DocTitle', parent=base['Heading1'],
+        fontSize=20, spaceAfter=2, textColor=black, fontName=bold, leftIndent=0, firstLineIndent=0,
+    )
+    s['small'] = ParagraphStyle(
+        'Small', parent=normal, fontSize=10, textColor=GREY, spaceAfter=0, leftIndent=0, firstLineIndent=0,
+        rightIndent=0, bulletIndent=0, fontName=regular,
+    )
+    s['small_right'] = ParagraphStyle('SmallRight', parent=s['small'], alignment=2)
+    s['body'] = ParagraphStyle(
+        'Body', parent=normal, fontSize=11, textColor=black, spaceAfter=2, leftIndent=0, firstLineIndent=0,
+        fontName=regular,
+    )
+    s['terms'] = ParagraphStyle(
+        'Terms', parent=normal, fontSize=10, textColor=black, spaceAfter=2, leftIndent=0, firstLineIndent=0,
+        fontName=regular,
+    )
+    s['addr'] = ParagraphStyle(
+        'Addr', parent=normal, fontSize=10, textColor=GREY,
+        leftIndent=0, spaceAfter=0, spaceBefore=2, fontName=regular,
+    )
+    s['center'] = ParagraphStyle(
+        'Center', parent=normal, fontSize=11, alignment=1, spaceAfter=4, textColor=black, fontName=regular,
+    )
+    s['center_bold'] = ParagraphStyle(
+        'CenterBold', parent=normal, fontSize=12, alignment=1, fontName=bold, spaceAfter=4, textColor=black,
+    )
+    s['disclaimer'] = ParagraphStyle(
+        'Disclaimer', parent=normal, fontSize=11, textColor=black, alignment=1, spaceAfter=0, fontName=regular,
+    )
+    s['footer'] = ParagraphStyle(
+        'Footer', parent=normal, fontSize=10, textColor=GREY, alignment=1, spaceAfter=0, fontName=regular,
+    )
+    # 80mm thermal receipts
+    s['thermal_center'] = ParagraphStyle(
+        'Center', parent=normal, fontSize=10, alignment=1, spaceAfter=2, fontName=regular,
+    )
+    s['thermal_center_bold'] = ParagraphStyle(
+        'CenterBold', parent=normal, fontSize=11, alignment=1, fontName=bold, spaceAfter=2,
+    )
+    s['thermal_left'] = ParagraphStyle(
+        'Left', parent=normal, fontSize=9, alignment=0, spaceAfter=1,
+        leftIndent=0, firstLineIndent=0, fontName=regular,
+    )
+    s['thermal_left_bold'] = ParagraphStyle(
+        'LeftBold', parent=normal, fontSize=9, alignment=0, fontName=bold, spaceAfter=1,
+        leftIndent=0, firstLineIndent=0,
+    )
+    s['thermal_right_bold'] = ParagraphStyle(
+        'RightBold', parent=normal, fontSize=9, alignment=2, fontName=bold, spaceAfter=1,
+    )
+    s['thermal_line'] = ParagraphStyle(
+        'Line', parent=normal, fontSize=9, alignment=1, spaceAfter=2, fontName=regular,
+    )
+    s['thermal_addr'] = ParagraphStyle(
+        'AddrThermal', parent=normal, fontSize=7, textColor=GREY,
+        alignment=1, leftIndent=0, spaceAfter=0, spaceBefore=0, fontName=regular,
+    )
+    return s
+
+
+def get_styles(static_folder):
+    """Named paragraph styles for the registered fonts. Treat them as read-only."""
+    register_pdf_fonts(static_folder)
+    fonts = get_pdf_fonts()
+    key = (fonts['regular'], fonts['bold'])
+    styles = _styles.get(key)
+    if styles is None:
+        styles = _styles[key] = _build_styles(fonts)
+    return styles
+
+
+def shared_xobject_supported():
+    return reportlab.Version.startswith(SHARED_XOBJECT_VERSIONS)
+
+
+class _Logo:
+    """logo.png decoded, and on supported ReportLab versions encoded as a PDF image XObject."""
+
+    def __init__(self, path, mtime):
+        self.name = hashlib.md5('{}:{}'.format(path, mtime).encode('utf-8')).hexdigest()
+        self.reader = ImageReader(path)
+        self.width, self.height = self.reader.getSize()
+        self.xobject = self.smask = None
+        if shared_xobject_supported():
+            self.xobject = pdfdoc.PDFImageXObject(self.name, self.reader, mask='auto')
+            self.smask = getattr(self.xobject, '_smask', None)
+            if self.smask is not None:
+                del self.xobject._smask
+
+
+def get_logo(static_folder):
+    """Cached logo for static/logo.png, or None if there is no usable logo."""
+    path = os.path.join(static_folder, 'logo.png')
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    key = (path, mtime)
+    if key not in _logos:
+        try:
+            logo = _Logo(path, mtime)
+        except Exception:
+            logo = None
+        if logo is not None and not (logo.width and logo.height):
+            logo = None
+        _logos[key] = logo
+    return _logos[key]
+
+
+class LogoFlowable(Flowable):
+    """Draws a cached _Logo; with a shared XObject only the document references are new."""
+
+    def __init__(self, logo, width, height, hAlign='LEFT'):
+        super().__init__()
+        self.logo = logo
+        self.width = width
+        self.height = height
+        self.hAlign = hAlign
+
+    def wrap(self, aW, aH):
+        return self.width, self.height
+
+    def draw(self):
+        canv = self.canv
+        logo = self.logo
+        if logo.xobject is None:
+            canv.drawImage(logo.reader, 0, 0, self.width, self.height, mask='auto')
+            return
+        # Same steps as Canvas.drawImage, minus re-encoding the image (see SHARED_XOBJECT_VERSIONS).
+        doc = canv._doc
+        reg_name = doc.getXObjectName(logo.name)
+        if reg_name not in doc.idToObject:
+            xobject = copy.copy(logo.xobject)
+            canv._setXObjects(xobject)
+            doc.Reference(xobject, reg_name)
+            doc.addForm(logo.name, xobject)
+            if logo.smask is not None:
+                smask = copy.copy(logo.smask)
+                canv._setXObjects(smask)
+                xobject.smask = doc.Reference(smask, doc.getXObjectName(smask.name))
+        canv._currentPageHasImages = 1
+        canv.saveState()
+        canv.scale(self.width, self.height)
+        canv._code.append('/%s Do' % reg_name)
+        canv.restoreState()
+        canv._formsinuse.append(logo.name)
+
+
+def logo_flowable(static_folder, max_width, max_height, factor=1.0, hAlign='LEFT'):
+    """Logo scaled to fit max_width x max_height (never upscaled), then by factor; None if no logo."""
+    logo = get_logo(static_folder)
+    if logo is None:
+        return None
+    scale = min(max_width / logo.width, max_height / logo.height, 1.0) * factor
+    return LogoFlowable(logo, logo.width * scale, logo.height * scale, hAlign=hAlign)
+
+
+def hline(width_pt):
+    """Thin horizontal line (grey), full frame width."""
+    t = Table([['']], colWidths=[width_pt], rowHeights=[2])
+    t.setStyle(HLINE_STYLE)
+    return t
+
+
+def ref_row(left, right, frame_width, styles):
+    """Document number on the left and date(s) on the right, as on every A4/letter document."""
+    t = Table([
+        [Paragraph(left, styles['small']), Paragraph(right, styles['small_right'])]
+    ], colWidths=[frame_width - 2.5 * inch, 2.5 * inch])
+    t.setStyle(REF_ROW_STYLE)
+    return t
+
+
+def page_template(buffer, pagesize):
+    """Single-frame document with the standard margins; returns (doc, frame_width)."""
+    frame_width = pagesize[0] - 2 * MARGIN
+    frame_height = pagesize[1] - 2 * MARGIN
+    frame = Frame(
+        MARGIN, MARGIN, frame_width, frame_height,
+        id='normal',
+        leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0,
+    )
+    doc = BaseDocTemplate(
+        buffer, pagesize=pagesize,
+        leftMargin=MARGIN, rightMargin=MARGIN, topMargin=MARGIN, bottomMargin=MARGIN,
+    )
+    doc.addPageTemplates([PageTemplate(id='First', frames=[frame]), PageTemplate(id='Later', frames=[frame])])
+    return doc, frame_width
+
+
+def _logo_name(static_folder):
+    logo = get_logo(static_folder)
+    return logo.name if logo is not None else None
+
+
+def _cached_header(key, build):
+    # Flowables keep layout state while a document is built, so each thread gets its own copies.
+    cache = getattr(_local, 'headers', None)
+    if cache is None or _local.generation != _generation:
+        cache = _local.headers = {}
+        _local.generation = _generation
+    flowables = cache.get(key)
+    if flowables is None:
+        flowables = cache[key] = build()
+    return flowables
+
+
+def document_header(static_folder, frame_width, title):
+    """Logo, address line and title block shared by invoices, receipts, quotations, delivery notes and reports."""
+    styles = get_styles(static_folder)
+
+    def build():
+        flowables = []
+        logo = logo_flowable(static_folder, frame_width, 1.4 * inch, factor=0.5)
+        if logo is not None:
+            flowables.append(logo)
+        flowables += [
+            Spacer(1, 0.15 * inch),
+            Paragraph(ADDRESS_LINE, styles['addr']),
+            Spacer(1, 0.2 * inch),
+            hline(frame_width),
+            Spacer(1, 0.15 * inch),
+            Paragraph(title, styles['title']),
+            hline(frame_width),
+            Spacer(1, 0.12 * inch),
+        ]
+        return flowables
+
+    return list(_cached_header((static_folder, frame_width, title, _logo_name(static_folder)), build))
+
+
+def thermal_header(static_folder, content_width):
+    """Centred logo and address line for 80mm thermal receipts."""
+    styles = get_styles(static_folder)
+
+    def build():
+        flowables = []
+        logo = logo_flowable(static_folder, content_width, 0.5 * inch, hAlign='CENTER')
+        if logo is not None:
+            flowables.append(logo)
+        flowables += [
+            Spacer(1, 0.06 * inch),
+            Paragraph(ADDRESS_LINE, styles['thermal_addr']),
+            Spacer(1, 0.06 * inch),
+        ]
+        return flowables
+
+    return list(_cached_header(('thermal', static_folder, content_width, _logo_name(static_folder)), build))
@@ -0,0 +1,109 @@
+"""Per-request SQL instrumentation: query count, DB time and a slow-query log.
+
+Every statement run while handling a request is timed through engine events. In debug mode
+the totals are returned as X-DB-Query-Count / X-DB-Time-Ms response headers; statements slower
+than SLOW_QUERY_MS are logged with the endpoint that ran them; and the last QUERY_STATS_WINDOW
+requests of each endpoint are kept for the admin query stats page. Stats are per process.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the DB time histogram buckets; the last bucket is open-ended.
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class QueryStats:
+    """Rolling window of (query count, DB ms) samples per endpoint."""
+
+    def __init__(self, window=500):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, queries, db_ms):
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append((queries, db_ms))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self):
+        """Per-endpoint summary rows, busiest (total DB time) first."""
+        with self._lock:
+            samples = {endpoint: list(values) for endpoint, values in self._samples.items()}
+        rows = []
+        for endpoint, values in samples.items():
+            counts = sorted(q for q, _ in values)
+            times = sorted(ms for _, ms in values)
+            buckets = [0] * (len(BUCKETS_MS) + 1)
+            for ms in times:
+                buckets[next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))] += 1
+            rows.append({
+                'endpoint': endpoint,
+                'requests': len(values),
+                'queries_avg': sum(counts) / len(counts),
+                'queries_max': counts[-1],
+                'db_ms_total': sum(times),
+                'db_ms_p50': _percentile(times, 0.5),
+                'db_ms_p95': _percentile(times, 0.95),
+                'db_ms_max': times[-1],
+                'buckets': buckets,
+            })
+        rows.sort(key=lambda row: row['db_ms_total'], reverse=True)
+        return rows
+
+
+def get_query_stats(app=None):
+    return (app or current_app).extensions.get('query_stats')
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or 'query_stats' not in current_app.extensions:
+        return
+    elapsed = time.perf_counter() - context._query_start
+    g.db_query_count = g.get('db_query_count', 0) + 1
+    g.db_time = g.get('db_time', 0.0) + elapsed
+    if elapsed * 1000 >= current_app.config['SLOW_QUERY_MS']:
+        logger.warning('Slow query (%.1f ms) in %s: %s', elapsed * 1000, request.endpoint or request.path, statement)
+
+
+def init_query_stats(app):
+    app.extensions['query_stats'] = QueryStats(app.config.get('QUERY_STATS_WINDOW', 500))
+
+    @app.before_request
+    def _reset_query_stats():
+        g.db_query_count = 0
+        g.db_time = 0.0
+
+    @app.after_request
+    def _record_query_stats(response):
+        queries = g.get('db_query_count', 0)
+        db_ms = g.get('db_time', 0.0) * 1000
+        if request.endpoint and request.endpoint != 'static':
+            app.extensions['query_stats'].record(request.endpoint, queries, db_ms)
+        if app.debug:
+            response.headers['X-DB-Query-Count'] = str(queries)
+            response.headers['X-DB-Time-Ms'] = '%.1f' % db_ms
+        return response
@@ -0,0 +1,354 @@
+"""Product search: ranked, typo-tolerant matching on name and SKU.
+
+``get_search().search(q, limit, query)`` returns active product ids, best match first; with query (a
+Product query), only products it selects, so its filters apply before the limit. Matches are tiered:
+exact SKU, then prefix of the name or SKU, then prefix of a word in the name, then substring, then
+misspellings (trigram word similarity, as pg_trgm's word_similarity, of at least 0.3). Within a tier,
+products with more units sold over the last SEARCH_SALES_DAYS days come first, then the closer match.
+
+Backends (``SEARCH_BACKEND``, default ``auto``):
+- ``trigram``: PostgreSQL pg_trgm, served by GIN trigram indexes on products.name / products.sku.
+  The extension and indexes come from the migrations (``flask db upgrade``); start-up only checks
+  for them and logs an error when they are missing.
+- ``ngram``: an in-process trigram index for SQLite and tests. Loaded on first use and updated from
+  committed Product changes; changes made by other processes are picked up within
+  SEARCH_REFRESH_SECONDS.
+
+``search_results`` serves products.api_search: the JSON body and its ETag, cached per normalised
+query for SEARCH_CACHE_TTL seconds or until a commit touches a Product.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import case, event, func, literal, or_, select, text
+from sqlalchemy.orm import Session
+
+from app import db
+from app.cache import cache, invalidate_on_commit
+from app.models import DailyProductSales, Product
+
+logger = logging.getLogger(__name__)
+
+# Least word similarity for a misspelt match (pg_trgm.word_similarity_threshold is set to this)
+SIMILARITY_THRESHOLD = 0.3
+# Most matches the product list page pages through
+LIST_LIMIT = 500
+# Fields products.api_search can return (?fields= picks a subset)
+RESULT_FIELDS = ('id', 'name', 'sku', 'selling_price', 'stock_quantity')
+RESULTS_VERSION_KEY = 'search:version'
+
+
+def _words(value):
+    return re.findall(r'\w+', (value or '').lower())
+
+
+def trigrams(value):
+    """pg_trgm-style trigrams: per lower-cased word, padded with two spaces before and one after."""
+    grams = set()
+    for word in _words(value):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def word_similarity(q_grams, q_word_count, word_grams):
+    """Best similarity between the query and any run of as many consecutive words of the text."""
+    best = 0.0
+    for i in range(max(1, len(word_grams) - q_word_count + 1)):
+        best = max(best, similarity(q_grams, set().union(*word_grams[i:i + q_word_count])))
+    return best
+
+
+def relevance(q, name, sku, q_grams, name_words, sku_words):
+    """(tier 1-5, similarity), or None when the product does not match.
+
+    name_words / sku_words: trigram sets of each word of the name / SKU.
+    """
+    name, sku = (name or '').lower(), (sku or '').lower()
+    q_word_count = max(1, len(_words(q)))
+    sim = max(word_similarity(q_grams, q_word_count, name_words), word_similarity(q_grams, q_word_count, sku_words))
+    if sku and sku == q:
+        tier = 5
+    elif name.startswith(q) or (sku and sku.startswith(q)):
+        tier = 4
+    elif f' {q}' in f' {name}':
+        tier = 3
+    elif q in name or q in sku:
+        tier = 2
+    elif sim >= SIMILARITY_THRESHOLD:
+        tier = 1
+    else:
+        return None
+    return tier, sim
+
+
+def _sales_since(days):
+    return date.today() - timedelta(days=days)
+
+
+class NgramSearch:
+    """In-process trigram index over active products."""
+
+    def __init__(self, refresh_seconds=30, sales_days=30):
+        self.refresh_seconds = refresh_seconds
+        self.sales_days = sales_days
+        self._lock = threading.Lock()
+        self._docs = {}  # id -> (name, sku, trigrams per name word, trigrams per SKU word)
+        self._postings = defaultdict(set)  # trigram -> ids
+        self._sales = {}  # lower-cased product name -> units sold recently
+        self._synced_to = None  # newest products.updated_at seen
+        self._synced_at = None
+
+    def search(self, q, limit=15, query=None):
+        q = (q or '').strip().lower()
+        if not q:
+            return []
+        self._sync_if_stale()
+        q_grams = trigrams(q)
+        with self._lock:
+            if len(q) < 3 or not q_grams:
+                candidates = self._docs.keys()
+            else:
+                candidates = set()
+                for gram in q_grams:
+                    candidates |= self._postings.get(gram, set())
+                # A substring inside a word shares only its unpadded trigrams with the query; add those matches.
+                inner = [q[i:i + 3] for i in range(len(q) - 2)]
+                if all(gram in self._postings for gram in inner):
+                    candidates |= set.intersection(*(self._postings[gram] for gram in inner))
+            ranked = []
+            for product_id in candidates:
+                name, sku, name_words, sku_words = self._docs[product_id]
+                match = relevance(q, name, sku, q_grams, name_words, sku_words)
+                if match:
+                    tier, sim = match
+                    ranked.append((-tier, -self._sales.get(name.lower(), 0), -sim, name.lower(), product_id))
+        ranked.sort()
+        ids = [product_id for *_, product_id in ranked]
+        if query is not None and ids:
+            selected = {product_id for (product_id,) in query.filter(Product.id.in_(ids)).with_entities(Product.id)}
+            ids = [product_id for product_id in ids if product_id in selected]
+        return ids[:limit]
+
+    def apply(self, changes):
+        """changes: {product id: (name, sku, is_active) or None when deleted}."""
+        with self._lock:
+            if self._synced_at is None:
+                return  # not loaded yet; the first search loads everything
+            for product_id, row in changes.items():
+                self._remove(product_id)
+                if row is not None and row[2]:
+                    self._add(product_id, row[0], row[1])
+
+    def _add(self, product_id, name, sku):
+        name_words = [trigrams(word) for word in _words(name)]
+        sku_words = [trigrams(word) for word in _words(sku)]
+        self._docs[product_id] = (name or '', sku or '', name_words, sku_words)
+        for grams in name_words + sku_words:
+            for gram in grams:
+                self._postings[gram].add(product_id)
+
+    def _remove(self, product_id):
+        doc = self._docs.pop(product_id, None)
+        if doc is None:
+            return
+        for gram in set().union(*doc[2], *doc[3]):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def _sync_if_stale(self):
+        now = time.monotonic()
+        if self._synced_at is not None and now - self._synced_at < self.refresh_seconds:
+            return
+        query = db.session.query(Product.id, Product.name, Product.sku, Product.is_active, Product.updated_at)
+        if self._synced_to is not None:
+            # >=: rows sharing the newest timestamp may have been committed after the last sync
+            query = query.filter(Product.updated_at >= self._synced_to)
+        else:
+            query = query.filter(Product.is_active == True)  # noqa: E712
+        rows = query.all()
+        sales = dict(
+            db.session.query(func.lower(DailyProductSales.product_name), func.sum(DailyProductSales.quantity))
+            .filter(DailyProductSales.day >= _sales_since(self.sales_days))
+            .group_by(func.lower(DailyProductSales.product_name))
+        )
+        with self._lock:
+            for product_id, name, sku, is_active, updated_at in rows:
+                self._remove(product_id)
+                if is_active:
+                    self._add(product_id, name, sku)
+                if updated_at and (self._synced_to is None or updated_at > self._synced_to):
+                    self._synced_to = updated_at
+            self._sales = {name: int(units or 0) for name, units in sales.items()}
+            self._synced_at = now
+
+
+class TrigramSearch:
+    """PostgreSQL pg_trgm search; the filter is served by GIN trigram indexes."""
+
+    INDEXES = ('ix_products_name_trgm', 'ix_products_sku_trgm')
+
+    def __init__(self, sales_days=30):
+        self.sales_days = sales_days
+
+    @classmethod
+    def check_schema(cls, engine):
+        """(pg_trgm installed, names of missing INDEXES); read-only."""
+        with engine.connect() as conn:
+            installed = conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+            present = set(conn.execute(
+                text("SELECT indexname FROM pg_indexes WHERE tablename = 'products' AND indexname = ANY(:names)"),
+                {'names': list(cls.INDEXES)},
+            ).scalars())
+        return installed, [name for name in cls.INDEXES if name not in present]
+
+    def search(self, q, limit=15, query=None):
+        q = (q or '').strip().lower()
+        if not q:
+            return []
+        name = func.lower(Product.name)
+        sku = func.lower(func.coalesce(Product.sku, ''))
+        sim = func.greatest(func.word_similarity(q, Product.name), func.word_similarity(q, func.coalesce(Product.sku, '')))
+        tier = case(
+            (sku == q, 5),
+            (or_(name.startswith(q, autoescape=True), sku.startswith(q, autoescape=True)), 4),
+            ((literal(' ') + name).contains(' ' + q, autoescape=True), 3),
+            (or_(name.contains(q, autoescape=True), sku.contains(q, autoescape=True)), 2),
+            else_=1,
+        )
+        sales = (
+            db.session.query(
+                func.lower(DailyProductSales.product_name).label('name'),
+                func.sum(DailyProductSales.quantity).label('units'),
+            )
+            .filter(DailyProductSales.day >= _sales_since(self.sales_days))
+            .group_by(func.lower(DailyProductSales.product_name))
+            .subquery()
+        )
+        # Threshold of the <% operator below, for this transaction only
+        db.session.execute(
+            select(func.set_config('pg_trgm.word_similarity_threshold', str(SIMILARITY_THRESHOLD), True))
+        )
+        rows = (
+            (query if query is not None else Product.query).with_entities(Product.id)
+            .outerjoin(sales, sales.c.name == name)
+            .filter(
+                Product.is_active == True,  # noqa: E712
+                or_(
+                    Product.name.icontains(q, autoescape=True),
+                    Product.sku.icontains(q, autoescape=True),
+                    literal(q).op('<%')(Product.name),
+                    literal(q).op('<%')(Product.sku),
+                ),
+            )
+            .order_by(tier.desc(), func.coalesce(sales.c.units, 0).desc(), sim.desc(), name)
+            .limit(limit)
+        )
+        return [product_id for (product_id,) in rows]
+
+    def apply(self, changes):
+        pass  # the database indexes are always current
+
+
+def get_search(app=None):
+    return (app or current_app).extensions['search']
+
+
+def normalise_query(q):
+    return ' '.join((q or '').lower().split())
+
+
+def search_results(q, fields=RESULT_FIELDS, limit=15):
+    """(JSON body, ETag) of the best matches for q, as a list of objects with the given fields."""
+    q = normalise_query(q)
+    key = 'search:{}:{}:{}:{}'.format(cache.version(RESULTS_VERSION_KEY), limit, ','.join(fields), q)
+
+    def build():
+        ids = get_search().search(q, limit=limit)
+        # Plain column rows, no Product objects; the in-process index may lag behind deactivations.
+        rows = {
+            row.id: row for row in db.session.query(
+                Product.id, Product.name, Product.sku, Product.selling_price, Product.stock_quantity,
+            ).filter(Product.id.in_(ids), Product.is_active == True)  # noqa: E712
+        }
+        results = []
+        for product_id in ids:
+            row = rows.get(product_id)
+            if row is None:
+                continue
+            values = {
+                'id': row.id,
+                'name': row.name,
+                'sku': row.sku or '',
+                'selling_price': str(row.selling_price) if row.selling_price is not None else '0',
+                'stock_quantity': row.stock_quantity,
+            }
+            results.append({field: values[field] for field in fields})
+        body = json.dumps(results, separators=(',', ':')).encode('utf-8')
+        return body, hashlib.sha1(body).hexdigest()[:20]
+
+    return cache.get_or_set(key, current_app.config.get('SEARCH_CACHE_TTL', 10), build)
+
+
+# Results include stock and prices, so any committed product change starts a new cache generation.
+invalidate_on_commit(RESULTS_VERSION_KEY, Product)
+
+
+def init_search(app):
+    """Pick the search backend for the app's database (call after db.init_app)."""
+    backend = app.config.get('SEARCH_BACKEND', 'auto')
+    sales_days = app.config.get('SEARCH_SALES_DAYS', 30)
+    with app.app_context():
+        if backend == 'auto':
+            backend = 'trigram' if db.engine.dialect.name == 'postgresql' else 'ngram'
+        if backend == 'trigram':
+            installed, missing = TrigramSearch.check_schema(db.engine)
+            if not installed:
+                # Each worker then keeps its own copy of the index, up to SEARCH_REFRESH_SECONDS stale.
+                logger.error('pg_trgm is not installed; product search uses the in-process index. '
+                             'Run "flask db upgrade" as a role that may create extensions.')
+                backend = 'ngram'
+            elif missing:
+                logger.error('Product search indexes %s are missing, so search scans the products table. '
+                             'Run "flask db upgrade".', ', '.join(missing))
+    if backend == 'trigram':
+        app.extensions['search'] = TrigramSearch(sales_days)
+    else:
+        app.extensions['search'] = NgramSearch(app.config.get('SEARCH_REFRESH_SECONDS', 30), sales_days)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_product_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Product):
+            row = None if obj in session.deleted else (obj.name, obj.sku, obj.is_active)
+            session.info.setdefault('search_changes', {})[obj.id] = row
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_product_changes(session):
+    changes = session.info.pop('search_changes', None)
+    if changes and has_app_context() and 'search' in current_app.extensions:
+        current_app.extensions['search'].apply(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_product_changes(session):
+    session.info.pop('search_changes', None)
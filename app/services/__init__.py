@@ -5,6 +5,7 @@ from app.services.delivery_service import DeliveryService
 from app.services.product_service import ProductService
 from app.services.numbering_service import NumberingService
 from app.services.audit_service import AuditService
+from app.services.rollup_service import RollupService
 
 __all__ = [
     'OrderService',
@@ -13,4 +14,5 @@ __all__ = [
     'ProductService',
     'NumberingService',
     'AuditService',
+    'RollupService',
 ]
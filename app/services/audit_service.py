@@ -1,19 +1,166 @@
 """Audit logging service."""
-from flask import request
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import current_app, request
 from app import db
 from app.models import AuditLog
 
+logger = logging.getLogger(__name__)
+_writer_lock = threading.Lock()
+
+
+class AuditWriter:
+    """Bounded queue of audit rows bulk-inserted by a background thread.
+
+    Rows are flushed every ``flush_size`` entries or ``flush_interval`` seconds,
+    whichever comes first, and once more at interpreter shutdown. When the queue
+    is full new rows are dropped (and counted) rather than blocking the request.
+    """
+
+    def __init__(self, app, queue_size=10000, flush_size=100, flush_interval=0.5):
+        self.app = app
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._count_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Started lazily, and again after a fork, so pre-forking servers get one thread per worker.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def put(self, row):
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            with self._count_lock:
+                self.dropped += 1
+            return
+        with self._count_lock:
+            self.enqueued += 1
+
+    def _drain(self, block):
+        """Collect up to flush_size rows, waiting at most flush_interval for the first/next ones."""
+        rows = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(rows) < self.flush_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    rows.append(self.queue.get(timeout=timeout))
+                else:
+                    rows.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write(self, rows):
+        if not rows:
+            return
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(AuditLog.__table__.insert(), rows)
+            with self._count_lock:
+                self.flushed += len(rows)
+        except Exception:
+            with self._count_lock:
+                self.failed += len(rows)
+            logger.exception('Failed to write %d audit log rows', len(rows))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._write(self._drain(block=True))
+
+    def flush(self):
+        """Write everything currently queued from the calling thread."""
+        while True:
+            rows = self._drain(block=False)
+            if not rows:
+                break
+            self._write(rows)
+
+    def close(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        return {
+            'enqueued': self.enqueued,
+            'flushed': self.flushed,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'queued': self.queue.qsize(),
+        }
+
 
 class AuditService:
+    @staticmethod
+    def writer(app=None):
+        """Return the app's AuditWriter, or None when audit logging is synchronous."""
+        app = app or current_app._get_current_object()
+        if not app.config.get('AUDIT_ASYNC', False):
+            return None
+        writer = app.extensions.get('audit_writer')
+        if writer is None:
+            with _writer_lock:
+                writer = app.extensions.get('audit_writer')
+                if writer is None:
+                    writer = AuditWriter(
+                        app,
+                        queue_size=app.config.get('AUDIT_QUEUE_SIZE', 10000),
+                        flush_size=app.config.get('AUDIT_FLUSH_SIZE', 100),
+                        flush_interval=app.config.get('AUDIT_FLUSH_INTERVAL_MS', 500) / 1000.0,
+                    )
+                    app.extensions['audit_writer'] = writer
+                    atexit.register(writer.close)
+        return writer
+
     @staticmethod
     def log(action, entity_type=None, entity_id=None, details=None, user_id=None):
-        entry = AuditLog(
-            user_id=user_id,
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            details=details,
-            ip_address=request.remote_addr if request else None,
-        )
-        db.session.add(entry)
+        row = {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'action': action,
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'details': details,
+            'ip_address': request.remote_addr if request else None,
+            'created_at': datetime.utcnow(),
+        }
+        writer = AuditService.writer()
+        if writer is not None:
+            writer.put(row)
+            return
+        db.session.add(AuditLog(**row))
         db.session.commit()
+
+    @staticmethod
+    def stats():
+        writer = AuditService.writer()
+        return writer.stats() if writer is not None else None
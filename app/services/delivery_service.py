@@ -1,17 +1,32 @@
 """Delivery business logic."""
 from datetime import date, datetime
 from decimal import Decimal
+from sqlalchemy.orm import joinedload, selectinload
 from app import db
-from app.models import Delivery, DeliveryItem, Order, OrderItem
+from app.metrics import DELIVERIES_CREATED
+from app.models import Delivery, DeliveryItem, OrderItem
 from app.services.numbering_service import NumberingService
+from app.services.order_service import OrderService
 from app.services.audit_service import AuditService
 
 
 class DeliveryService:
+    @staticmethod
+    def get_delivery_with_items(delivery_id):
+        """Delivery with its lines, source order and assignee loaded up front (two queries)."""
+        return (
+            Delivery.query.options(
+                selectinload(Delivery.items),
+                joinedload(Delivery.order),
+                joinedload(Delivery.assigned_to_user),
+            )
+            .filter(Delivery.id == delivery_id).first_or_404()
+        )
+
     @staticmethod
     def create_from_order(order_id, customer_name, phone, delivery_address,
                           scheduled_date=None, assigned_to_id=None, notes=None, item_quantities=None):
-        order = Order.query.get_or_404(order_id)
+        order = OrderService.get_order_with_items(order_id)
         delivery_number = NumberingService.next_delivery_number()
         delivery = Delivery(
             delivery_number=delivery_number,
@@ -42,6 +57,7 @@ class DeliveryService:
         order.delivery_status = 'assigned'
         db.session.commit()
         AuditService.log('delivery.create', 'Delivery', delivery.id, delivery_number)
+        DELIVERIES_CREATED.inc()
         return delivery
 
     @staticmethod
@@ -71,4 +87,5 @@ class DeliveryService:
             db.session.add(di)
         db.session.commit()
         AuditService.log('delivery.create', 'Delivery', delivery.id, delivery_number)
+        DELIVERIES_CREATED.inc()
         return delivery
@@ -1,27 +1,79 @@
 """Order, quotation, and delivery number generation."""
+import os
+import threading
 from datetime import datetime
-from sqlalchemy import func
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
 from app import db
-from app.models import Order, Quotation, Delivery
+from app.models import Order, Quotation, Delivery, DocumentCounter
 from config import Config
 
+_blocks_lock = threading.Lock()
+
 
 class NumberingService:
+    """Document numbers from the ``document_counters`` table (one row per prefix and month).
+
+    On PostgreSQL each worker reserves ``NUMBER_BLOCK_SIZE`` numbers per round trip in its
+    own transaction; SQLite has a single writer, so numbers are taken in the caller's transaction.
+    """
+
+    @staticmethod
+    def _legacy_last(conn, prefix, date_part, model_class, number_column):
+        """Highest number already issued for the period before the counter row existed."""
+        column = getattr(model_class, number_column)
+        last = conn.execute(
+            select(column).where(column.like(f"{prefix}-{date_part}-%")).order_by(column.desc()).limit(1)
+        ).scalar()
+        return int(last.split("-")[-1]) if last else 0
+
+    @staticmethod
+    def _reserve_block(conn, prefix, date_part, size, model_class, number_column):
+        """Advance the counter by size on conn; returns (first, last) of the reserved range."""
+        table = DocumentCounter.__table__
+        row = (table.c.prefix == prefix) & (table.c.period == date_part)
+        result = conn.execute(table.update().where(row).values(last_value=table.c.last_value + size))
+        if result.rowcount == 0:
+            start = NumberingService._legacy_last(conn, prefix, date_part, model_class, number_column)
+            conn.execute(table.insert().values(prefix=prefix, period=date_part, last_value=start + size))
+            return start + 1, start + size
+        last = conn.execute(select(table.c.last_value).where(row)).scalar_one()
+        return last - size + 1, last
+
+    @staticmethod
+    def _reserve_isolated(prefix, date_part, size, model_class, number_column):
+        """Reserve a block in a separate transaction so it survives a caller rollback."""
+        for _ in range(3):
+            try:
+                with db.engine.begin() as conn:
+                    return NumberingService._reserve_block(conn, prefix, date_part, size, model_class, number_column)
+            except IntegrityError:
+                # Another worker created the counter row first; retry as an UPDATE.
+                continue
+        raise RuntimeError(f"Could not reserve document number for {prefix}-{date_part}")
+
     @staticmethod
     def _next_sequence(prefix, model_class, number_column, date_part):
-        pattern = f"{prefix}-{date_part}-%"
-        last = (
-            db.session.query(model_class)
-            .filter(getattr(model_class, number_column).like(pattern))
-            .order_by(getattr(model_class, number_column).desc())
-            .first()
-        )
-        if last:
-            parts = getattr(last, number_column).split("-")
-            seq = int(parts[-1]) + 1
-        else:
-            seq = 1
+        if db.session.get_bind().dialect.name == 'sqlite':
+            seq, _ = NumberingService._reserve_block(
+                db.session.connection(), prefix, date_part, 1, model_class, number_column
+            )
+            return f"{prefix}-{date_part}-{seq:04d}"
+
+        size = max(1, int(current_app.config.get('NUMBER_BLOCK_SIZE', Config.NUMBER_BLOCK_SIZE)))
+        # Keyed by pid so forked workers never share a block reserved before the fork.
+        blocks = current_app.extensions.setdefault('numbering_blocks', {})
+        key = (os.getpid(), prefix, date_part)
+        with _blocks_lock:
+            block = blocks.get(key)
+            if not block or block[0] > block[1]:
+                block = list(NumberingService._reserve_isolated(prefix, date_part, size, model_class, number_column))
+                blocks[key] = block
+            seq = block[0]
+            block[0] += 1
         return f"{prefix}-{date_part}-{seq:04d}"
 
     @staticmethod
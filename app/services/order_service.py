@@ -1,17 +1,65 @@
 """Order business logic."""
 from decimal import Decimal
 from datetime import date
+from sqlalchemy import case, update
+from sqlalchemy.orm import selectinload
 from app import db
+from app.metrics import ORDERS_CREATED
 from app.models import Order, OrderItem, Product
 from app.services.numbering_service import NumberingService
 from app.services.audit_service import AuditService
+from app.services.rollup_service import RollupService
 
 
 class OrderService:
+    @staticmethod
+    def _reserve_stock(items_data):
+        """Lock every referenced product and decrement stock in one conditional UPDATE.
+
+        Products are fetched in a single query ordered by id so concurrent orders
+        always take row locks in the same order. Returns {product_id: Product};
+        raises ValueError (after rollback) if any line is short.
+        """
+        needed = {}
+        for item in items_data:
+            product_id = item.get('product_id') or None
+            if product_id:
+                needed[product_id] = needed.get(product_id, 0) + int(item.get('quantity', 0))
+        if not needed:
+            return {}
+        products = (
+            Product.query.filter(Product.id.in_(needed.keys()))
+            .order_by(Product.id)
+            .with_for_update()
+            .all()
+        )
+        by_id = {p.id: p for p in products}
+        needed = {pid: qty for pid, qty in needed.items() if pid in by_id}
+        if not needed:
+            return by_id
+        qty_for = case(needed, value=Product.id)
+        result = db.session.execute(
+            update(Product)
+            .where(Product.id.in_(needed.keys()), Product.stock_quantity >= qty_for)
+            .values(stock_quantity=Product.stock_quantity - qty_for)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(needed):
+            db.session.rollback()
+            short = next(
+                (by_id[pid] for pid in sorted(needed) if by_id[pid].stock_quantity < needed[pid]),
+                None,
+            )
+            raise ValueError(f"Insufficient stock for {short.name if short else 'one or more items'}")
+        for p in products:
+            db.session.expire(p, ['stock_quantity'])
+        return by_id
+
     @staticmethod
     def create_order(customer_name, phone, email, items_data, discount=0, tax=0,
                     payment_method=None, payment_status='pending', order_status='pending',
                     notes=None, created_by_id=None):
+        products = OrderService._reserve_stock(items_data)
         order_number = NumberingService.next_order_number()
         order = Order(
             order_number=order_number,
@@ -40,14 +88,9 @@ class OrderService:
             product_id = item.get('product_id') or None
             is_manual = item.get('item_type') == 'manual_entry' or not product_id
             buying = Decimal('0')
-            if product_id:
-                p = Product.query.get(product_id)
-                if p:
-                    buying = p.buying_price if p.buying_price is not None else Decimal('0')
-                    p.stock_quantity -= qty
-                    if p.stock_quantity < 0:
-                        db.session.rollback()
-                        raise ValueError(f"Insufficient stock for {p.name}")
+            p = products.get(product_id) if product_id else None
+            if p and p.buying_price is not None:
+                buying = p.buying_price
 
             oi = OrderItem(
                 order_id=order.id,
@@ -67,9 +110,12 @@ class OrderService:
         order.tax = tax_amount
         order.grand_total = total - order.discount + tax_amount
         db.session.commit()
+        RollupService.refresh_day(order.order_date)
         AuditService.log('order.create', 'Order', order.id, order_number, created_by_id)
+        ORDERS_CREATED.inc()
         return order
 
     @staticmethod
     def get_order_with_items(order_id):
-        return Order.query.get_or_404(order_id)
+        """Order with its lines loaded up front (two queries, however many lines)."""
+        return Order.query.options(selectinload(Order.items)).filter(Order.id == order_id).first_or_404()
@@ -1,8 +1,33 @@
 """Product business logic."""
+import calendar
+from datetime import datetime
 from decimal import Decimal
+
+from sqlalchemy import func
+
 from app import db
+from app.cache import cache, invalidate_on_commit
 from app.models import Product
 
+# Fields of each catalogue row, in order
+CATALOGUE_FIELDS = ('id', 'name', 'sku', 'selling_price', 'stock_quantity')
+# Changes are always re-sent for this long before the requested version: updated_at is stamped at
+# flush, not commit, so a row can become visible after a newer one without moving the version
+CATALOGUE_OVERLAP_MS = 5000
+# Cache generation of the catalogue responses (ETags, cached snapshot); a new one starts after every
+# committed product change, whatever its updated_at
+CATALOGUE_GENERATION_KEY = 'catalogue:generation'
+
+
+def _version(updated_at):
+    """products.updated_at (naive UTC) as milliseconds since the epoch."""
+    return calendar.timegm(updated_at.utctimetuple()) * 1000 + updated_at.microsecond // 1000
+
+
+def _catalogue_row(row):
+    selling_price = str(row.selling_price) if row.selling_price is not None else '0'
+    return [row.id, row.name, row.sku or '', selling_price, row.stock_quantity]
+
 
 class ProductService:
     @staticmethod
@@ -25,3 +50,45 @@ class ProductService:
             Product.min_stock_level > 0,
             Product.stock_quantity <= Product.min_stock_level,
         ).all()
+
+    @staticmethod
+    def catalogue_version():
+        """Catalogue version: the newest products.updated_at, in ms; 0 for an empty table."""
+        latest = db.session.query(func.max(Product.updated_at)).scalar()
+        return _version(latest) if latest else 0
+
+    @staticmethod
+    def catalogue_generation():
+        """Token that changes whenever a product change commits; for ETags and cache keys."""
+        return cache.version(CATALOGUE_GENERATION_KEY)
+
+    @staticmethod
+    def catalogue_snapshot():
+        """Every active product as a CATALOGUE_FIELDS row, with the version it reflects."""
+        version = ProductService.catalogue_version()
+        rows = (
+            db.session.query(Product.id, Product.name, Product.sku, Product.selling_price, Product.stock_quantity)
+            .filter(Product.is_active == True)
+            .order_by(Product.name, Product.id)
+        )
+        return {'version': version, 'fields': CATALOGUE_FIELDS, 'products': [_catalogue_row(r) for r in rows]}
+
+    @staticmethod
+    def catalogue_changes(since):
+        """Products changed after version since: active ones as rows, deactivated ones as removed ids."""
+        version = ProductService.catalogue_version()
+        changes = {'version': version, 'fields': CATALOGUE_FIELDS, 'products': [], 'removed': []}
+        # No early return when since is current: a late commit can carry an older updated_at.
+        cutoff = datetime.utcfromtimestamp(max(since - CATALOGUE_OVERLAP_MS, 0) / 1000)
+        rows = db.session.query(
+            Product.id, Product.name, Product.sku, Product.selling_price, Product.stock_quantity, Product.is_active,
+        ).filter(Product.updated_at > cutoff)
+        for row in rows:
+            if row.is_active:
+                changes['products'].append(_catalogue_row(row))
+            else:
+                changes['removed'].append(row.id)
+        return changes
+
+
+invalidate_on_commit(CATALOGUE_GENERATION_KEY, Product)
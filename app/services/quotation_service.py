@@ -1,7 +1,9 @@
 """Quotation business logic and conversion to order."""
 from decimal import Decimal
 from datetime import date
+from sqlalchemy.orm import selectinload
 from app import db
+from app.metrics import QUOTATIONS_CREATED
 from app.models import Quotation, QuotationItem, Order, OrderItem, Product
 from app.services.numbering_service import NumberingService
 from app.services.order_service import OrderService
@@ -58,13 +60,21 @@ class QuotationService:
         quo.grand_total = total - quo.discount + tax_amount
         db.session.commit()
         AuditService.log('quotation.create', 'Quotation', quo.id, quotation_number, created_by_id)
+        QUOTATIONS_CREATED.inc()
         return quo
 
+    @staticmethod
+    def get_quotation_with_items(quotation_id):
+        """Quotation with its lines loaded up front (two queries, however many lines)."""
+        return (
+            Quotation.query.options(selectinload(Quotation.items))
+            .filter(Quotation.id == quotation_id).first_or_404()
+        )
+
     @staticmethod
     def update_quotation_items(quotation, items_data, discount=0, tax_percent=0):
         """Replace quotation line items and recompute totals. Does not commit."""
-        for qi in list(quotation.items):
-            db.session.delete(qi)
+        quotation.items.clear()
         total = Decimal('0')
         for item in items_data:
             qty = int(item.get('quantity', 0))
@@ -74,8 +84,7 @@ class QuotationService:
             total += subtotal
             product_id = item.get('product_id') or None
             is_manual = item.get('item_type') == 'manual_entry' or not product_id
-            qi = QuotationItem(
-                quotation_id=quotation.id,
+            quotation.items.append(QuotationItem(
                 product_id=product_id,
                 item_type=item.get('item_type', 'manual_entry'),
                 product_name=item.get('product_name', ''),
@@ -85,8 +94,7 @@ class QuotationService:
                 discount_percent=disc_pct,
                 subtotal=subtotal,
                 is_manual_entry=is_manual,
-            )
-            db.session.add(qi)
+            ))
         quotation.total_amount = total
         quotation.discount = Decimal(str(discount))
         tax_amount = total * (Decimal(str(tax_percent)) / 100) if tax_percent else Decimal('0')
@@ -95,16 +103,16 @@ class QuotationService:
 
     @staticmethod
     def convert_to_order(quotation_id, created_by_id=None):
-        quo = Quotation.query.get_or_404(quotation_id)
+        quo = QuotationService.get_quotation_with_items(quotation_id)
         if quo.status != 'accepted':
             quo.status = 'accepted'
+        product_ids = {qi.product_id for qi in quo.items if qi.product_id}
+        prices = dict(
+            db.session.query(Product.id, Product.selling_price).filter(Product.id.in_(product_ids))
+        ) if product_ids else {}
         items_data = []
         for qi in quo.items:
-            price = qi.unit_price
-            if qi.product_id:
-                p = Product.query.get(qi.product_id)
-                if p:
-                    price = p.selling_price
+            price = prices.get(qi.product_id, qi.unit_price)
             items_data.append({
                 'item_type': 'manual_entry' if qi.is_manual_entry else 'existing_product',
                 'product_id': qi.product_id,
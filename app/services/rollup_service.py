@@ -0,0 +1,81 @@
+"""Maintenance of the daily sales rollup tables."""
+import logging
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app import db
+from app.models import Order, OrderItem, DailySalesSummary, DailyProductSales
+
+logger = logging.getLogger(__name__)
+
+
+class RollupService:
+    """Rollup rows are recomputed per day from orders, so a refresh costs one day's orders."""
+
+    @staticmethod
+    def _day_filter(column, date_from=None, date_to=None):
+        filters = []
+        if date_from is not None:
+            filters.append(column >= date_from)
+        if date_to is not None:
+            filters.append(column <= date_to)
+        return filters
+
+    @staticmethod
+    def _rebuild(date_from=None, date_to=None):
+        summary = DailySalesSummary.__table__
+        products = DailyProductSales.__table__
+        order_filters = [Order.order_status != 'cancelled'] + RollupService._day_filter(Order.order_date, date_from, date_to)
+        db.session.execute(delete(summary).where(*RollupService._day_filter(summary.c.day, date_from, date_to)))
+        db.session.execute(delete(products).where(*RollupService._day_filter(products.c.day, date_from, date_to)))
+        db.session.execute(insert(summary).from_select(
+            ['day', 'order_count', 'revenue', 'paid_revenue'],
+            select(
+                Order.order_date,
+                func.count(Order.id),
+                func.coalesce(func.sum(Order.grand_total), 0),
+                func.coalesce(func.sum(case((Order.payment_status == 'paid', Order.grand_total), else_=0)), 0),
+            ).where(*order_filters).group_by(Order.order_date),
+        ))
+        db.session.execute(insert(products).from_select(
+            ['day', 'product_name', 'quantity', 'revenue', 'profit'],
+            select(
+                Order.order_date,
+                OrderItem.product_name,
+                func.coalesce(func.sum(OrderItem.quantity), 0),
+                func.coalesce(func.sum(OrderItem.subtotal), 0),
+                func.coalesce(func.sum((OrderItem.selling_price - OrderItem.buying_price) * OrderItem.quantity), 0),
+            ).join(Order, OrderItem.order_id == Order.id).where(*order_filters)
+            .group_by(Order.order_date, OrderItem.product_name),
+        ))
+
+    @staticmethod
+    def rebuild(date_from=None, date_to=None):
+        """Recompute rollups for a date range (all history when both bounds are None) and commit."""
+        for attempt in range(2):
+            try:
+                RollupService._rebuild(date_from, date_to)
+                db.session.commit()
+                return
+            except IntegrityError:
+                # A concurrent refresh of the same day inserted first; recompute once more.
+                db.session.rollback()
+                if attempt:
+                    raise
+
+    @staticmethod
+    def refresh_day(day):
+        """Bring one day's rollups in line with its orders. Call after the order change commits.
+
+        The order is already saved, so a failure is logged rather than raised (a 500 would make the
+        user submit the order again); `flask rollups rebuild --from DAY --to DAY` repairs the day.
+        """
+        if day is None:
+            return
+        try:
+            RollupService.rebuild(day, day)
+        except SQLAlchemyError:
+            db.session.rollback()
+            logger.exception('Rollup refresh for %s failed; run "flask rollups rebuild --from %s --to %s".',
+                             day, day, day)
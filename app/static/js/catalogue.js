@@ -0,0 +1,124 @@
+/*
+ * Product catalogue kept in the browser for the order and quotation forms.
+ *
+ * The snapshot from /products/api/catalogue is stored in localStorage and brought up to date with
+ * /products/api/catalogue/changes?since=<version>, so typing a product name is answered locally.
+ * Searches go to the server (products.api_search) while no catalogue is loaded, when it could not be
+ * refreshed for STALE_MS, and when nothing matches locally (the server also matches misspellings).
+ */
+(function (window) {
+    'use strict';
+
+    var STORAGE_KEY = 'productCatalogue.v1';
+    var STALE_MS = 60 * 1000;
+
+    function ProductCatalogue(urls) {
+        this.urls = urls;  // {snapshot, changes, search}
+        this.version = null;
+        this.byId = {};
+        this.refreshedAt = 0;
+        this.pending = null;
+        this.load();
+    }
+
+    ProductCatalogue.prototype.load = function () {
+        try {
+            var stored = JSON.parse(window.localStorage.getItem(STORAGE_KEY) || 'null');
+            if (stored && stored.version != null) {
+                this.version = stored.version;
+                this.upsert(stored.fields, stored.products);
+            }
+        } catch (e) {}
+    };
+
+    ProductCatalogue.prototype.save = function () {
+        var ids = Object.keys(this.byId), byId = this.byId;
+        var products = ids.map(function (id) {
+            var p = byId[id];
+            return [p.id, p.name, p.sku, p.selling_price, p.stock_quantity];
+        });
+        try {
+            window.localStorage.setItem(STORAGE_KEY, JSON.stringify({
+                version: this.version,
+                fields: ['id', 'name', 'sku', 'selling_price', 'stock_quantity'],
+                products: products
+            }));
+        } catch (e) {}  // quota exceeded or storage disabled: keep it in memory only
+    };
+
+    ProductCatalogue.prototype.upsert = function (fields, rows) {
+        var byId = this.byId;
+        rows.forEach(function (row) {
+            var p = {};
+            fields.forEach(function (field, i) { p[field] = row[i]; });
+            p._name = String(p.name).toLowerCase();
+            p._sku = String(p.sku || '').toLowerCase();
+            byId[p.id] = p;
+        });
+    };
+
+    ProductCatalogue.prototype.fresh = function () {
+        return this.version != null && Date.now() - this.refreshedAt < STALE_MS;
+    };
+
+    // Fetch the changes since the stored version (or the whole snapshot); resolves when done.
+    ProductCatalogue.prototype.refresh = function () {
+        if (this.pending) return this.pending;
+        var self = this;
+        var url = this.version == null
+            ? this.urls.snapshot
+            : this.urls.changes + '?since=' + encodeURIComponent(this.version);
+        this.pending = fetch(url, {credentials: 'same-origin'})
+            .then(function (r) {
+                if (!r.ok) throw new Error('catalogue ' + r.status);
+                return r.json();
+            })
+            .then(function (data) {
+                if (self.version == null) self.byId = {};
+                self.upsert(data.fields, data.products);
+                (data.removed || []).forEach(function (id) { delete self.byId[id]; });
+                self.version = data.version;
+                self.refreshedAt = Date.now();
+                self.save();
+            })
+            .catch(function () {})
+            .then(function () { self.pending = null; });
+        return this.pending;
+    };
+
+    // Same tiers as the server: exact SKU, name/SKU prefix, word prefix, substring.
+    ProductCatalogue.prototype.searchLocal = function (q, limit) {
+        q = q.toLowerCase().replace(/\s+/g, ' ').trim();
+        var matches = [];
+        Object.keys(this.byId).forEach(function (id) {
+            var p = this.byId[id], tier = 0;
+            if (p._sku && p._sku === q) tier = 5;
+            else if (p._name.indexOf(q) === 0 || (p._sku && p._sku.indexOf(q) === 0)) tier = 4;
+            else if ((' ' + p._name).indexOf(' ' + q) !== -1) tier = 3;
+            else if (p._name.indexOf(q) !== -1 || p._sku.indexOf(q) !== -1) tier = 2;
+            if (tier) matches.push([tier, p]);
+        }, this);
+        matches.sort(function (a, b) {
+            return b[0] - a[0] || (a[1]._name < b[1]._name ? -1 : a[1]._name > b[1]._name ? 1 : 0);
+        });
+        return matches.slice(0, limit || 15).map(function (m) { return m[1]; });
+    };
+
+    ProductCatalogue.prototype.searchServer = function (q) {
+        var url = this.urls.search + (this.urls.search.indexOf('?') === -1 ? '?' : '&') + 'q=' + encodeURIComponent(q);
+        return fetch(url, {credentials: 'same-origin'})
+            .then(function (r) { return r.json(); });
+    };
+
+    // Resolves to [{id, name, sku, selling_price, stock_quantity}, ...], best match first.
+    ProductCatalogue.prototype.search = function (q, limit) {
+        if (!this.fresh()) {
+            this.refresh();
+            return this.searchServer(q);
+        }
+        var local = this.searchLocal(q, limit);
+        return local.length ? Promise.resolve(local) : this.searchServer(q);
+    };
+
+    window.ProductCatalogue = ProductCatalogue;
+})(window);
@@ -0,0 +1 @@
+"""Micro-benchmarks. Run a module directly, e.g. ``python -m benchmarks.bench_create_order``."""
@@ -0,0 +1,47 @@
+"""OrderService.create_order latency and query count against order line count.
+
+Product lookup and stock decrement are set-based, so the number of statements
+should stay flat as lines grow; only the OrderItem INSERTs scale with lines.
+
+    python -m benchmarks.bench_create_order
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_create_order
+"""
+from benchmarks.common import QueryCounter, make_app, median, timer
+
+from app import db
+from app.models import Product
+from app.services import OrderService
+
+LINE_COUNTS = (1, 5, 20, 60, 120)
+REPEATS = 5
+
+
+def main():
+    app = make_app()
+    with app.app_context():
+        products = [
+            Product(name=f'Bench {i}', sku=f'BENCH-{i}', stock_quantity=10 ** 6, buying_price=5, selling_price=10)
+            for i in range(max(LINE_COUNTS))
+        ]
+        db.session.add_all(products)
+        db.session.commit()
+        ids = [(p.id, p.name) for p in products]
+
+        print(f"{'lines':>6} {'median ms':>10} {'queries':>8}")
+        for lines in LINE_COUNTS:
+            items = [
+                {'item_type': 'existing_product', 'product_id': pid, 'product_name': name,
+                 'quantity': 1, 'selling_price': '10'}
+                for pid, name in ids[:lines]
+            ]
+            samples = []
+            for _ in range(REPEATS):
+                result = {}
+                with QueryCounter(db.engine) as qc, timer(result):
+                    OrderService.create_order('Bench', None, None, items)
+                samples.append(result['seconds'])
+            print(f'{lines:>6} {median(samples) * 1000:>10.2f} {qc.count:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Peak Python memory of the streaming sales-report Excel export against row count.
+
+Rows are fetched with yield_per and written by openpyxl in write-only mode, so the
+traced peak should stay roughly flat from 10k to 150k orders.
+
+    python -m benchmarks.bench_excel_export
+"""
+import tracemalloc
+import uuid
+from datetime import date
+
+from benchmarks.common import make_app, timer
+
+from app import db
+from app.blueprints.reports.routes import _export_excel
+from app.models import Order
+
+ROW_COUNTS = (10000, 50000, 150000)
+
+
+def _seed(total):
+    have = Order.query.count()
+    today = date.today()
+    rows = [
+        {'id': str(uuid.uuid4()), 'order_number': f'BENCH-{i:07d}', 'customer_name': f'Customer {i}',
+         'order_date': today, 'grand_total': 100, 'total_amount': 100, 'discount': 0, 'tax': 0,
+         'payment_status': 'paid', 'payment_method': 'cash', 'order_status': 'completed'}
+        for i in range(have, total)
+    ]
+    for start in range(0, len(rows), 10000):
+        db.session.execute(Order.__table__.insert(), rows[start:start + 10000])
+    db.session.commit()
+
+
+def main():
+    app = make_app()
+    today = date.today()
+    print(f"{'rows':>8} {'seconds':>8} {'peak MiB':>9} {'xlsx KiB':>9}")
+    with app.app_context():
+        for total in ROW_COUNTS:
+            _seed(total)
+            db.session.expunge_all()
+            with app.test_request_context():
+                result = {}
+                tracemalloc.start()
+                with timer(result):
+                    resp = _export_excel('sales', today, today, str(today), str(today))
+                    size = sum(len(chunk) for chunk in resp.response)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            print(f'{total:>8} {result["seconds"]:>8.2f} {peak / 2 ** 20:>9.2f} {size / 1024:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
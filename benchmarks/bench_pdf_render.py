@@ -0,0 +1,60 @@
+"""Per-document render time of the invoice, receipt, quotation and delivery note PDFs.
+
+Styles, the decoded logo and the header flowables come from app.pdf_toolkit and are
+built once per process; the "cold" column clears those caches before every document,
+which is what each render used to pay.
+
+    python -m benchmarks.bench_pdf_render
+"""
+from benchmarks.common import make_app, median, timer
+
+from app import pdf_toolkit
+from app.blueprints.deliveries.routes import _build_delivery_report_pdf
+from app.blueprints.orders.routes import _build_order_invoice_pdf, _build_receipt_pdf_a4, _build_receipt_pdf_thermal
+from app.blueprints.quotations.routes import _build_quotation_pdf
+from app.services import DeliveryService, OrderService, QuotationService
+
+REPEATS = 30
+LINES = 8
+
+
+def _sample(build, entity, cold):
+    samples = []
+    for _ in range(REPEATS):
+        if cold:
+            pdf_toolkit.reset()
+        result = {}
+        with timer(result):
+            build(entity)
+        samples.append(result['seconds'])
+    return median(samples)
+
+
+def main():
+    app = make_app()
+    with app.app_context(), app.test_request_context():
+        items = [
+            {'item_type': 'manual_entry', 'product_name': f'Line {i}', 'quantity': 2, 'selling_price': '15'}
+            for i in range(LINES)
+        ]
+        order = OrderService.create_order('Bench Customer', '0700000000', None, items)
+        quotation = QuotationService.create_quotation('Bench Customer', '0700000000', None, None, items)
+        delivery = DeliveryService.create_from_order(order.id, 'Bench Customer', '0700000000', 'Somewhere')
+
+        cases = [
+            ('invoice', _build_order_invoice_pdf, order),
+            ('receipt a4', _build_receipt_pdf_a4, order),
+            ('receipt thermal', _build_receipt_pdf_thermal, order),
+            ('quotation', _build_quotation_pdf, quotation),
+            ('delivery note', _build_delivery_report_pdf, delivery),
+        ]
+        print(f"{'document':>16} {'cold ms':>9} {'warm ms':>9} {'saved':>7}")
+        for name, build, entity in cases:
+            build(entity)
+            cold = _sample(build, entity, cold=True)
+            warm = _sample(build, entity, cold=False)
+            print(f'{name:>16} {cold * 1000:>9.2f} {warm * 1000:>9.2f} {(1 - warm / cold) * 100:>6.1f}%')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Connection checkout overhead under concurrent load, per pool setting.
+
+THREADS threads each run CHECKOUTS short transactions (checkout, SELECT 1, return) against
+an engine built from the app's pool settings (app.db_pool.engine_options). ``--rtt-ms`` adds a
+simulated network round trip to every ping and statement, as seen against a remote database;
+point BENCH_DATABASE_URL at the real one to measure it instead.
+
+    python -m benchmarks.bench_pool_checkout [--rtt-ms 20] [--threads 16]
+"""
+import argparse
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+
+from benchmarks.common import make_app
+
+from app.db_pool import engine_options
+
+CHECKOUTS = 50
+
+VARIANTS = [
+    ('pre-ping, pool 5+10', {'DB_POOL_PRE_PING': True, 'DB_POOL_SIZE': 5, 'DB_MAX_OVERFLOW': 10}),
+    ('recycle, pool 5+10', {'DB_POOL_PRE_PING': False, 'DB_POOL_SIZE': 5, 'DB_MAX_OVERFLOW': 10}),
+    ('recycle, pool 2+0', {'DB_POOL_PRE_PING': False, 'DB_POOL_SIZE': 2, 'DB_MAX_OVERFLOW': 0}),
+    ('recycle, pool 16+0', {'DB_POOL_PRE_PING': False, 'DB_POOL_SIZE': 16, 'DB_MAX_OVERFLOW': 0}),
+]
+
+
+def _engine(app, overrides, rtt):
+    # app.config already holds the app's resolved options; rebuild them from the DB_* settings alone.
+    settings = dict(app.config, SQLALCHEMY_ENGINE_OPTIONS={}, **overrides)
+    options = engine_options(settings)
+    engine = create_engine(settings['SQLALCHEMY_DATABASE_URI'], **options)
+    if rtt:
+        do_ping = engine.dialect.do_ping
+
+        def slow_ping(dbapi_connection):
+            time.sleep(rtt)
+            return do_ping(dbapi_connection)
+
+        engine.dialect.do_ping = slow_ping
+        event.listen(engine, 'before_cursor_execute', lambda *args: time.sleep(rtt))
+    return engine
+
+
+def _worker(engine, checkout_times):
+    for _ in range(CHECKOUTS):
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            checkout_times.append(time.perf_counter() - start)
+            conn.exec_driver_sql('SELECT 1')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt-ms', type=float, default=20)
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+
+    app = make_app()
+    # Mean and max rather than percentiles: a thread returning a connection usually takes it straight
+    # back, so with a small pool a few checkouts wait very long while most do not wait at all.
+    print(f"{'variant':>20} {'checkout mean ms':>17} {'checkout max ms':>16} {'tx/s':>8}")
+    for name, overrides in VARIANTS:
+        engine = _engine(app, overrides, args.rtt_ms / 1000)
+        checkout_times = []
+        threads = [threading.Thread(target=_worker, args=(engine, checkout_times)) for _ in range(args.threads)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+        mean = sum(checkout_times) / len(checkout_times)
+        print(f'{name:>20} {mean * 1000:>17.2f} {max(checkout_times) * 1000:>16.2f} '
+              f'{len(checkout_times) / elapsed:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
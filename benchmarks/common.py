@@ -0,0 +1,56 @@
+"""Shared helpers for benchmarks: app bootstrap, query counting, timing."""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+# Benchmarks run against BENCH_DATABASE_URL (e.g. a scratch Postgres) or a throwaway SQLite file.
+_db_file = os.path.join(tempfile.mkdtemp(prefix='sales-bench-'), 'bench.db')
+os.environ['TEST_DATABASE_URL'] = os.environ.get('BENCH_DATABASE_URL') or 'sqlite:///' + _db_file
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+
+
+def make_app():
+    """Create a testing app with a fresh schema."""
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+class QueryCounter:
+    """Counts statements executed on the engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+@contextmanager
+def timer(result):
+    """Store elapsed seconds in result['seconds']."""
+    start = time.perf_counter()
+    yield result
+    result['seconds'] = time.perf_counter() - start
+
+
+def median(values):
+    values = sorted(values)
+    n = len(values)
+    mid = n // 2
+    return values[mid] if n % 2 else (values[mid - 1] + values[mid]) / 2
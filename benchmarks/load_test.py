@@ -0,0 +1,134 @@
+"""Throughput of the production server (gunicorn.conf.py) as the worker count grows.
+
+Starts ``gunicorn wsgi:app`` once per worker count against the benchmark database and drives
+it with concurrent logged-in clients for a fixed time. Each client loops over the orders list,
+an order detail page and an uncached invoice PDF, the CPU-heavy request that used to stall
+every other user on the single-process dev server.
+
+    python -m benchmarks.load_test [--workers 1,2,4] [--threads 1] [--clients 16] [--seconds 10]
+"""
+import argparse
+import http.cookiejar
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from benchmarks.common import make_app, median
+
+from app import db
+from app.models import User
+from app.services import OrderService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _seed():
+    app = make_app()
+    with app.app_context():
+        user = User(username='bench', email='bench@example.com', full_name='Bench', role='admin')
+        user.set_password('bench123')
+        db.session.add(user)
+        db.session.commit()
+        items = [
+            {'item_type': 'manual_entry', 'product_name': f'Line {i}', 'quantity': 2, 'selling_price': '15'}
+            for i in range(8)
+        ]
+        return [OrderService.create_order(f'Customer {n}', None, None, items).id for n in range(20)]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _start_server(workers, threads, port):
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        WEB_THREADS=str(threads),
+        PORT=str(port),
+        PDF_CACHE_ENABLED='false',
+        CACHE_BACKEND='filesystem',
+        CACHE_DIR=os.path.join(tempfile.gettempdir(), f'bench-cache-{port}'),
+        PYTHONPATH=ROOT,
+    )
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/readyz', timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError('gunicorn did not become ready')
+
+
+def _client(base, order_ids, stop, latencies, errors):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    login = urllib.parse.urlencode({'username': 'bench', 'password': 'bench123'}).encode()
+    opener.open(base + '/auth/login', data=login, timeout=30).read()
+    paths = ['/orders/'] + [p for oid in order_ids for p in (f'/orders/{oid}', f'/orders/{oid}/pdf')]
+    i = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            opener.open(base + paths[i % len(paths)], timeout=30).read()
+            latencies.append(time.perf_counter() - start)
+        except OSError:
+            errors.append(1)
+        i += 1
+
+
+def _run(base, order_ids, clients, seconds):
+    stop = threading.Event()
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=_client, args=(base, order_ids[n::clients] or order_ids, stop, latencies, errors))
+        for n in range(clients)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    order_ids = _seed()
+    print(f"{'workers':>7} {'threads':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>6}")
+    for workers in (int(w) for w in args.workers.split(',')):
+        port = _free_port()
+        proc = _start_server(workers, args.threads, port)
+        try:
+            latencies, errors = _run(f'http://127.0.0.1:{port}', order_ids, args.clients, args.seconds)
+        finally:
+            proc.terminate()
+            proc.wait()
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+        print(f'{workers:>7} {args.threads:>7} {len(latencies) / args.seconds:>8.1f} '
+              f'{median(latencies) * 1000 if latencies else 0:>8.1f} {p95 * 1000:>8.1f} {errors:>6}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Gunicorn settings for production: ``gunicorn wsgi:app`` (picked up from the working directory).
+
+Tuned through environment variables:
+- WEB_CONCURRENCY: worker processes (default 2 x CPUs + 1, at most 8)
+- WEB_THREADS: threads per worker (default 4; 1 uses plain sync workers)
+- WEB_PRELOAD: import the app once in the master so workers share its memory (default true)
+- WEB_MAX_REQUESTS / WEB_MAX_REQUESTS_JITTER: recycle a worker after about this many requests (default 1000 / 100)
+- WEB_TIMEOUT / WEB_GRACEFUL_TIMEOUT: seconds before a stuck worker is killed / in-flight requests may finish (60 / 30)
+- PORT: listen port (default 5000)
+"""
+import multiprocessing
+import os
+
+bind = '0.0.0.0:{}'.format(os.environ.get('PORT', '5000'))
+workers = int(os.environ.get('WEB_CONCURRENCY', min(2 * multiprocessing.cpu_count() + 1, 8)))
+# The app checks the worker count against its cache backend (app.cache); publish the resolved value.
+os.environ['WEB_CONCURRENCY'] = str(workers)
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = os.environ.get('WEB_PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers gradually (jitter keeps them from restarting together) to cap memory growth.
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+# Worker heartbeat files on tmpfs; a container's overlay filesystem can stall them.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+
+def on_starting(server):
+    # Prometheus counters restart from zero with the server; drop the previous run's files (see app.metrics).
+    metrics_dir = os.environ.get('METRICS_DIR')
+    if metrics_dir and os.path.isdir(metrics_dir):
+        for name in os.listdir(metrics_dir):
+            try:
+                os.remove(os.path.join(metrics_dir, name))
+            except OSError:
+                pass
+
+
+def post_fork(server, worker):
+    # A preloaded app may hold pooled connections opened in the master; sockets must not be shared.
+    if not server.cfg.preload_app:
+        return
+    from app import db
+    from wsgi import app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,81 @@
+"""Indexes for list, dashboard and report queries
+
+The tables themselves are created by db.create_all() at startup, which also creates these
+indexes on a new database but does not add them to existing tables; this revision does.
+Indexes that already exist are skipped. On PostgreSQL they are built CONCURRENTLY so writes
+are not blocked while a large table is indexed. PostgreSQL also gets the pg_trgm extension and the
+GIN trigram indexes behind product search (app.search.TrigramSearch); creating the extension
+needs a role allowed to, e.g. the database owner.
+
+Revision ID: a81d195cb0c9
+Revises: 
+Create Date: 2026-10-17 06:59:09.757207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a81d195cb0c9'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_ORDERS = "order_status <> 'cancelled'"
+
+# (name, table, columns, partial index condition)
+INDEXES = [
+    ('ix_orders_created_at_id', 'orders', ['created_at', 'id'], None),
+    ('ix_orders_status_created_at', 'orders', ['order_status', 'created_at', 'id'], None),
+    ('ix_orders_payment_created_at', 'orders', ['payment_status', 'created_at', 'id'], None),
+    ('ix_orders_order_date_number', 'orders', ['order_date', 'order_number'], None),
+    ('ix_orders_active_created_at', 'orders', ['created_at'], ACTIVE_ORDERS),
+    ('ix_order_items_order_id', 'order_items', ['order_id'], None),
+    ('ix_order_items_product_id', 'order_items', ['product_id'], None),
+    ('ix_quotations_created_at_id', 'quotations', ['created_at', 'id'], None),
+    ('ix_deliveries_status_created_at', 'deliveries', ['status', 'created_at'], None),
+    ('ix_deliveries_assigned_to_id', 'deliveries', ['assigned_to_id'], None),
+    ('ix_deliveries_created_at', 'deliveries', ['created_at'], None),
+    ('ix_deliveries_schedule', 'deliveries',
+     [sa.text("coalesce(scheduled_date, '0001-01-01')"), 'created_at', 'id'], None),
+    ('ix_audit_logs_created_at_id', 'audit_logs', ['created_at', 'id'], None),
+    ('ix_products_updated_at', 'products', ['updated_at'], None),
+]
+
+# PostgreSQL only: (name, column) with gin_trgm_ops
+TRIGRAM_INDEXES = [
+    ('ix_products_name_trgm', 'name'),
+    ('ix_products_sku_trgm', 'sku'),
+]
+
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    for name, table, columns, where in INDEXES:
+        kwargs = {}
+        if where:
+            kwargs = {'postgresql_where': sa.text(where), 'sqlite_where': sa.text(where)}
+        if postgresql:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True, **kwargs)
+        else:
+            op.create_index(name, table, columns, if_not_exists=True, **kwargs)
+    if postgresql:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, column in TRIGRAM_INDEXES:
+            with op.get_context().autocommit_block():
+                op.create_index(
+                    name, 'products', [column], if_not_exists=True, postgresql_concurrently=True,
+                    postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, _ in TRIGRAM_INDEXES:
+            op.drop_index(name, table_name='products', if_exists=True)
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
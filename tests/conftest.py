@@ -1,3 +1,68 @@
 """Pytest configuration and fixtures."""
 import os
+from contextlib import contextmanager
 os.environ.setdefault('FLASK_ENV', 'testing')
+
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def runner(app):
+    return app.test_cli_runner()
+
+
+@pytest.fixture
+def app_ctx(app):
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def db_ctx(app, app_ctx):
+    db.create_all()
+    yield
+    db.session.remove()
+    db.drop_all()
+
+
+@pytest.fixture
+def admin_client(client, db_ctx):
+    """Test client logged in as an admin user."""
+    from app.models import User
+    user = User(username='admin', email='admin@example.com', full_name='Admin', role='admin')
+    user.set_password('admin123')
+    db.session.add(user)
+    db.session.commit()
+    client.post('/auth/login', data={'username': 'admin', 'password': 'admin123'})
+    return client
+
+
+@pytest.fixture
+def count_queries(db_ctx):
+    """`with count_queries() as queries:` collects the SQL statements executed inside the block."""
+    @contextmanager
+    def counter():
+        queries = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            queries.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield queries
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    return counter
@@ -0,0 +1,40 @@
+"""AuditService tests (synchronous mode and the background writer)."""
+import time
+
+from app import db
+from app.models import AuditLog
+from app.services import AuditService
+from app.services.audit_service import AuditWriter
+
+
+def test_sync_mode_writes_immediately(db_ctx):
+    AuditService.log('product.create', 'Product', 'p1', 'Widget')
+    assert AuditService.writer() is None
+    assert AuditLog.query.filter_by(action='product.create').count() == 1
+
+
+def test_async_writer_flushes_in_background(app, db_ctx):
+    app.config.update(AUDIT_ASYNC=True, AUDIT_FLUSH_SIZE=5, AUDIT_FLUSH_INTERVAL_MS=20)
+    writer = AuditService.writer()
+    for i in range(12):
+        AuditService.log('order.create', 'Order', str(i))
+    deadline = time.monotonic() + 5
+    while writer.stats()['flushed'] < 12 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.close()
+    assert writer.stats()['flushed'] == 12
+    assert AuditLog.query.filter_by(action='order.create').count() == 12
+
+
+def test_writer_drops_when_full_and_flushes_on_close(app, db_ctx):
+    writer = AuditWriter(app, queue_size=3, flush_size=10, flush_interval=0.01)
+    writer._ensure_started = lambda: None  # keep rows queued until close()
+    for i in range(5):
+        writer.put({'id': 'a%d' % i, 'action': 'x'})
+    assert writer.stats()['dropped'] == 2
+    assert AuditLog.query.count() == 0
+    writer.close()
+    stats = writer.stats()
+    assert stats['flushed'] == 3 and stats['queued'] == 0
+    db.session.expire_all()
+    assert AuditLog.query.count() == 3
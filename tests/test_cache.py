@@ -0,0 +1,50 @@
+"""Cache backend and dashboard snapshot invalidation tests."""
+import time
+from datetime import date
+
+from app import db
+from app.blueprints.dashboard.routes import DASHBOARD_CACHE_KEY
+from app.cache import cache, FileSystemBackend, SimpleBackend
+from app.metrics import CACHE_LOOKUPS
+from app.models import Order, Product
+from app.services import RollupService
+
+
+def _lookups():
+    return CACHE_LOOKUPS.values.get(('hit',), 0), CACHE_LOOKUPS.values.get(('miss',), 0)
+
+
+def test_backends_expire_entries(tmp_path):
+    for backend in (SimpleBackend(), FileSystemBackend(str(tmp_path))):
+        backend.set('k', {'v': 1}, ttl=60)
+        assert backend.get('k') == {'v': 1}
+        backend.set('short', 1, ttl=0.01)
+        time.sleep(0.02)
+        assert backend.get('short') is None
+        backend.delete('k')
+        assert backend.get('k') is None
+
+
+def test_dashboard_snapshot_cached_and_invalidated_on_commit(admin_client):
+    cache.clear()
+    hits, misses = _lookups()
+    assert b'Scarce' not in admin_client.get('/').data
+    admin_client.get('/')
+    assert (_lookups()[0] - hits, _lookups()[1] - misses) == (1, 1)
+
+    db.session.add(Product(name='Scarce', stock_quantity=0, min_stock_level=5))
+    db.session.commit()
+    assert b'Scarce' in admin_client.get('/').data
+    assert _lookups()[1] - misses == 2
+    assert b'cache_lookups_total{result="miss"}' in admin_client.get('/metrics').data
+
+
+def test_rollup_refresh_drops_snapshot_cached_after_order_commit(admin_client):
+    order = Order(order_number='O-1', customer_name='C', order_date=date.today(), grand_total=25)
+    db.session.add(order)
+    db.session.commit()
+    # A dashboard load between the order commit and the rollup refresh caches the old figures.
+    admin_client.get('/')
+    assert cache.get(DASHBOARD_CACHE_KEY) is not None
+    RollupService.refresh_day(order.order_date)
+    assert cache.get(DASHBOARD_CACHE_KEY) is None
@@ -0,0 +1,72 @@
+"""Product catalogue snapshot and delta endpoint tests."""
+import gzip
+import json
+from datetime import datetime
+
+from app import db
+from app.models import Product
+
+
+def _add(name, sku, price=10, active=True):
+    product = Product(name=name, sku=sku, selling_price=price, stock_quantity=5, is_active=active)
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+def test_snapshot_gzip_and_etag(admin_client):
+    pen = _add('Pen', 'P-1', '1.50')
+    _add('Old Pen', 'P-0', active=False)
+    response = admin_client.get('/products/api/catalogue', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    data = json.loads(gzip.decompress(response.data))
+    assert data['fields'] == ['id', 'name', 'sku', 'selling_price', 'stock_quantity']
+    assert data['products'] == [[pen.id, 'Pen', 'P-1', '1.50', 5]]
+    assert data['version'] > 0
+
+    again = admin_client.get('/products/api/catalogue', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_changes_since_version(admin_client):
+    pen = _add('Pen', 'P-1')
+    ruler = _add('Ruler', 'R-1')
+    version = admin_client.get('/products/api/catalogue').get_json()['version']
+    # Rows within CATALOGUE_OVERLAP_MS of the version are re-sent even when nothing changed.
+    unchanged = admin_client.get(f'/products/api/catalogue/changes?since={version}').get_json()
+    assert unchanged['version'] == version and {row[0] for row in unchanged['products']} == {pen.id, ruler.id}
+
+    pen.selling_price = 2
+    ruler.is_active = False
+    db.session.commit()
+    eraser = _add('Eraser', 'E-1')
+    changes = admin_client.get(f'/products/api/catalogue/changes?since={version}').get_json()
+    assert changes['version'] > version
+    rows = {row[0]: row for row in changes['products']}
+    assert rows[pen.id][3] == '2.00' and eraser.id in rows
+    assert changes['removed'] == [ruler.id]
+
+
+def test_late_commit_with_older_updated_at(admin_client):
+    """A change committed after a newer one, but stamped before it, still reaches clients."""
+    pen = _add('Pen', 'P-1')
+    ruler = _add('Ruler', 'R-1')
+    ruler.updated_at = datetime(2026, 1, 1, 12, 0, 0)
+    pen.updated_at = datetime(2026, 1, 1, 11, 59, 59)
+    db.session.commit()
+    snapshot = admin_client.get('/products/api/catalogue')
+    version = snapshot.get_json()['version']
+    url = f'/products/api/catalogue/changes?since={version}'
+    before = admin_client.get(url)
+
+    pen.selling_price = 3
+    pen.updated_at = datetime(2026, 1, 1, 11, 59, 59, 950000)
+    db.session.commit()
+
+    changes = admin_client.get(url, headers={'If-None-Match': before.headers['ETag']})
+    assert changes.status_code == 200
+    assert changes.get_json()['version'] == version
+    assert [row[3] for row in changes.get_json()['products'] if row[0] == pen.id] == ['3.00']
+    again = admin_client.get('/products/api/catalogue', headers={'If-None-Match': snapshot.headers['ETag']})
+    assert again.status_code == 200
+    assert [row[3] for row in again.get_json()['products'] if row[0] == pen.id] == ['3.00']
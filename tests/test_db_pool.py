@@ -0,0 +1,37 @@
+"""Connection pool configuration and stats tests."""
+from app import create_app, db
+from app.db_pool import engine_options, pool_stats
+from config import config
+
+
+def _config(uri, **overrides):
+    values = {k: getattr(config['production'], k) for k in dir(config['production']) if k.isupper()}
+    values.update(SQLALCHEMY_DATABASE_URI=uri, **overrides)
+    return values
+
+
+def test_engine_options_from_settings():
+    options = engine_options(_config(
+        'postgresql://u:p@db/sales', DB_POOL_SIZE=8, DB_POOL_PRE_PING=False, DB_STATEMENT_TIMEOUT_MS=5000,
+        SQLALCHEMY_ENGINE_OPTIONS={'max_overflow': 2, 'connect_args': {'options': '-c search_path=app'}},
+    ))
+    assert options['pool_size'] == 8
+    assert options['max_overflow'] == 2
+    assert options['pool_pre_ping'] is False
+    assert options['connect_args']['options'] == '-c search_path=app -c statement_timeout=5000'
+
+    memory = engine_options(_config('sqlite://', DB_STATEMENT_TIMEOUT_MS=5000))
+    assert 'pool_size' not in memory and 'connect_args' not in memory
+
+
+def test_pool_stats_and_gauge(tmp_path, monkeypatch):
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'pool.db'))
+    monkeypatch.setattr(config['testing'], 'DB_POOL_SIZE', 3)
+    app = create_app('testing')
+    with app.app_context():
+        with db.engine.connect():
+            (row,) = pool_stats(app.extensions['db_engines'])
+            assert (row['bind'], row['size'], row['checked_out']) == ('default', 3, 1)
+            metrics = app.test_client().get('/metrics').get_data(as_text=True)
+            assert 'db_pool_connections{bind="default",state="checked_out"} 1' in metrics
+        db.drop_all()
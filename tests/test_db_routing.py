@@ -0,0 +1,58 @@
+"""Read-replica routing tests, on two SQLite files standing in for a primary and a lagging replica."""
+import pytest
+
+from app import create_app, db
+from app.models import User
+from app.services import OrderService
+from config import config
+
+
+@pytest.fixture
+def replica_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'primary.db'))
+    monkeypatch.setattr(config['testing'], 'DATABASE_REPLICA_URLS', ['sqlite:///' + str(tmp_path / 'replica.db')])
+    monkeypatch.setattr(config['testing'], 'REPLICA_STICKY_SECONDS', 0)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        # Same schema, no rows: the replica has not caught up with anything yet.
+        db.metadata.create_all(db.engines['replica_0'])
+        user = User(username='admin', email='admin@example.com', full_name='Admin', role='admin')
+        user.set_password('admin123')
+        db.session.add(user)
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.metadata.drop_all(db.engines['replica_0'])
+    # db is shared by every app in the test run; forget the bind's (empty) metadata again.
+    db.metadatas.pop('replica_0', None)
+
+
+def test_marked_views_read_from_replica(replica_app):
+    client = replica_app.test_client()
+    client.post('/auth/login', data={'username': 'admin', 'password': 'admin123'})
+    order = OrderService.create_order('Replica Customer', None, None, [
+        {'item_type': 'manual_entry', 'product_name': 'Widget', 'quantity': 1, 'selling_price': '10'},
+    ])
+
+    assert order.order_number not in client.get('/orders/').get_data(as_text=True)
+    # Unmarked pages (read-after-write) stay on the primary.
+    assert order.order_number in client.get(f'/orders/{order.id}').get_data(as_text=True)
+
+
+def test_write_pins_session_to_primary(replica_app):
+    replica_app.config['REPLICA_STICKY_SECONDS'] = 60
+    client = replica_app.test_client()
+    client.post('/auth/login', data={'username': 'admin', 'password': 'admin123'})
+    response = client.post('/orders/add', data={
+        'customer_name': 'Sticky Customer', 'payment_method': 'cash', 'payment_status': 'pending',
+        'order_status': 'pending',
+        'items_json': '[{"item_type": "manual_entry", "product_name": "Widget", "quantity": 1, "selling_price": "10"}]',
+    })
+    assert response.status_code == 302
+
+    assert 'Sticky Customer' in client.get('/orders/').get_data(as_text=True)
+    with client.session_transaction() as session:
+        session.pop('db_primary_until')
+    assert 'Sticky Customer' not in client.get('/orders/').get_data(as_text=True)
@@ -0,0 +1,47 @@
+"""CSV export tests."""
+import csv
+import io
+from datetime import date
+
+from app import db
+from app.models import Order, OrderItem, Product
+
+
+def _rows(resp):
+    return list(csv.reader(io.StringIO(resp.data.decode('utf-8-sig'))))
+
+
+def test_orders_csv_applies_list_filters(admin_client):
+    db.session.add_all([
+        Order(order_number='O-1', customer_name='Paid Co', order_date=date.today(), payment_status='paid'),
+        Order(order_number='O-2', customer_name='Owing Co', order_date=date.today(), payment_status='pending'),
+    ])
+    db.session.commit()
+    resp = admin_client.get('/orders/?format=csv&payment=paid')
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert resp.mimetype == 'text/csv'
+    rows = _rows(resp)
+    assert rows[0][0] == 'Order #'
+    assert [r[0] for r in rows[1:]] == ['O-1']
+
+
+def test_order_items_csv(admin_client):
+    order = Order(order_number='O-1', customer_name='C', order_date=date.today())
+    db.session.add(order)
+    db.session.flush()
+    db.session.add(OrderItem(order_id=order.id, product_name='Widget', selling_price=5, quantity=2, subtotal=10))
+    db.session.commit()
+    rows = _rows(admin_client.get('/orders/?format=csv&items=1'))
+    assert rows[1][0] == 'O-1' and rows[1][4] == 'Widget' and rows[1][5] == '2'
+
+
+def test_list_and_report_csv_endpoints(admin_client):
+    db.session.add(Product(name='Bolt', sku='B-1', stock_quantity=3))
+    db.session.commit()
+    assert _rows(admin_client.get('/products/?format=csv&q=bol'))[1][:2] == ['Bolt', 'B-1']
+    for url in ('/quotations/?format=csv', '/deliveries/?format=csv', '/reports/?report_type=stock&format=csv',
+                '/reports/?report_type=sales&format=csv'):
+        resp = admin_client.get(url)
+        assert resp.status_code == 200, url
+        assert len(_rows(resp)) >= 1
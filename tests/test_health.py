@@ -0,0 +1,18 @@
+"""Liveness / readiness probe tests."""
+from sqlalchemy.exc import OperationalError
+
+from app import db
+
+
+def test_probes_need_no_login(client, db_ctx):
+    assert client.get('/healthz').get_json()['status'] == 'ok'
+    assert client.get('/readyz').get_json() == {'status': 'ready', 'database': 'ok'}
+
+
+def test_readyz_reports_database_outage(client, db_ctx, monkeypatch):
+    def down(*args, **kwargs):
+        raise OperationalError('SELECT 1', {}, Exception('connection refused'))
+    monkeypatch.setattr(db.session, 'execute', down)
+    resp = client.get('/readyz')
+    assert resp.status_code == 503
+    assert resp.get_json()['database'] == 'OperationalError'
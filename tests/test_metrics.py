@@ -0,0 +1,75 @@
+"""Metrics registry and /metrics endpoint tests."""
+import os
+import subprocess
+import sys
+
+from app import create_app
+from app.metrics import REGISTRY, Registry
+from app.services import OrderService
+
+
+def _sample(text, line_prefix):
+    return next(float(line.rsplit(' ', 1)[1]) for line in text.splitlines() if line.startswith(line_prefix))
+
+
+def test_histogram_exposition():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency.', ('route',), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 3):
+        latency.observe(value, route='a"b')
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{route="a\\"b",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="a\\"b",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="a\\"b",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="a\\"b"} 3' in text
+
+
+def test_metrics_endpoint(app, admin_client):
+    before = _sample(admin_client.get('/metrics').get_data(as_text=True), 'orders_created_total')
+    order = OrderService.create_order('Cust', None, None, [
+        {'item_type': 'manual_entry', 'product_name': 'Service', 'quantity': 1, 'selling_price': '10'},
+    ])
+    app.config['PDF_CACHE_ENABLED'] = False
+    admin_client.get(f'/orders/{order.id}/pdf')
+
+    text = admin_client.get('/metrics').get_data(as_text=True)
+    assert _sample(text, 'orders_created_total') == before + 1
+    assert _sample(text, 'pdf_render_duration_seconds_count{doc_type="invoice"}') >= 1
+    assert _sample(text, 'http_request_duration_seconds_count{endpoint="orders.pdf",method="GET"}') >= 1
+
+    app.config['METRICS_TOKEN'] = 'secret'
+    assert admin_client.get('/metrics').status_code == 401
+    assert admin_client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+
+def test_metrics_disabled_without_required_token(monkeypatch):
+    from config import config
+    monkeypatch.setattr(config['testing'], 'METRICS_REQUIRE_TOKEN', True)
+    assert create_app('testing').test_client().get('/metrics').status_code == 404
+
+    monkeypatch.setattr(config['testing'], 'METRICS_TOKEN', 'secret')
+    client = create_app('testing').test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+
+_CHILD = """
+import sys
+from app.metrics import REGISTRY, ORDERS_CREATED
+REGISTRY.configure(sys.argv[1], 60)
+ORDERS_CREATED.inc(5)
+"""
+
+
+def test_counters_summed_across_processes(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for _ in range(2):
+        # Each child flushes on exit; its file is then folded into archive.json.
+        subprocess.run([sys.executable, '-c', _CHILD, directory], check=True, cwd=root)
+    monkeypatch.setattr(REGISTRY, 'directory', directory)
+    text = REGISTRY.render()
+    local_total = sum(v for _, v in REGISTRY.snapshot()['orders_created_total'])
+    assert _sample(text, 'orders_created_total') == local_total + 10
+    assert os.listdir(directory).count('archive.json') == 1
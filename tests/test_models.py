@@ -1,39 +1,8 @@
 """Basic model and auth tests."""
-import pytest
-from app import create_app, db
+from app import db
 from app.models import User, Product, Order
 
 
-@pytest.fixture
-def app():
-    app = create_app('testing')
-    return app
-
-
-@pytest.fixture
-def client(app):
-    return app.test_client()
-
-
-@pytest.fixture
-def runner(app):
-    return app.test_cli_runner()
-
-
-@pytest.fixture
-def app_ctx(app):
-    with app.app_context():
-        yield
-
-
-@pytest.fixture
-def db_ctx(app, app_ctx):
-    db.create_all()
-    yield
-    db.session.remove()
-    db.drop_all()
-
-
 def test_user_password_hash(db_ctx):
     u = User(username='test', email='test@test.com', role='sales')
     u.set_password('secret')
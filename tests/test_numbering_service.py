@@ -0,0 +1,78 @@
+"""NumberingService tests, including a concurrent stress test for duplicates."""
+import threading
+from datetime import date
+
+import pytest
+
+from app import create_app, db
+from app.models import Order
+from app.services import NumberingService
+from config import config
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """App on a file-backed SQLite DB so several threads/apps can share it."""
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'numbers.db'))
+    app = create_app('testing')
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def test_numbers_are_sequential(db_ctx):
+    first = NumberingService.next_order_number()
+    second = NumberingService.next_order_number()
+    assert first.endswith('-0001')
+    assert second.endswith('-0002')
+    assert NumberingService.next_quotation_number().startswith('QUO-')
+
+
+def test_counter_continues_from_existing_documents(db_ctx):
+    period = date.today().strftime('%Y%m')
+    db.session.add(Order(order_number=f'ORD-{period}-0041', customer_name='Legacy', order_date=date.today()))
+    db.session.commit()
+    assert NumberingService.next_order_number() == f'ORD-{period}-0042'
+
+
+def test_concurrent_numbers_have_no_duplicates(file_app):
+    apps = [file_app] + [create_app('testing') for _ in range(3)]
+    issued, errors = [], []
+
+    def worker(app):
+        try:
+            with app.app_context():
+                for _ in range(25):
+                    issued.append(NumberingService.next_order_number())
+                    db.session.commit()
+        except Exception as e:  # pragma: no cover - surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(app,)) for app in apps for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(issued) == 300
+    assert len(set(issued)) == 300
+
+
+def test_concurrent_blocks_do_not_overlap(file_app):
+    period = date.today().strftime('%Y%m')
+    ranges = []
+
+    def worker():
+        with file_app.app_context():
+            for _ in range(20):
+                ranges.append(NumberingService._reserve_isolated('ORD', period, 5, Order, 'order_number'))
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    numbers = [n for first, last in ranges for n in range(first, last + 1)]
+    assert len(numbers) == 600
+    assert sorted(numbers) == list(range(1, 601))
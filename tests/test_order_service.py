@@ -0,0 +1,45 @@
+"""OrderService tests."""
+import pytest
+from app import db
+from app.models import Product, Order
+from app.services import OrderService
+
+
+def _product(name, stock, sku=None):
+    p = Product(name=name, sku=sku, stock_quantity=stock, buying_price=5, selling_price=10)
+    db.session.add(p)
+    db.session.commit()
+    return p
+
+
+def _line(p, qty):
+    return {'item_type': 'existing_product', 'product_id': p.id, 'product_name': p.name,
+            'quantity': qty, 'selling_price': '10'}
+
+
+def test_create_order_decrements_stock(db_ctx):
+    a = _product('A', 10, 'A-1')
+    b = _product('B', 3, 'B-1')
+    order = OrderService.create_order('Cust', None, None, [_line(a, 4), _line(b, 3), _line(a, 1)])
+    assert len(order.items) == 3
+    assert float(order.grand_total) == 80
+    assert a.stock_quantity == 5
+    assert b.stock_quantity == 0
+    assert order.items[0].buying_price == 5
+
+
+def test_create_order_rejects_whole_order_when_short(db_ctx):
+    a = _product('A', 10, 'A-1')
+    b = _product('B', 2, 'B-1')
+    with pytest.raises(ValueError, match='Insufficient stock for B'):
+        OrderService.create_order('Cust', None, None, [_line(a, 4), _line(b, 3)])
+    assert Order.query.count() == 0
+    assert db.session.get(Product, a.id).stock_quantity == 10
+    assert db.session.get(Product, b.id).stock_quantity == 2
+
+
+def test_create_order_manual_lines_skip_stock(db_ctx):
+    order = OrderService.create_order('Cust', None, None, [
+        {'item_type': 'manual_entry', 'product_name': 'Service', 'quantity': 1, 'selling_price': '50'},
+    ])
+    assert float(order.total_amount) == 50
@@ -0,0 +1,109 @@
+"""Keyset pagination tests."""
+import base64
+import json
+import re
+from datetime import date, datetime, timedelta
+
+from app import db
+from app.models import AuditLog, Delivery, Order
+from app.pagination import decode_cursor, encode_cursor, keyset_paginate
+
+
+def _orders(n):
+    start = datetime(2024, 1, 1)
+    # Pairs of orders share a timestamp so the id breaks ties.
+    orders = [Order(order_number=f'O-{i:03d}', customer_name='C', order_date=date.today(),
+                    created_at=start + timedelta(minutes=i // 2)) for i in range(n)]
+    db.session.add_all(orders)
+    db.session.commit()
+    return sorted(orders, key=lambda o: (o.created_at, o.id), reverse=True)
+
+
+def test_cursor_round_trip():
+    key = (datetime(2024, 5, 1, 12, 30, 15, 250), date(2024, 5, 1), 'abc', 3)
+    assert decode_cursor(encode_cursor('next', key), 4) == ('next', list(key))
+    assert decode_cursor('not a cursor', 4) == (None, None)
+    assert decode_cursor(encode_cursor('next', key), 2) == (None, None)
+
+
+def _token(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip('=')
+
+
+def test_tampered_cursors_yield_the_first_page(admin_client):
+    expected = [o.order_number for o in _orders(25)][:20]
+    for data in (
+        ['next', ['n', 'x'], 'x'],          # not a number
+        ['next', {'a': 1}, 'x'],            # not a key value
+        ['next', True, 'x'],
+        ['next', 'yesterday', 'x'],         # a string where created_at is compared
+        ['next', ['dt', '2024-01-01T00:00:00'], 5],
+        ['sideways', ['dt', '2024-01-01T00:00:00'], 'x'],
+    ):
+        response = admin_client.get(f'/orders/?cursor={_token(data)}')
+        assert response.status_code == 200, data
+        html = response.get_data(as_text=True)
+        assert [n for n in expected if n in html] == expected, data
+
+
+def test_pages_forward_and_back(db_ctx):
+    expected = [o.id for o in _orders(45)]
+    columns = [Order.created_at, Order.id]
+    seen, cursor, pages = [], None, []
+    while True:
+        page = keyset_paginate(Order.query, columns, cursor, per_page=20, descending=True)
+        pages.append(page)
+        seen += [o.id for o in page.items]
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert seen == expected
+    assert [len(p.items) for p in pages] == [20, 20, 5]
+    assert not pages[0].has_prev and pages[2].has_prev
+    assert pages[0].total_label == '45'
+
+    back = keyset_paginate(Order.query, columns, pages[2].prev_cursor, per_page=20, descending=True)
+    assert [o.id for o in back.items] == expected[20:40]
+    assert back.has_next and back.has_prev
+    first = keyset_paginate(Order.query, columns, back.prev_cursor, per_page=20, descending=True)
+    assert [o.id for o in first.items] == expected[:20] and not first.has_prev
+
+
+def test_rows_inserted_between_pages_do_not_shift_later_pages(db_ctx):
+    expected = [o.id for o in _orders(30)]
+    columns = [Order.created_at, Order.id]
+    page = keyset_paginate(Order.query, columns, per_page=10, descending=True)
+    db.session.add(Order(order_number='O-NEW', customer_name='C', order_date=date.today(),
+                         created_at=datetime(2030, 1, 1)))
+    db.session.commit()
+    page = keyset_paginate(Order.query, columns, page.next_cursor, per_page=10, descending=True)
+    assert [o.id for o in page.items] == expected[10:20]
+
+
+def test_later_pages_seek_past_the_cursor(db_ctx, count_queries):
+    _orders(30)
+    page = keyset_paginate(Order.query, [Order.created_at, Order.id], per_page=10, descending=True)
+    with count_queries() as queries:
+        keyset_paginate(Order.query, [Order.created_at, Order.id], page.next_cursor, per_page=10,
+                        descending=True, count=False)
+    # SQLite always renders OFFSET (bound to 0); the page is found by the row comparison instead.
+    assert len(queries) == 1 and '(orders.created_at, orders.id) < (' in queries[0]
+
+
+def test_list_pages_follow_cursor_links(admin_client):
+    _orders(25)
+    for i in range(3):
+        db.session.add(Delivery(delivery_number=f'D-{i}', customer_name='C', delivery_address='A',
+                                scheduled_date=date(2024, 1, 1 + i) if i else None))
+    db.session.add_all(AuditLog(action='test') for _ in range(55))
+    db.session.commit()
+
+    html = admin_client.get('/orders/').get_data(as_text=True)
+    assert html.count('O-0') == 20
+    next_url = re.search(r'href="(/orders/\?cursor=[^"]+)"', html).group(1).replace('&amp;', '&')
+    assert admin_client.get(next_url).get_data(as_text=True).count('O-0') == 5
+
+    html = admin_client.get('/deliveries/').get_data(as_text=True)
+    assert html.index('D-2') < html.index('D-1') < html.index('D-0')
+    for url in ('/settings/audit-log', '/quotations/', '/products/?q=widget'):
+        assert admin_client.get(url).status_code == 200
@@ -0,0 +1,51 @@
+"""Bulk invoice / delivery note PDF export tests."""
+import zipfile
+from io import BytesIO
+
+from pypdf import PdfReader
+from reportlab.pdfgen import canvas
+
+from app.pdf_bulk import merged_pdf_chunks, zip_chunks
+from app.services import OrderService
+
+
+def _pdf(pages):
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer)
+    for n in range(pages):
+        c.drawString(100, 700, f'page {n}')
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def test_merge_and_zip_chunks():
+    documents = [('a.pdf', _pdf(1)), ('b.pdf', _pdf(3)), ('c.pdf', _pdf(2))]
+    merged = PdfReader(BytesIO(b''.join(merged_pdf_chunks(documents))))
+    assert len(merged.pages) == 6
+    assert 'page 2' in merged.pages[3].extract_text()
+
+    archive = zipfile.ZipFile(BytesIO(b''.join(zip_chunks(documents))))
+    assert archive.namelist() == ['a.pdf', 'b.pdf', 'c.pdf']
+    assert archive.read('b.pdf') == documents[1][1]
+
+
+def _order(name):
+    return OrderService.create_order(name, None, None, [
+        {'item_type': 'manual_entry', 'product_name': 'Service', 'quantity': 1, 'selling_price': '10'},
+    ])
+
+
+def test_orders_bulk_pdf(admin_client):
+    orders = [_order(f'Cust {n}') for n in range(3)]
+
+    resp = admin_client.get('/orders/bulk-pdf')
+    assert resp.mimetype == 'application/pdf'
+    assert len(PdfReader(BytesIO(resp.data)).pages) == 3
+
+    resp = admin_client.get('/orders/bulk-pdf?format=zip&ids=' + ','.join(o.id for o in orders[:2]))
+    names = zipfile.ZipFile(BytesIO(resp.data)).namelist()
+    assert sorted(names) == sorted(f'Invoice_{o.order_number}.pdf' for o in orders[:2])
+
+    resp = admin_client.get('/orders/bulk-pdf?status=cancelled')
+    assert resp.status_code == 302
@@ -0,0 +1,45 @@
+"""Rendered PDF cache tests."""
+import os
+import time
+
+from app import db
+from app.models import Setting
+from app.pdf_cache import PdfCache
+from app.services import OrderService
+
+
+def test_evicts_least_recently_used(tmp_path):
+    pdf_cache = PdfCache(str(tmp_path), max_bytes=250)
+    for key in ('a', 'b', 'c'):
+        pdf_cache.put(key, b'x' * 100)
+        time.sleep(0.01)
+    assert pdf_cache.get('a') is None
+    assert pdf_cache.get('b') is not None
+    time.sleep(0.01)
+    pdf_cache.put('d', b'x' * 100)
+    assert pdf_cache.get('b') is not None
+    assert pdf_cache.get('c') is None
+    assert sorted(os.listdir(tmp_path)) == ['b.pdf', 'd.pdf']
+
+
+def test_invoice_pdf_served_from_cache_until_order_or_settings_change(app, admin_client, tmp_path):
+    pdf_cache = app.extensions['pdf_cache'] = PdfCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    order = OrderService.create_order('Cust', None, None, [
+        {'item_type': 'manual_entry', 'product_name': 'Service', 'quantity': 1, 'selling_price': '10'},
+    ])
+    url = f'/orders/{order.id}/pdf'
+
+    first = admin_client.get(url)
+    assert first.status_code == 200
+    assert admin_client.get(url).data == first.data
+    assert (pdf_cache.hits, pdf_cache.misses) == (1, 1)
+
+    order.customer_name = 'Renamed'
+    db.session.commit()
+    admin_client.get(url)
+    assert pdf_cache.misses == 2
+
+    Setting.set('company_name', 'Other Co')
+    admin_client.get(url)
+    assert pdf_cache.misses == 3
+    assert len(os.listdir(tmp_path)) == 3
@@ -0,0 +1,78 @@
+"""Background report PDF job tests."""
+import time
+
+import pytest
+
+from app import create_app, db
+from app.models import User
+from app.pdf_jobs import PdfJobQueue
+from config import config
+
+
+def _submit(client, **params):
+    data = {'report_type': 'stock', 'date_from': '2026-01-01', 'date_to': '2026-01-31'}
+    data.update(params)
+    return client.post('/reports/jobs', data=data)
+
+
+def test_inline_job_lifecycle(app, admin_client, tmp_path):
+    app.extensions['pdf_jobs'] = PdfJobQueue(app, str(tmp_path), workers=0, ttl=3600)
+    resp = _submit(admin_client)
+    assert resp.status_code == 202
+    job = resp.get_json()
+    assert job['status'] == 'done'
+    assert admin_client.get(job['status_url']).get_json()['status'] == 'done'
+
+    pdf = admin_client.get(job['download_url'])
+    assert pdf.data.startswith(b'%PDF')
+    assert 'report_stock_2026-01-01_2026-01-31.pdf' in pdf.headers['Content-Disposition']
+
+    assert _submit(admin_client, report_type='bogus').status_code == 400
+    assert _submit(admin_client, date_from='yesterday').status_code == 400
+    assert admin_client.get('/reports/jobs/' + 'f' * 32).status_code == 404
+    assert admin_client.get('/reports/jobs/../../etc/passwd').status_code == 404
+
+
+def test_failed_job_reports_failure(app, admin_client, tmp_path):
+    queue = app.extensions['pdf_jobs'] = PdfJobQueue(app, str(tmp_path), workers=0, ttl=3600)
+    job_id = queue.submit(_boom, (), 'x.pdf')
+    assert queue.meta(job_id)['status'] == 'failed'
+    assert admin_client.get(f'/reports/jobs/{job_id}/download').status_code == 409
+
+
+def _boom():
+    raise RuntimeError('render failed')
+
+
+@pytest.fixture
+def pool_app(tmp_path, monkeypatch):
+    """App on a file-backed SQLite DB that spawned job workers can open too."""
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'jobs.db'))
+    app = create_app('testing')
+    app.extensions['pdf_jobs'] = PdfJobQueue(app, str(tmp_path / 'jobs'), workers=1, ttl=3600)
+    yield app
+    app.extensions['pdf_jobs'].shutdown(wait=True)
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def test_job_renders_in_worker_process(pool_app):
+    with pool_app.app_context():
+        user = User(username='admin', email='admin@example.com', full_name='Admin', role='admin')
+        user.set_password('admin123')
+        db.session.add(user)
+        db.session.commit()
+    client = pool_app.test_client()
+    client.post('/auth/login', data={'username': 'admin', 'password': 'admin123'})
+
+    job = _submit(client).get_json()
+    deadline = time.monotonic() + 60
+    while job['status'] == 'pending' and time.monotonic() < deadline:
+        time.sleep(0.2)
+        job = client.get(job['status_url']).get_json()
+    assert job['status'] == 'done'
+    assert client.get(job['download_url']).data.startswith(b'%PDF')
+
+    page = client.get('/reports/?report_type=stock&format=pdf')
+    assert b'Preparing your PDF' in page.data
@@ -0,0 +1,65 @@
+"""Shared PDF toolkit tests."""
+import io
+
+import pytest
+import reportlab
+from pypdf import PdfReader
+
+from app import pdf_toolkit
+from app.services import OrderService
+
+
+def test_styles_and_logo_built_once(app_ctx, app):
+    pdf_toolkit.reset()
+    static_dir = app.static_folder
+    assert pdf_toolkit.get_styles(static_dir) is pdf_toolkit.get_styles(static_dir)
+    logo = pdf_toolkit.get_logo(static_dir)
+    assert logo is not None
+    assert pdf_toolkit.get_logo(static_dir) is logo
+
+    first = pdf_toolkit.document_header(static_dir, 512, 'INVOICE')
+    second = pdf_toolkit.document_header(static_dir, 512, 'INVOICE')
+    assert first is not second
+    assert [id(f) for f in first] == [id(f) for f in second]
+
+    pdf_toolkit.reset()
+    assert pdf_toolkit.get_logo(static_dir) is not logo
+    assert pdf_toolkit.document_header(static_dir, 512, 'INVOICE')[0] is not first[0]
+
+
+def test_documents_embed_cached_logo(admin_client, app):
+    order = OrderService.create_order('Cust', None, None, [
+        {'item_type': 'manual_entry', 'product_name': 'Service', 'quantity': 1, 'selling_price': '10'},
+    ], payment_status='paid')
+    app.config['PDF_CACHE_ENABLED'] = False
+    logo_name = pdf_toolkit.get_logo(app.static_folder).name.encode()
+    for url in (f'/orders/{order.id}/pdf', f'/orders/{order.id}/receipt?format=thermal'):
+        data = admin_client.get(url).data
+        assert data.startswith(b'%PDF')
+        assert data.count(b'/Subtype /Image') == 2  # logo and its soft mask
+        assert logo_name in data
+
+
+@pytest.mark.parametrize('shared', [True, False], ids=['shared-xobject', 'drawImage'])
+def test_logo_reads_back_with_pypdf(admin_client, app, monkeypatch, shared):
+    if shared and not pdf_toolkit.shared_xobject_supported():
+        pytest.skip(f'ReportLab {reportlab.Version} uses the drawImage path')
+    if not shared:
+        monkeypatch.setattr(pdf_toolkit, 'SHARED_XOBJECT_VERSIONS', ())
+    pdf_toolkit.reset()
+    order = OrderService.create_order('Cust', None, None, [
+        {'item_type': 'manual_entry', 'product_name': 'Service', 'quantity': 1, 'selling_price': '10'},
+    ], payment_status='paid')
+    app.config['PDF_CACHE_ENABLED'] = False
+    logo = pdf_toolkit.get_logo(app.static_folder)
+    assert (logo.xobject is not None) == shared
+    for url in (f'/orders/{order.id}/pdf', f'/orders/{order.id}/pdf'):
+        page = PdfReader(io.BytesIO(admin_client.get(url).data)).pages[0]
+        xobjects = page['/Resources']['/XObject']
+        images = [xobjects[name].get_object() for name in xobjects]
+        assert len(images) == 1
+        image = images[0]
+        assert (image['/Width'], image['/Height']) == (logo.width, logo.height)
+        assert '/SMask' in image
+        assert page.images[0].image.size == (logo.width, logo.height)
+    pdf_toolkit.reset()
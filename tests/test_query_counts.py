@@ -0,0 +1,69 @@
+"""Detail, invoice, edit and PDF routes load a record's lines in a fixed number of queries."""
+import pytest
+
+from app import db
+from app.models import Product
+from app.services import DeliveryService, OrderService, QuotationService
+
+
+def _lines(n):
+    return [{'item_type': 'manual_entry', 'product_name': f'Item {i}', 'quantity': 1,
+             'selling_price': '10', 'unit_price': '10'} for i in range(n)]
+
+
+def _order(n):
+    return OrderService.create_order('Cust', None, None, _lines(n), payment_status='paid').id
+
+
+def _quotation(n):
+    return QuotationService.create_quotation('Cust', None, None, None, _lines(n)).id
+
+
+def _delivery(n):
+    return DeliveryService.create_from_order(_order(n), None, None, 'Somewhere').id
+
+
+# Each view: the logged-in user, the record, its lines (plus the assignee choices on delivery edit).
+ROUTES = [
+    (_order, '/orders/{}', 3),
+    (_order, '/orders/{}/invoice', 3),
+    (_order, '/orders/{}/edit', 3),
+    (_order, '/orders/{}/pdf', 3),
+    (_order, '/orders/{}/receipt?format=thermal', 3),
+    (_quotation, '/quotations/{}', 3),
+    (_quotation, '/quotations/{}/edit', 3),
+    (_quotation, '/quotations/{}/pdf', 3),
+    (_delivery, '/deliveries/{}', 3),
+    (_delivery, '/deliveries/{}/edit', 4),
+    (_delivery, '/deliveries/{}/pdf', 3),
+]
+
+
+@pytest.mark.parametrize('make, url, expected', ROUTES)
+def test_route_query_count(app, admin_client, count_queries, make, url, expected):
+    app.config['PDF_CACHE_ENABLED'] = False
+    for n in (1, 10):
+        record_id = make(n)
+        db.session.expire_all()
+        with count_queries() as queries:
+            assert admin_client.get(url.format(record_id)).status_code == 200
+        assert len(queries) == expected, (url, n, queries)
+
+
+def test_convert_to_order_prices_products_in_one_query(admin_client, count_queries):
+    _order(1)  # seed the order number counter
+    counts = []
+    for n in (1, 10):
+        products = [Product(name=f'P{n}-{i}', stock_quantity=100, buying_price=5, selling_price=12) for i in range(n)]
+        db.session.add_all(products)
+        db.session.commit()
+        quotation = QuotationService.create_quotation('Cust', None, None, None, [
+            {'item_type': 'existing_product', 'product_id': p.id, 'product_name': p.name,
+             'quantity': 1, 'unit_price': '10'} for p in products
+        ])
+        db.session.expire_all()
+        with count_queries() as queries:
+            order = QuotationService.convert_to_order(quotation.id)
+        counts.append(len(queries))
+    assert float(order.total_amount) == 120
+    assert counts[0] == counts[1]
@@ -0,0 +1,117 @@
+"""The hot list, dashboard and report queries are served by an index, not a full table scan.
+
+Each query in HOT_QUERIES mirrors one in the app. It is EXPLAINed against seeded data and the
+test fails if the plan reads any table sequentially. PostgreSQL is run with enable_seqscan off,
+so it picks a sequential scan only when no usable index exists; SQLite plans such reads as a bare
+"SCAN <table>".
+"""
+import json
+import re
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select, text, tuple_
+
+from app import db
+from app.models import AuditLog, Delivery, Order, OrderItem, Product, Quotation
+from app.models.delivery import SCHEDULE_SORT_KEY
+
+NOW = datetime(2024, 6, 1)
+PAGE = 21
+OPEN_DELIVERIES = ['pending', 'assigned', 'in_transit']
+
+
+def _seed():
+    statuses = Order.ORDER_STATUSES
+    db.session.execute(insert(Product), [
+        {'id': f'p{i}', 'name': f'Product {i}', 'updated_at': NOW - timedelta(hours=i)} for i in range(50)
+    ])
+    db.session.execute(insert(Order), [
+        {'id': f'o{i}', 'order_number': f'O-{i:04d}', 'customer_name': 'C', 'order_date': (NOW - timedelta(days=i % 90)).date(),
+         'order_status': statuses[i % len(statuses)], 'payment_status': Order.PAYMENT_STATUSES[i % 4],
+         'created_at': NOW - timedelta(minutes=i)} for i in range(400)
+    ])
+    db.session.execute(insert(OrderItem), [
+        {'order_id': f'o{i // 2}', 'product_id': f'p{i % 50}', 'product_name': 'P', 'selling_price': 1,
+         'quantity': 1, 'subtotal': 1} for i in range(800)
+    ])
+    db.session.execute(insert(Delivery), [
+        {'id': f'd{i}', 'delivery_number': f'D-{i:04d}', 'customer_name': 'C', 'delivery_address': 'A',
+         'status': Delivery.STATUSES[i % len(Delivery.STATUSES)], 'assigned_to_id': f'u{i % 5}',
+         'scheduled_date': (NOW - timedelta(days=i % 30)).date() if i % 3 else None,
+         'created_at': NOW - timedelta(minutes=i)} for i in range(300)
+    ])
+    db.session.execute(insert(Quotation), [
+        {'quotation_number': f'Q-{i:04d}', 'customer_name': 'C', 'created_at': NOW - timedelta(minutes=i)}
+        for i in range(200)
+    ])
+    db.session.execute(insert(AuditLog), [
+        {'action': 'update', 'created_at': NOW - timedelta(seconds=i)} for i in range(1000)
+    ])
+    db.session.commit()
+
+
+def _keyset(model, *filters):
+    """A later page of a list (app.pagination): seek past a (created_at, id) cursor, newest first."""
+    return (select(model).where(*filters, tuple_(model.created_at, model.id) < tuple_(NOW - timedelta(hours=1), 'x'))
+            .order_by(model.created_at.desc(), model.id.desc()).limit(PAGE))
+
+
+HOT_QUERIES = {
+    'orders list': lambda: _keyset(Order),
+    'orders list by status': lambda: _keyset(Order, Order.order_status == 'pending'),
+    'orders list by payment': lambda: _keyset(Order, Order.payment_status == 'paid'),
+    'sales report': lambda: select(Order).where(
+        Order.order_date >= date(2024, 5, 1), Order.order_date <= date(2024, 5, 31), Order.order_status != 'cancelled',
+    ).order_by(Order.order_date, Order.order_number),
+    'dashboard payment counts': lambda: select(Order.payment_status, func.count(Order.id)).where(
+        Order.order_date >= date(2024, 5, 25)).group_by(Order.payment_status),
+    'dashboard recent orders': lambda: select(Order.id, Order.order_number).where(
+        Order.order_status != 'cancelled').order_by(Order.created_at.desc()).limit(10),
+    'dashboard open deliveries': lambda: select(func.count()).select_from(Delivery).where(
+        Delivery.status.in_(OPEN_DELIVERIES)),
+    'order lines': lambda: select(OrderItem).where(OrderItem.order_id == 'o1'),
+    'product sales history': lambda: select(OrderItem).join(Order).where(
+        OrderItem.product_id == 'p1').order_by(Order.created_at.desc()).limit(50),
+    'deliveries list': lambda: select(Delivery).where(
+        tuple_(SCHEDULE_SORT_KEY, Delivery.created_at, Delivery.id) < tuple_(date(2024, 5, 20), NOW, 'x'),
+    ).order_by(SCHEDULE_SORT_KEY.desc(), Delivery.created_at.desc(), Delivery.id.desc()).limit(PAGE),
+    'deliveries of a driver': lambda: select(Delivery).where(Delivery.assigned_to_id == 'u1'),
+    'deliveries by status and date': lambda: select(Delivery).where(
+        Delivery.status == 'delivered', Delivery.created_at >= NOW - timedelta(days=1)),
+    'delivery report': lambda: select(Delivery).where(
+        Delivery.created_at >= NOW - timedelta(days=7), Delivery.created_at <= NOW).order_by(Delivery.created_at),
+    'quotations list': lambda: _keyset(Quotation),
+    'audit log': lambda: _keyset(AuditLog),
+    'catalogue changes': lambda: select(Product).where(Product.updated_at > NOW - timedelta(hours=3)),
+}
+
+
+def _sequential_scans(statement):
+    conn = db.session.connection()
+    sql = str(statement.compile(conn, compile_kwargs={'literal_binds': True}))
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text('SET LOCAL enable_seqscan = off'))
+        plan = conn.execute(text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        nodes, scans = [plan[0]['Plan']], []
+        while nodes:
+            node = nodes.pop()
+            if node['Node Type'] == 'Seq Scan':
+                scans.append(node['Relation Name'])
+            nodes.extend(node.get('Plans', []))
+        return scans
+    details = [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+    return [m.group(1) for m in (re.fullmatch(r'SCAN (\w+)', d) for d in details) if m]
+
+
+@pytest.fixture
+def seeded(db_ctx):
+    _seed()
+
+
+@pytest.mark.parametrize('name', list(HOT_QUERIES))
+def test_hot_query_uses_an_index(seeded, name):
+    scans = _sequential_scans(HOT_QUERIES[name]())
+    db.session.rollback()
+    assert not scans, f'{name}: sequential scan of {", ".join(scans)}'
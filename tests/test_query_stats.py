@@ -0,0 +1,32 @@
+"""Per-request SQL instrumentation tests."""
+import logging
+
+from app.query_stats import QueryStats
+
+
+def test_snapshot_buckets_and_percentiles():
+    stats = QueryStats(window=3)
+    for queries, ms in ((1, 0.5), (2, 3.0), (4, 40.0), (3, 2000.0)):
+        stats.record('orders.list', queries, ms)
+    (row,) = stats.snapshot()
+    assert row['requests'] == 3  # oldest sample rolled out
+    assert row['queries_max'] == 4
+    assert row['db_ms_max'] == 2000.0
+    assert row['buckets'][1] == 1 and row['buckets'][4] == 1 and row['buckets'][-1] == 1
+
+
+def test_headers_histogram_and_slow_log(app, admin_client, caplog):
+    app.debug = True
+    resp = admin_client.get('/orders/')
+    assert int(resp.headers['X-DB-Query-Count']) >= 2
+    assert float(resp.headers['X-DB-Time-Ms']) >= 0
+
+    app.config['SLOW_QUERY_MS'] = 0
+    with caplog.at_level(logging.WARNING, logger='app.query_stats'):
+        admin_client.get('/orders/')
+    assert 'Slow query' in caplog.text and 'orders.list' in caplog.text
+
+    page = admin_client.get('/settings/query-stats')
+    assert b'orders.list' in page.data
+    admin_client.post('/settings/query-stats')
+    assert [row['endpoint'] for row in app.extensions['query_stats'].snapshot()] == ['settings.query_stats']
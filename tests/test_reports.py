@@ -0,0 +1,54 @@
+"""Report tests."""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app import db
+from app.blueprints.reports.routes import _sales_report
+from app.models import Order
+
+
+def _order(number, day, total, method='cash', status='completed'):
+    db.session.add(Order(order_number=number, customer_name='C', order_date=day, grand_total=Decimal(total),
+                         payment_method=method, order_status=status))
+
+
+def test_sales_report_aggregates_in_sql(db_ctx):
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    _order('O-1', yesterday, '10.00')
+    _order('O-2', today, '20.00', method='mpesa')
+    _order('O-3', today, '30.00')
+    _order('O-4', today, '99.00', status='cancelled')
+    db.session.commit()
+
+    data = _sales_report(yesterday, today, page=1, per_page=2)
+    assert data['count'] == 3
+    assert data['total_revenue'] == Decimal('60.00')
+    assert [(d.day, d.count, d.revenue) for d in data['by_day']] == [(yesterday, 1, Decimal('10.00')), (today, 2, Decimal('50.00'))]
+    assert {p.method: p.revenue for p in data['by_payment']} == {'cash': Decimal('40.00'), 'mpesa': Decimal('20.00')}
+    assert len(data['orders']) == 2
+    assert data['pagination'].pages == 2
+
+    export = _sales_report(yesterday, today)
+    assert [o.order_number for o in export['orders']] == ['O-1', 'O-2', 'O-3']
+
+
+def test_sales_report_page_renders(admin_client):
+    resp = admin_client.get('/reports/?report_type=sales')
+    assert resp.status_code == 200
+    assert b'By Payment Method' in resp.data
+
+
+def test_excel_export_streams_every_report_type(admin_client):
+    from io import BytesIO
+    import openpyxl
+    _order('O-1', date.today(), '10.00')
+    db.session.commit()
+    for report_type, first_header, rows in [('sales', 'Order', 2), ('product_performance', 'Product', 1),
+                                            ('delivery_performance', 'Delivery', 1), ('stock', 'Product', 1)]:
+        resp = admin_client.get(f'/reports/?report_type={report_type}&format=excel')
+        assert resp.status_code == 200
+        assert resp.is_streamed
+        ws = openpyxl.load_workbook(BytesIO(resp.data)).active
+        assert ws.cell(1, 1).value == first_header
+        assert ws.max_row == rows
@@ -0,0 +1,67 @@
+"""Daily sales rollup tests."""
+import logging
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.blueprints.reports.routes import _product_performance_report
+from app.models import DailySalesSummary, DailyProductSales, Order, Product
+from app.services import OrderService, RollupService
+
+
+def _create_order(product, qty, payment_status='paid'):
+    return OrderService.create_order('C', None, None, [
+        {'item_type': 'existing_product', 'product_id': product.id, 'product_name': product.name,
+         'quantity': qty, 'selling_price': '10'},
+    ], payment_status=payment_status)
+
+
+def test_create_and_cancel_keep_rollups_current(db_ctx):
+    p = Product(name='Widget', stock_quantity=100, buying_price=4, selling_price=10)
+    db.session.add(p)
+    db.session.commit()
+    _create_order(p, 2)
+    order = _create_order(p, 3, payment_status='pending')
+
+    summary = db.session.get(DailySalesSummary, date.today())
+    assert (summary.order_count, summary.revenue, summary.paid_revenue) == (2, Decimal('50.00'), Decimal('20.00'))
+    row = db.session.get(DailyProductSales, (date.today(), 'Widget'))
+    assert (row.quantity, row.revenue, row.profit) == (5, Decimal('50.00'), Decimal('30.00'))
+
+    order.order_status = 'cancelled'
+    db.session.commit()
+    RollupService.refresh_day(order.order_date)
+    db.session.expire_all()
+    assert db.session.get(DailySalesSummary, date.today()).order_count == 1
+    rows = _product_performance_report(date.today(), date.today())['rows']
+    assert [(r.product_name, r.qty) for r in rows] == [('Widget', 2)]
+
+
+def test_rebuild_command_backfills(db_ctx, runner):
+    db.session.add(Order(order_number='O-1', customer_name='C', order_date=date(2024, 1, 5), grand_total=7))
+    db.session.commit()
+    assert DailySalesSummary.query.count() == 0
+    result = runner.invoke(args=['rollups', 'rebuild', '--from', '2024-01-01', '--to', '2024-01-31'])
+    assert 'Rollups rebuilt' in result.output
+    assert db.session.get(DailySalesSummary, date(2024, 1, 5)).revenue == Decimal('7.00')
+
+
+def test_dashboard_renders_from_rollups(admin_client):
+    resp = admin_client.get('/')
+    assert resp.status_code == 200
+
+
+def test_failed_refresh_keeps_the_saved_order(db_ctx, monkeypatch, caplog):
+    def fail(date_from, date_to):
+        raise OperationalError('DELETE FROM daily_sales_summary', {}, Exception('deadlock detected'))
+
+    monkeypatch.setattr(RollupService, '_rebuild', staticmethod(fail))
+    p = Product(name='Widget', stock_quantity=100, buying_price=4, selling_price=10)
+    db.session.add(p)
+    db.session.commit()
+    with caplog.at_level(logging.ERROR, logger='app.services.rollup_service'):
+        order = _create_order(p, 2)
+    assert db.session.get(Order, order.id).order_number == order.order_number
+    assert 'flask rollups rebuild' in caplog.text
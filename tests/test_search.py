@@ -0,0 +1,115 @@
+"""Product search tests (in-process n-gram backend)."""
+import logging
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import Category, DailyProductSales, Product
+from app.search import NgramSearch, TrigramSearch, get_search, init_search
+
+
+def _products(*rows):
+    products = [Product(name=name, sku=sku, selling_price=10, stock_quantity=5) for name, sku in rows]
+    db.session.add_all(products)
+    db.session.commit()
+    return {p.name: p.id for p in products}
+
+
+def test_ranking_and_fuzzy_match(db_ctx):
+    ids = _products(
+        ('USB Cable', 'USB-01'), ('Cable Tie', 'TIE-02'), ('Cabinet Lock', 'CAB'),
+        ('Desk Lamp', 'LMP-03'), ('Cable Tray', 'TRAY-04'),
+    )
+    db.session.add(DailyProductSales(day=date.today(), product_name='Cable Tray', quantity=40, revenue=400, profit=40))
+    db.session.commit()
+    search = NgramSearch()
+
+    # exact SKU, then name prefixes (recent sales first), then word prefix
+    assert search.search('cab') == [ids['Cabinet Lock'], ids['Cable Tray'], ids['Cable Tie'], ids['USB Cable']]
+    misspelt = search.search('cabel')
+    assert misspelt[0] == ids['Cable Tray']
+    assert {ids['Cable Tie'], ids['USB Cable']} <= set(misspelt) and ids['Desk Lamp'] not in misspelt
+    assert search.search('sk-0') == []
+    assert search.search('tray-0') == [ids['Cable Tray']]
+    assert search.search('amp') == [ids['Desk Lamp']]
+
+
+def test_index_follows_commits(db_ctx, count_queries):
+    search = get_search()
+    ids = _products(('Printer Paper', 'PP-1'))
+    assert search.search('printer') == [ids['Printer Paper']]
+
+    new = _products(('Printer Ink', 'PI-1'))
+    product = db.session.get(Product, ids['Printer Paper'])
+    product.is_active = False
+    db.session.commit()
+    with count_queries() as queries:
+        assert search.search('printer') == [new['Printer Ink']]
+    assert queries == []
+
+
+def test_api_search_and_list(admin_client):
+    ids = _products(('Stapler', 'ST-1'), ('Staples Box', 'ST-2'), ('Tape', 'TP-1'))
+    results = admin_client.get('/products/api/search?q=stapl').get_json()
+    assert [r['id'] for r in results] == [ids['Stapler'], ids['Staples Box']]
+
+    page = admin_client.get('/products/?q=staplr').get_data(as_text=True)
+    assert 'Stapler' in page and 'Tape' not in page
+
+
+
+def test_list_filters_apply_before_the_match_limit(admin_client, monkeypatch):
+    monkeypatch.setattr('app.blueprints.products.routes.LIST_LIMIT', 3)
+    tools = Category(name='Tools')
+    db.session.add(tools)
+    db.session.commit()
+    _products(('Cable A', 'CA-1'), ('Cable B', 'CB-1'), ('Cable C', 'CC-1'))
+    ids = _products(('Cable Z', 'CZ-1'))
+    db.session.get(Product, ids['Cable Z']).category_id = tools.id
+    db.session.commit()
+
+    page = admin_client.get(f'/products/?q=cable&category={tools.id}').get_data(as_text=True)
+    assert 'Cable Z' in page and 'Cable A' not in page
+
+def test_api_search_cache_and_etag(admin_client, count_queries):
+    ids = _products(('Marker Pen', 'MK-1'))
+    first = admin_client.get('/products/api/search?q=Marker&fields=id,name,bogus')
+    assert first.get_json() == [{'id': ids['Marker Pen'], 'name': 'Marker Pen'}]
+    etag = first.headers['ETag']
+    assert etag.startswith('W/') and 'max-age=10' in first.headers['Cache-Control']
+
+    with count_queries() as queries:
+        again = admin_client.get('/products/api/search?q=%20marker&fields=id,name', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert not [q for q in queries if 'FROM products' in q]
+
+    product = db.session.get(Product, ids['Marker Pen'])
+    product.stock_quantity = 0
+    db.session.commit()
+    full = admin_client.get('/products/api/search?q=marker', headers={'If-None-Match': etag})
+    assert full.status_code == 200 and full.get_json()[0]['stock_quantity'] == 0
+
+
+def test_api_search_cache_follows_stock_reservations(admin_client):
+    from app.services import OrderService
+    ids = _products(('Glue Stick', 'GS-1'))
+    assert admin_client.get('/products/api/search?q=glue').get_json()[0]['stock_quantity'] == 5
+    OrderService.create_order('Customer', None, None, [
+        {'item_type': 'existing_product', 'product_id': ids['Glue Stick'], 'quantity': 2, 'selling_price': '10'},
+    ])
+    assert admin_client.get('/products/api/search?q=glue').get_json()[0]['stock_quantity'] == 3
+
+
+@pytest.mark.parametrize('schema, expected', [
+    ((True, []), TrigramSearch),
+    ((True, ['ix_products_sku_trgm']), TrigramSearch),
+    ((False, ['ix_products_name_trgm', 'ix_products_sku_trgm']), NgramSearch),
+])
+def test_init_search_only_checks_the_trigram_schema(app, monkeypatch, caplog, schema, expected):
+    monkeypatch.setitem(app.config, 'SEARCH_BACKEND', 'trigram')
+    monkeypatch.setattr(TrigramSearch, 'check_schema', classmethod(lambda cls, engine: schema))
+    with caplog.at_level(logging.ERROR, logger='app.search'):
+        init_search(app)
+    assert type(app.extensions['search']) is expected
+    assert ('flask db upgrade' in caplog.text) == (schema != (True, []))
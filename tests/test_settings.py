@@ -0,0 +1,39 @@
+"""Settings cache and bulk write tests."""
+from app import db
+from app.cache import cache
+from app.models import Setting
+from app.models.settings import SETTINGS_VERSION_KEY
+
+
+def test_get_served_from_snapshot(db_ctx, count_queries):
+    Setting.set_many([('company_name', 'Acme', 'company'), ('tax_rate', 16, 'general')])
+    assert Setting.get('company_name') == 'Acme'
+    with count_queries() as queries:
+        assert Setting.get('tax_rate') == '16'
+        assert Setting.get('currency', 'KSH') == 'KSH'
+    assert queries == []
+
+    Setting.set('company_name', 'Acme Ltd', 'company')
+    assert Setting.get('company_name') == 'Acme Ltd'
+
+
+def test_snapshot_reloads_on_version_change(db_ctx):
+    Setting.set('currency', 'KSH', 'general')
+    assert Setting.get('currency') == 'KSH'
+    # Another process changed the row and dropped the version token.
+    db.session.connection().exec_driver_sql("UPDATE settings SET value = 'USD' WHERE key = 'currency'")
+    db.session.commit()
+    assert Setting.get('currency') == 'KSH'
+    cache.delete(SETTINGS_VERSION_KEY)
+    assert Setting.get('currency') == 'USD'
+
+
+def test_save_writes_in_one_transaction(admin_client, count_queries):
+    form = {'company_name': 'Acme', 'company_phone': '0700', 'company_address': 'Nairobi',
+            'tax_rate': '16', 'currency': 'KSH'}
+    with count_queries() as queries:
+        assert admin_client.post('/settings/save', data=form).status_code == 302
+    assert sum(1 for q in queries if q.startswith('SELECT') and 'FROM settings' in q) == 1
+    assert sum(1 for q in queries if q.startswith('INSERT INTO settings')) == 1
+    page = admin_client.get('/settings/').get_data(as_text=True)
+    assert 'Nairobi' in page and 'value="0700"' in page
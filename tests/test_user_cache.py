@@ -0,0 +1,87 @@
+"""Cached user loader tests."""
+import pytest
+
+from app import create_app, db
+from app.models import User
+
+
+def test_requests_skip_users_query(admin_client, count_queries):
+    admin_client.get('/products/api/search?q=x')
+    with count_queries() as queries:
+        assert admin_client.get('/products/api/search?q=x').status_code == 200
+    assert not [q for q in queries if 'FROM users' in q]
+
+
+def test_edit_invalidates_role_and_active(app):
+    # Requests run outside an app context here: Flask-Login keeps current_user in g, which a
+    # surrounding context would share between the two clients.
+    with app.app_context():
+        db.create_all()
+        for username, role in (('admin', 'admin'), ('sam', 'sales')):
+            user = User(username=username, email=f'{username}@example.com', full_name=username, role=role)
+            user.set_password('secret123')
+            db.session.add(user)
+        db.session.commit()
+        user_id = User.query.filter_by(username='sam').one().id
+    admin, client = app.test_client(), app.test_client()
+    admin.post('/auth/login', data={'username': 'admin', 'password': 'secret123'})
+    client.post('/auth/login', data={'username': 'sam', 'password': 'secret123'})
+    try:
+        assert client.get('/users/').status_code == 403
+
+        form = {'username': 'sam', 'email': 'sam@example.com', 'full_name': 'Sam', 'role': 'admin', 'is_active': 'y'}
+        assert admin.post(f'/users/{user_id}/edit', data=form).status_code == 302
+        assert client.get('/users/').status_code == 200
+
+        form.pop('is_active')
+        admin.post(f'/users/{user_id}/edit', data=form)
+        response = client.get('/users/')
+        assert response.status_code == 302 and '/auth/login' in response.headers['Location']
+    finally:
+        with app.app_context():
+            db.drop_all()
+
+
+def test_profile_password_change(admin_client):
+    data = {'current_password': 'admin123', 'new_password': 'newpass123', 'confirm_password': 'newpass123'}
+    admin_client.post('/auth/profile', data=data)
+    assert User.query.filter_by(username='admin').one().check_password('newpass123')
+
+
+def test_role_change_reaches_other_workers(monkeypatch, tmp_path):
+    """Two app instances (as two gunicorn workers) sharing the database and a filesystem cache."""
+    from config import config
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path}/app.db')
+    monkeypatch.setattr(config['testing'], 'CACHE_BACKEND', 'filesystem')
+    monkeypatch.setattr(config['testing'], 'CACHE_DIR', str(tmp_path / 'cache'))
+    editing, serving = create_app('testing'), create_app('testing')
+    with editing.app_context():
+        for username, role in (('admin', 'admin'), ('sam', 'sales')):
+            user = User(username=username, email=f'{username}@example.com', full_name=username, role=role)
+            user.set_password('secret123')
+            db.session.add(user)
+        db.session.commit()
+        user_id = User.query.filter_by(username='sam').one().id
+    admin, client = editing.test_client(), serving.test_client()
+    admin.post('/auth/login', data={'username': 'admin', 'password': 'secret123'})
+    client.post('/auth/login', data={'username': 'sam', 'password': 'secret123'})
+    try:
+        assert client.get('/users/').status_code == 403
+
+        form = {'username': 'sam', 'email': 'sam@example.com', 'full_name': 'Sam', 'role': 'admin', 'is_active': 'y'}
+        assert admin.post(f'/users/{user_id}/edit', data=form).status_code == 302
+        assert client.get('/users/').status_code == 200
+    finally:
+        for app in (editing, serving):
+            with app.app_context():
+                db.session.remove()
+                db.engine.dispose()
+
+
+def test_simple_cache_refused_with_several_workers(monkeypatch):
+    monkeypatch.setenv('SERVER_SOFTWARE', 'gunicorn/23.0.0')
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    with pytest.raises(RuntimeError, match='CACHE_BACKEND'):
+        create_app('testing')
+    monkeypatch.setenv('WEB_CONCURRENCY', '1')
+    create_app('testing')